@@ -1,90 +1,58 @@
+from __future__ import annotations
+
 # Standard library imports
-import ast
-import json
-from typing import Dict, List, Any, Optional, Union
+import os
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
 
 # Third-party imports
-import mlflow
-import pandas as pd
 import streamlit as st
-from splink import DuckDBAPI, Linker
 
 # Local imports
+# Only what the first page needs is imported here. MLflow, Splink, Altair,
+# pandas and DuckDB are imported by the functions that use them, so a fresh
+# replica serves its first page without loading them.
 from components.record_forms import create_record_forms
-from components.visualization import display_results
-from utils.duckdb_handler import DuckDBHandler
-from utils.splink_utils import prediction_row_to_waterfall_format
+from utils.comparison_history import ComparisonHistory
+from utils.model_cache import ModelCache
+from utils.multi_model import compare_across_models
+from utils.sample_records import HARDCODED_RECORD_VALUES
+from utils.telemetry import configure_logging, telemetry
+from utils.warmup import READY, ModelWarmup, warmup_model_uris
+
+if TYPE_CHECKING:
+    from utils.candidate_search import CandidateIndex
+    from utils.comparison_engine import ComparisonEngine
+    from utils.parallel_scoring import ParallelBatchScorer
+    from utils.streaming_scoring import StreamingScorer
+    from utils.term_frequencies import TermFrequencyStore
 
 # Constants
 DEFAULT_MODEL_URI = "models:/main.generic_match.nebraska_match/14"
-EMPTY_STRING_PLACEHOLDER = ""
-
-# Hardcoded values for specific model URI
-HARDCODED_RECORD_VALUES = {
-    'left': {
-        "salt_key": 1,
-        "unique_id": 1,
-        "mapped_contact_id": 1,
-        "infogroup_id": 1,
-        "id": 1,
-        "first_lower": "walter",
-        "last_lower": "white",
-        "nicknames": "['walt']",
-        "phone_list": "['1012412351']",
-        "email_cleaned": "walterwhite@gmail.com",
-        "business_name_list": "['dax']",
-        "in_business": "yes",
-        "address_standardized_street_no": 121,
-        "address_standardized_street": "lincolnrd",
-        "address_standardized_pre_directional": "N",
-        "address_standardized_post_directional": "E",
-        "address_standardized_occupancy_type": "rent",
-        "address_standardized_occupancy_identifier": 221,
-        "address_standardized_place": "pune",
-        "state_cleaned": "maharashtra",
-        "address_standardized_state": "maharashtra",
-        "address_standardized_zip_code": 411030,
-        "address_standardized": "121lincolnpunemaharashtra"
-    },
-    'right': {
-        "salt_key": 2,
-        "unique_id": 2,
-        "mapped_contact_id": 2,
-        "infogroup_id": 2,
-        "id": 2,
-        "first_lower": "walter",
-        "last_lower": "white",
-        "nicknames": "['walt']",
-        "phone_list": "['1012412351']",
-        "email_cleaned": "walterwhite@gmail.com",
-        "business_name_list": "['dax']",
-        "in_business": "yes",
-        "address_standardized_street_no": 121,
-        "address_standardized_street": "lincolnrd",
-        "address_standardized_pre_directional": "N",
-        "address_standardized_post_directional": "E",
-        "address_standardized_occupancy_type": "rent",
-        "address_standardized_occupancy_identifier": 221,
-        "address_standardized_place": "pune",
-        "state_cleaned": "maharashtra",
-        "address_standardized_state": "maharashtra",
-        "address_standardized_zip_code": 411030,
-        "address_standardized": "121lincolnpunemaharashtra"
-    }
-}
 
 # Session state keys
 SESSION_KEYS = {
     'LINKER_JSON': 'linker_json',
-    'MLFLOW_LINKER': 'mlflow_linker',
     'LEFT_RECORD': 'left_record',
     'RIGHT_RECORD': 'right_record',
     'LAST_RESULT': 'last_result',
     'LAST_LEFT_RECORD': 'last_left_record',
     'LAST_RIGHT_RECORD': 'last_right_record',
-    'MODEL_URI': 'model_uri'
+    'MODEL_URI': 'model_uri',
+    'COMPARISON_ENGINE': 'comparison_engine',
+    'COMPARISON_ENGINES': 'comparison_engines',
+    'LAST_MODEL_RESULTS': 'last_model_results',
+    'LAST_TIMINGS': 'last_timings',
+    'LAST_BLOCKING': 'last_blocking',
+    'MODEL_VERSIONS': 'model_versions'
 }
 
+# The diagnostics panel is shown with ?diagnostics=1 or MATCHAI_DIAGNOSTICS=1
+DIAGNOSTICS_ENV = 'MATCHAI_DIAGNOSTICS'
+DIAGNOSTICS_QUERY_PARAM = 'diagnostics'
+
+# Maximum number of model-scoped comparison engines kept alive across sessions
+MAX_CACHED_ENGINES = 4
+
 # Page configuration
 st.set_page_config(
     page_title="MatchAI Record Comparison",
@@ -165,123 +133,227 @@ CUSTOM_CSS = """
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # =============================================================================
-# UTILITY FUNCTIONS
+# CORE FUNCTIONS
 # =============================================================================
 
-def convert_to_json(data: Any) -> Any:
+@st.cache_resource(show_spinner=False)
+def get_model_cache() -> ModelCache:
     """
-    Recursively convert data to JSON-serializable format.
+    Get the on-disk model cache, shared across all sessions.
     
-    Args:
-        data: Any data type to convert
-        
     Returns:
-        JSON-serializable version of the data
-    """
-    if isinstance(data, dict):
-        return {k: convert_to_json(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [convert_to_json(item) for item in data]
-    elif isinstance(data, (str, int, float, bool)):
-        return data
-    elif data is None:
-        return None
-    else:
-        try:
-            return str(data)
-        except Exception:
-            return None
+        Model cache configured from the MATCHAI_* environment variables
+    """
+    return ModelCache.from_env()
+
+
+@st.cache_resource(show_spinner=False)
+def get_candidate_index() -> CandidateIndex:
+    """
+    Get the persistent candidate search index, shared across all sessions.
+    
+    Returns:
+        Candidate index at MATCHAI_CANDIDATE_INDEX_PATH or its default location
+    """
+    from utils.candidate_search import CandidateIndex
+    return CandidateIndex.from_env()
 
 
-def fix_list_types(record: Dict[str, Any]) -> Dict[str, Any]:
+@st.cache_resource(show_spinner=False)
+def get_comparison_history() -> ComparisonHistory:
     """
-    Ensure empty lists are properly typed as string lists for DuckDB compatibility.
+    Get the persistent comparison history, shared across all sessions.
+    
+    Returns:
+        Comparison history at MATCHAI_COMPARISON_HISTORY_PATH or its default location
+    """
+    return ComparisonHistory.from_env()
+
+
+@st.cache_resource(show_spinner=False)
+def get_term_frequency_store() -> Optional[TermFrequencyStore]:
+    """
+    Get the memory-mapped term frequency tables, shared across all sessions.
+    
+    Returns:
+        Store reading MATCHAI_TF_TABLES_DIR, or None when it is not set
+    """
+    from utils.term_frequencies import TermFrequencyStore
+    return TermFrequencyStore.from_env()
+
+
+@st.cache_resource(show_spinner=False)
+def get_batch_scorer() -> ParallelBatchScorer:
+    """
+    Get the parallel batch scorer and its DuckDB workers, shared across all sessions.
+    
+    Returns:
+        Batch scorer configured from the MATCHAI_BATCH_* environment variables
+    """
+    from utils.parallel_scoring import ParallelBatchScorer
+    return ParallelBatchScorer.from_env()
+
+
+@st.cache_resource(show_spinner=False)
+def get_streaming_scorer() -> StreamingScorer:
+    """
+    Get the out-of-core scorer for pair files larger than memory.
+    
+    Returns:
+        Streaming scorer configured from the MATCHAI_STREAM_* environment variables
+    """
+    from utils.streaming_scoring import StreamingScorer
+    return StreamingScorer.from_env()
+
+
+def load_linker_json(model_uri: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Load the normalized linker JSON of a model through the on-disk model cache.
     
     Args:
-        record: Dictionary containing record data
+        model_uri: URI of the MLflow model to load
         
     Returns:
-        Dictionary with fixed list types for DuckDB compatibility
+        Tuple of (normalized linker JSON, resolved model version or None)
     """
-    fixed_record = record.copy()
-    for key, value in fixed_record.items():
-        if key.endswith('_list') and isinstance(value, list):
-            if len(value) == 0:
-                # For empty lists, use a list with an empty string to ensure VARCHAR[] type
-                # This prevents DuckDB type inference issues
-                fixed_record[key] = [EMPTY_STRING_PLACEHOLDER]
-            else:
-                # Ensure all items in the list are strings
-                fixed_record[key] = [str(item) for item in value if item is not None]
-    return fixed_record
+    from utils.pipeline import normalize_model_json
+    return get_model_cache().load_linker_json(model_uri, normalize_model_json)
 
 
-def normalize_config(config: Dict[str, Any]) -> Dict[str, Any]:
+@st.cache_resource(max_entries=MAX_CACHED_ENGINES, show_spinner=False)
+def get_comparison_engine(model_key: str, _linker_json: Dict[str, Any]) -> ComparisonEngine:
     """
-    Ensure 'additional_columns_to_retain' is converted from a string
-    representation of a list into an actual Python list.
+    Get the comparison engine for a model, shared across all sessions.
     
     Args:
-        config: Configuration dictionary
+        model_key: Model URI pinned to its resolved version, used as the cache key
+        _linker_json: Splink linker configuration (excluded from hashing)
         
     Returns:
-        Normalized configuration dictionary
-        
-    Raises:
-        ValueError: If additional_columns_to_retain has invalid format
+        Comparison engine holding the validated settings and compiled SQL
     """
-    if isinstance(config.get("additional_columns_to_retain"), str):
-        try:
-            config["additional_columns_to_retain"] = ast.literal_eval(config["additional_columns_to_retain"])
-        except (ValueError, SyntaxError):
-            raise ValueError("Invalid format for 'additional_columns_to_retain'")
-    return config
+    from utils.comparison_engine import ComparisonEngine
+    return ComparisonEngine(_linker_json, model_uri=model_key.split('#')[0], term_frequencies=get_term_frequency_store())
 
 
-# =============================================================================
-# CORE FUNCTIONS
-# =============================================================================
+@st.cache_resource(show_spinner=False)
+def get_model_warmup() -> ModelWarmup:
+    """
+    Start warming the models listed in MATCHAI_WARMUP_MODELS, once per process.
+    
+    The models are loaded through the shared caches on a background thread, so
+    every session finds their engines ready instead of loading them.
+    
+    Returns:
+        Model warmup tracking the state of each model
+    """
+    model_warmup = ModelWarmup(_load_warm_engine, on_scored=_warm_rendering)
+    model_warmup.start(warmup_model_uris())
+    return model_warmup
+
+
+def _load_warm_engine(model_uri: str) -> ComparisonEngine:
+    """Load a model into the shared engine cache, as _load_model does."""
+    linker_json, model_version = load_linker_json(model_uri)
+    return get_comparison_engine(f"{model_uri}#{model_version}", linker_json)
+
 
-def calculate_predictions(left_record: Dict[str, Any], right_record: Dict[str, Any], linker_json: Dict[str, Any]) -> Any:
+def _warm_rendering(comparison_engine: ComparisonEngine, prediction_row: Dict[str, Any]) -> None:
+    """Build the result elements of the sample pair, importing and warming the chart stack."""
+    from components.visualization import prerender_results
+    prerender_results(
+        prediction_row,
+        HARDCODED_RECORD_VALUES['left'],
+        HARDCODED_RECORD_VALUES['right'],
+        comparison_engine.settings['additional_columns_to_retain']
+    )
+
+
+def calculate_predictions(left_record: Dict[str, Any], right_record: Dict[str, Any], comparison_engine: ComparisonEngine) -> List[Dict[str, Any]]:
     """
     Calculate Splink predictions for two records.
     
     Args:
         left_record: First record to compare
         right_record: Second record to compare
-        linker_json: Splink linker configuration
+        comparison_engine: Comparison engine of the loaded model
         
     Returns:
-        Splink prediction dataframe
+        List of prediction rows as dictionaries
         
     Raises:
         Exception: If prediction calculation fails
     """
     try:
-        # Fix list types to ensure DuckDB compatibility
-        left_record_fixed = fix_list_types(left_record)
-        right_record_fixed = fix_list_types(right_record)
+        # The engine coerces both records to the model's typed schema
+        return comparison_engine.compare(left_record, right_record)
+        
+    except Exception as e:
+        st.error(f"Error during prediction calculation: {str(e)}")
+        raise
+
+def calculate_model_comparison(left_record: Dict[str, Any], right_record: Dict[str, Any], comparison_engines: Dict[str, ComparisonEngine]) -> Dict[str, Dict[str, Any]]:
+    """
+    Score two records against several models concurrently.
+    
+    Args:
+        left_record: First record to compare
+        right_record: Second record to compare
+        comparison_engines: Comparison engines keyed by model URI
         
-        # Convert records to dataframes
-        left_df = pd.DataFrame([left_record_fixed])
-        right_df = pd.DataFrame([right_record_fixed])
+    Returns:
+        Prediction row per model URI
+    """
+    return compare_across_models(comparison_engines, left_record, right_record)
+
+def recall_comparisons(left_record: Dict[str, Any], right_record: Dict[str, Any], comparison_engines: Dict[str, ComparisonEngine], model_versions: Dict[str, Optional[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up the prediction rows of models that already scored a record pair.
+    
+    Models loaded from an unpinned URI have no version and are never recalled,
+    since the URI could point at a different model by now.
+    
+    Args:
+        left_record: First record to compare
+        right_record: Second record to compare
+        comparison_engines: Comparison engines keyed by model URI
+        model_versions: Resolved version per model URI
         
-        # Initialize Splink linker
-        linker = Linker(
-            input_table_or_tables=[left_df, right_df],
-            db_api=DuckDBAPI(),
-            settings=linker_json,
+    Returns:
+        Stored prediction row per model URI, for the models that scored the pair before
+    """
+    comparison_history = get_comparison_history()
+    recalled = {}
+    for uri, engine in comparison_engines.items():
+        if model_versions.get(uri) is None:
+            continue
+        prediction_row = comparison_history.get(
+            uri, model_versions[uri], engine.schema.coerce(left_record), engine.schema.coerce(right_record)
         )
+        if prediction_row is not None:
+            recalled[uri] = prediction_row
+    return recalled
 
-        left_record_fixed['nicknames'] = ['']
-        right_record_fixed['nicknames'] = ['']
 
-        # Run prediction
-        return linker.inference.compare_two_records(left_record_fixed, right_record_fixed)
-        
-    except Exception as e:
-        st.error(f"Error during prediction calculation: {str(e)}")
-        raise
+def remember_comparisons(left_record: Dict[str, Any], right_record: Dict[str, Any], prediction_rows: Dict[str, Dict[str, Any]], comparison_engines: Dict[str, ComparisonEngine], model_versions: Dict[str, Optional[str]]) -> None:
+    """
+    Store newly scored prediction rows in the comparison history.
+    
+    Args:
+        left_record: First record that was compared
+        right_record: Second record that was compared
+        prediction_rows: Prediction row per model URI
+        comparison_engines: Comparison engines keyed by model URI
+        model_versions: Resolved version per model URI
+    """
+    comparison_history = get_comparison_history()
+    for uri, prediction_row in prediction_rows.items():
+        if model_versions.get(uri) is None:
+            continue
+        engine = comparison_engines[uri]
+        comparison_history.put(
+            uri, model_versions[uri], engine.schema.coerce(left_record), engine.schema.coerce(right_record), prediction_row
+        )
 
 # =============================================================================
 # MAIN APPLICATION
@@ -291,8 +363,9 @@ def main() -> None:
     """
     Main application function that orchestrates the Streamlit interface.
     """
-    mlflow.set_tracking_uri("databricks")
-    mlflow.set_registry_uri("databricks-uc")
+    # MLflow is pointed at Databricks by the model registry when it is first used
+    configure_logging()
+    get_model_warmup()
     _render_header()
     _render_model_configuration()
     _render_record_comparison_interface()
@@ -310,39 +383,77 @@ def _render_header() -> None:
 
 def _render_model_configuration() -> None:
     """Render the model configuration section."""
-    with st.container():
+    # Editing the URIs does not rerun the page until the model is fetched
+    with st.form("model_configuration_form", border=False):
         st.markdown("### Model Configuration")
         model_uri = st.text_input('Enter the model URI', value=DEFAULT_MODEL_URI)
-        fetch_model_button = st.button("Fetch Model", key="fetch_model_button")
+        comparison_model_uris = st.text_area(
+            'Compare against additional model URIs (one per line, optional)',
+            key="comparison_model_uris",
+            height=68
+        )
+        fetch_model_button = st.form_submit_button("Fetch Model", key="fetch_model_button")
         
         _initialize_session_state()
         
+        warmup_states = get_model_warmup().states()
         if fetch_model_button:
+            _load_model(model_uri, _parse_model_uris(comparison_model_uris))
+        elif st.session_state[SESSION_KEYS['LINKER_JSON']] is None and warmup_states.get(model_uri) == READY:
+            # A warmed model is loaded right away, without waiting for Fetch Model
             _load_model(model_uri)
+        
+        if warmup_states:
+            st.caption("Preloaded models: " + ", ".join(f"`{uri}` ({state})" for uri, state in warmup_states.items()))
 
 
 def _initialize_session_state() -> None:
     """Initialize session state variables for model data."""
     if SESSION_KEYS['LINKER_JSON'] not in st.session_state:
         st.session_state[SESSION_KEYS['LINKER_JSON']] = None
-    if SESSION_KEYS['MLFLOW_LINKER'] not in st.session_state:
-        st.session_state[SESSION_KEYS['MLFLOW_LINKER']] = None
+    if SESSION_KEYS['COMPARISON_ENGINE'] not in st.session_state:
+        st.session_state[SESSION_KEYS['COMPARISON_ENGINE']] = None
+    if SESSION_KEYS['COMPARISON_ENGINES'] not in st.session_state:
+        st.session_state[SESSION_KEYS['COMPARISON_ENGINES']] = {}
+
 
+def _parse_model_uris(text: str) -> List[str]:
+    """Split a text area of model URIs into a list, one URI per non-empty line."""
+    return [line.strip() for line in text.splitlines() if line.strip()]
 
-def _load_model(model_uri: str) -> None:
+
+def _load_model(model_uri: str, comparison_model_uris: Optional[List[str]] = None) -> None:
     """
     Load MLflow model and update session state.
     
     Args:
         model_uri: URI of the MLflow model to load
+        comparison_model_uris: URIs of further models to score side by side
     """
     try:
-        st.session_state[SESSION_KEYS['MLFLOW_LINKER']] = mlflow.pyfunc.load_model(model_uri)
-        st.session_state[SESSION_KEYS['LINKER_JSON']] = convert_to_json(
-            st.session_state[SESSION_KEYS['MLFLOW_LINKER']].unwrap_python_model().model_json.copy()
-        )
+        comparison_engines = {}
+        model_versions = {}
+        for uri in [model_uri] + [uri for uri in comparison_model_uris or [] if uri != model_uri]:
+            with telemetry.timed('load_model', uri):
+                linker_json, model_version = load_linker_json(uri)
+                comparison_engines[uri] = get_comparison_engine(f"{uri}#{model_version}", linker_json)
+            # Results depend on the term frequency tables too, so the history tells them apart
+            term_frequencies = get_term_frequency_store()
+            if model_version is not None and term_frequencies is not None:
+                model_version = f"{model_version}+tf.{term_frequencies.fingerprint()[:12]}"
+            model_versions[uri] = model_version
+            if uri == model_uri:
+                st.session_state[SESSION_KEYS['LINKER_JSON']] = linker_json
+
+        st.session_state[SESSION_KEYS['COMPARISON_ENGINE']] = comparison_engines[model_uri]
+        st.session_state[SESSION_KEYS['COMPARISON_ENGINES']] = comparison_engines
+        st.session_state[SESSION_KEYS['MODEL_VERSIONS']] = model_versions
         st.session_state[SESSION_KEYS['MODEL_URI']] = model_uri
-        st.success("Model loaded successfully!")
+        st.session_state.pop(SESSION_KEYS['LAST_MODEL_RESULTS'], None)
+        if len(comparison_engines) > 1:
+            st.success(f"{len(comparison_engines)} models loaded successfully!")
+        else:
+            st.success("Model loaded successfully!")
     except Exception as e:
         st.error(f"Failed to load model: {str(e)}")
 
@@ -350,16 +461,50 @@ def _load_model(model_uri: str) -> None:
 def _render_record_comparison_interface() -> None:
     """Render the record comparison interface if model is loaded."""
     if st.session_state[SESSION_KEYS['LINKER_JSON']] is not None:
-        _render_record_input_forms()
-        _render_calculation_section()
-        _render_results_display()
+        _render_comparison_section()
+        _render_candidate_search_section()
+        _render_comparison_history_section()
+        _render_batch_scoring_section()
     else:
         st.info("Please fetch the model first to access the record comparison interface.")
 
 
+@st.fragment
+def _render_comparison_section() -> None:
+    """
+    Render the record forms, calculation and results.
+    
+    The record fields live in a form, so typing does not rerun anything, and
+    submitting it reruns this fragment only.
+    """
+    with st.form("record_comparison_form", border=False, enter_to_submit=False):
+        _render_record_input_forms()
+        calculate_button = _render_calculation_section()
+    
+    if calculate_button:
+        _run_comparison()
+    
+    _render_results_display()
+    
+    if _diagnostics_enabled():
+        from components.diagnostics import create_diagnostics_panel
+        create_diagnostics_panel(telemetry.snapshot(), st.session_state.get(SESSION_KEYS['LAST_TIMINGS']))
+
+
+def _diagnostics_enabled() -> bool:
+    """Whether the hidden diagnostics panel was asked for."""
+    return os.environ.get(DIAGNOSTICS_ENV) == '1' or st.query_params.get(DIAGNOSTICS_QUERY_PARAM) == '1'
+
+
+def _additional_columns_to_retain() -> List[str]:
+    """Record columns of the loaded model, normalized when the model was fetched."""
+    return st.session_state[SESSION_KEYS['LINKER_JSON']]['additional_columns_to_retain']
+
+
 def _render_record_input_forms() -> None:
     """Render the record input forms section."""
-    additional_columns_to_retain = normalize_config(st.session_state[SESSION_KEYS['LINKER_JSON']])['additional_columns_to_retain']
+    additional_columns_to_retain = _additional_columns_to_retain()
+    record_schema = st.session_state[SESSION_KEYS['COMPARISON_ENGINE']].schema
     
     # Check if we should use hardcoded values
     current_model_uri = st.session_state.get(SESSION_KEYS['MODEL_URI'], '')
@@ -392,7 +537,8 @@ def _render_record_input_forms() -> None:
         st.session_state[SESSION_KEYS['LEFT_RECORD']] = create_record_forms(
             left_initial_data, 
             key_prefix="left",
-            additional_columns_to_retain=additional_columns_to_retain
+            additional_columns_to_retain=additional_columns_to_retain,
+            schema=record_schema
         )
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -402,43 +548,91 @@ def _render_record_input_forms() -> None:
         st.session_state[SESSION_KEYS['RIGHT_RECORD']] = create_record_forms(
             right_initial_data, 
             key_prefix="right",
-            additional_columns_to_retain=additional_columns_to_retain
+            additional_columns_to_retain=additional_columns_to_retain,
+            inject_css=False,
+            schema=record_schema
         )
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def _render_calculation_section() -> None:
-    """Render the calculation button section."""
+def _render_calculation_section() -> bool:
+    """
+    Render the calculation button section.
+    
+    Returns:
+        True if the record form was submitted
+    """
     st.markdown('<div class="calculate-section">', unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        calculate_button = st.button("Calculate Match Score", type="primary", use_container_width=True)
+        calculate_button = st.form_submit_button("Calculate Match Score", type="primary", use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
-    
-    if calculate_button:
-        _run_comparison()
+    return calculate_button
 
 
 def _run_comparison() -> None:
     """Run the record comparison and handle results."""
+    from utils.blocking_analysis import analyze_pair_blocking
+    
     left_record = st.session_state.get(SESSION_KEYS['LEFT_RECORD'])
     right_record = st.session_state.get(SESSION_KEYS['RIGHT_RECORD'])
     
     if left_record and right_record:
         with st.spinner("Analyzing records and calculating match score..."):
             try:
-                prediction_result = calculate_predictions(
-                    left_record, 
-                    right_record, 
-                    st.session_state[SESSION_KEYS['LINKER_JSON']]
-                )
+                model_uri = st.session_state.get(SESSION_KEYS['MODEL_URI'])
+                comparison_engines = st.session_state.get(SESSION_KEYS['COMPARISON_ENGINES'], {})
+                model_versions = st.session_state.get(SESSION_KEYS['MODEL_VERSIONS'], {})
+                timings = {}
+                # Pairs a model scored before are recalled instead of scored again
+                with telemetry.timed('history_recall', model_uri, timings):
+                    recalled = recall_comparisons(left_record, right_record, comparison_engines, model_versions)
+                unscored_engines = {uri: engine for uri, engine in comparison_engines.items() if uri not in recalled}
+                if len(comparison_engines) > 1:
+                    # The loaded model is scored as part of the concurrent pass
+                    scored = {}
+                    if unscored_engines:
+                        with telemetry.timed('compare_models', model_uri, timings):
+                            scored = calculate_model_comparison(left_record, right_record, unscored_engines)
+                    model_results = {uri: recalled.get(uri) or scored[uri] for uri in comparison_engines}
+                    st.session_state[SESSION_KEYS['LAST_MODEL_RESULTS']] = model_results
+                    prediction_rows = [model_results[model_uri]]
+                else:
+                    st.session_state.pop(SESSION_KEYS['LAST_MODEL_RESULTS'], None)
+                    scored = {}
+                    if model_uri in recalled:
+                        prediction_rows = [recalled[model_uri]]
+                    else:
+                        with telemetry.timed('compare_records', model_uri, timings):
+                            prediction_rows = calculate_predictions(
+                                left_record, 
+                                right_record, 
+                                st.session_state[SESSION_KEYS['COMPARISON_ENGINE']]
+                            )
+                        if prediction_rows and prediction_rows[0]:
+                            scored = {model_uri: prediction_rows[0]}
+                if scored:
+                    with telemetry.timed('history_store', model_uri, timings):
+                        remember_comparisons(left_record, right_record, scored, comparison_engines, model_versions)
+                st.session_state[SESSION_KEYS['LAST_TIMINGS']] = timings
                 
-                if prediction_result.as_record_dict()[0]:
+                if prediction_rows and prediction_rows[0]:
                     # Store result in session state for display
-                    st.session_state[SESSION_KEYS['LAST_RESULT']] = prediction_result.as_record_dict()[0]
+                    st.session_state[SESSION_KEYS['LAST_RESULT']] = prediction_rows[0]
                     st.session_state[SESSION_KEYS['LAST_LEFT_RECORD']] = left_record
                     st.session_state[SESSION_KEYS['LAST_RIGHT_RECORD']] = right_record
-                    st.success("Comparison completed successfully!")
+                    st.session_state.pop(SESSION_KEYS['LAST_BLOCKING'], None)
+                    with telemetry.timed('blocking_analysis', model_uri, timings):
+                        st.session_state[SESSION_KEYS['LAST_BLOCKING']] = analyze_pair_blocking(
+                            st.session_state[SESSION_KEYS['LINKER_JSON']],
+                            left_record,
+                            right_record,
+                            schema=st.session_state[SESSION_KEYS['COMPARISON_ENGINE']].schema
+                        )
+                    if recalled and not scored:
+                        st.success("Comparison recalled from history")
+                    else:
+                        st.success("Comparison completed successfully!")
                 else:
                     st.error("No comparison results returned")
             except Exception as e:
@@ -449,8 +643,27 @@ def _render_results_display() -> None:
     """Render the results display section if results are available."""
     required_keys = [SESSION_KEYS['LAST_RESULT'], SESSION_KEYS['LAST_LEFT_RECORD'], SESSION_KEYS['LAST_RIGHT_RECORD']]
     if all(key in st.session_state for key in required_keys):
-        additional_columns_to_retain = normalize_config(st.session_state[SESSION_KEYS['LINKER_JSON']])['additional_columns_to_retain']
-        st.markdown("---")
+        model_uri = st.session_state.get(SESSION_KEYS['MODEL_URI'])
+        with telemetry.timed('render_results', model_uri, st.session_state.setdefault(SESSION_KEYS['LAST_TIMINGS'], {})):
+            _render_results()
+
+
+def _render_results() -> None:
+    """Render the stored comparison results for one or several models."""
+    with telemetry.timed('import_visualization'):
+        from components.blocking_coverage import display_blocking_coverage
+        from components.visualization import display_model_comparison, display_results
+    additional_columns_to_retain = _additional_columns_to_retain()
+    st.markdown("---")
+    model_results = st.session_state.get(SESSION_KEYS['LAST_MODEL_RESULTS'])
+    if model_results:
+        display_model_comparison(
+            model_results,
+            st.session_state[SESSION_KEYS['LAST_LEFT_RECORD']],
+            st.session_state[SESSION_KEYS['LAST_RIGHT_RECORD']],
+            additional_columns_to_retain
+        )
+    else:
         st.markdown("### Comparison Results")
         display_results(
             st.session_state[SESSION_KEYS['LAST_RESULT']], 
@@ -458,6 +671,65 @@ def _render_results_display() -> None:
             st.session_state[SESSION_KEYS['LAST_RIGHT_RECORD']],
             additional_columns_to_retain
         )
+    
+    if st.toggle("What-if sensitivity sweep", key="sensitivity_toggle", help="Score variants of each field of the pair"):
+        _render_sensitivity()
+    
+    blocking_analysis = st.session_state.get(SESSION_KEYS['LAST_BLOCKING'])
+    if blocking_analysis is not None:
+        display_blocking_coverage(blocking_analysis)
+
+
+def _render_sensitivity() -> None:
+    """Render how the match weight of the last pair moves when each field is varied."""
+    from components.sensitivity import display_sensitivity
+    from utils.sensitivity import sensitivity_sweep
+    st.markdown("### What-if Sensitivity")
+    base_weight, sweep = sensitivity_sweep(
+        st.session_state[SESSION_KEYS['COMPARISON_ENGINE']],
+        st.session_state[SESSION_KEYS['LAST_LEFT_RECORD']],
+        st.session_state[SESSION_KEYS['LAST_RIGHT_RECORD']]
+    )
+    display_sensitivity(base_weight, sweep)
+
+
+@st.fragment
+def _render_candidate_search_section() -> None:
+    """Render the top-K candidate search for Record A, rerunning on its own when used."""
+    from components.candidate_search import create_candidate_search_section
+    st.markdown("---")
+    create_candidate_search_section(
+        get_candidate_index(),
+        st.session_state[SESSION_KEYS['COMPARISON_ENGINE']],
+        st.session_state.get(SESSION_KEYS['LEFT_RECORD']),
+        _additional_columns_to_retain()
+    )
+
+
+@st.fragment
+def _render_comparison_history_section() -> None:
+    """Render search over past comparisons, rerunning on its own when used."""
+    from components.comparison_history import create_comparison_history_section
+    st.markdown("---")
+    create_comparison_history_section(
+        get_comparison_history(),
+        st.session_state.get(SESSION_KEYS['MODEL_URI']),
+        _additional_columns_to_retain()
+    )
+
+
+@st.fragment
+def _render_batch_scoring_section() -> None:
+    """Render the batch pair-scoring section, rerunning on its own when used."""
+    from components.batch_scoring import create_batch_scoring_section
+    st.markdown("---")
+    create_batch_scoring_section(
+        st.session_state[SESSION_KEYS['LINKER_JSON']],
+        term_frequencies=get_term_frequency_store(),
+        streaming_scorer=get_streaming_scorer(),
+        batch_scorer=get_batch_scorer(),
+        schema=st.session_state[SESSION_KEYS['COMPARISON_ENGINE']].schema
+    )
 
 
 # =============================================================================
@@ -0,0 +1,165 @@
+"""
+Offline smoke check of the on-disk model cache.
+
+Runs ModelCache against the LocalModelRegistry stand-in, serving the bundled
+model (data/record_data.json) as several registry versions, in a temporary
+directory. Covers a pinned-URI hit, the bypass of unpinned URIs, the gzip
+round-trip of cache entries and least-recently-used eviction down to the size
+limit. Exits non-zero on the first failed check.
+
+Usage:
+    python benchmarks/model_cache_smoke.py
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.model_cache import CACHE_FILE_SUFFIX, LocalModelRegistry, ModelCache  # noqa: E402
+from utils.pipeline import normalize_model_json  # noqa: E402
+
+DEFAULT_MODEL_PATH = os.path.join(REPO_ROOT, 'data', 'record_data.json')
+MODEL_NAME = 'smoke_model'
+
+
+class CountingRegistry:
+    """Registry wrapper counting the models fetched from the wrapped registry"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.fetches = []
+
+    def resolve_version(self, model_uri):
+        return self.registry.resolve_version(model_uri)
+
+    def load_model_json(self, model_uri):
+        self.fetches.append(model_uri)
+        return self.registry.load_model_json(model_uri)
+
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+    print(f"ok  {message}")
+
+
+def _registry_directory(root, model_path, versions):
+    """Lay the bundled model out as <root>/<name>/<version>.json for each version"""
+    model_dir = os.path.join(root, MODEL_NAME)
+    os.makedirs(model_dir)
+    for version in versions:
+        shutil.copy(model_path, os.path.join(model_dir, f'{version}.json'))
+    return root
+
+
+def _cache_files(cache):
+    return sorted(
+        os.path.join(cache.cache_dir, file_name)
+        for file_name in os.listdir(cache.cache_dir) if file_name.endswith(CACHE_FILE_SUFFIX)
+    )
+
+
+def check_pinned_hit(root, model_path):
+    """A pinned URI is fetched once, then served from disk by any cache on the directory"""
+    registry = CountingRegistry(LocalModelRegistry(_registry_directory(os.path.join(root, 'registry'), model_path, [1, 2])))
+    cache_dir = os.path.join(root, 'cache')
+    cache = ModelCache(registry, cache_dir=cache_dir)
+
+    linker_json, version = cache.load_linker_json(f'models:/{MODEL_NAME}/1', normalize_model_json)
+    check(version == '1' and registry.fetches == [f'models:/{MODEL_NAME}/1'], "pinned URI is fetched on a miss")
+    again, version = ModelCache(registry, cache_dir=cache_dir).load_linker_json(f'models:/{MODEL_NAME}/1', normalize_model_json)
+    check(len(registry.fetches) == 1 and again == linker_json, "pinned URI is a hit for a new cache on the same directory")
+
+    _, version = cache.load_linker_json(f'models:/{MODEL_NAME}/latest', normalize_model_json)
+    check(version == '2' and len(registry.fetches) == 2, "latest resolves to the highest version and is cached under it")
+    cache.load_linker_json(f'models:/{MODEL_NAME}/2', normalize_model_json)
+    check(len(registry.fetches) == 2, "the resolved version is a hit when requested by number")
+
+
+def check_unpinned_bypass(root, model_path):
+    """URIs that cannot be pinned to a version always go to the registry and are never written"""
+    registry = CountingRegistry(LocalModelRegistry(model_path))
+    cache = ModelCache(registry, cache_dir=os.path.join(root, 'unpinned_cache'))
+    for _ in range(2):
+        _, version = cache.load_linker_json('runs:/0123456789abcdef/model', normalize_model_json)
+    check(version is None and len(registry.fetches) == 2, "unpinned URI is fetched on every load")
+    check(_cache_files(cache) == [], "unpinned URI is never written to the cache")
+
+
+def check_gzip_round_trip(root, model_path):
+    """Entries are gzipped compact JSON holding the normalized linker JSON"""
+    registry = LocalModelRegistry(_registry_directory(os.path.join(root, 'gzip_registry'), model_path, [3]))
+    cache = ModelCache(registry, cache_dir=os.path.join(root, 'gzip_cache'))
+    linker_json, _ = cache.load_linker_json(f'models:/{MODEL_NAME}/3', normalize_model_json)
+
+    [path] = _cache_files(cache)
+    with open(path, 'rb') as f:
+        check(f.read(2) == b'\x1f\x8b', "cache entry is gzip compressed")
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        entry = json.load(f)
+    with open(model_path, 'r') as f:
+        expected = normalize_model_json(json.load(f))
+    check(
+        entry['version'] == '3' and entry['linker_json'] == linker_json == expected,
+        "cache entry round-trips the normalized linker JSON"
+    )
+    check(os.path.getsize(path) < os.path.getsize(model_path), "cache entry is smaller than the raw model JSON")
+
+
+def check_lru_eviction(root, model_path):
+    """Least recently used entries, by modification time, are evicted down to max_bytes"""
+    registry = LocalModelRegistry(_registry_directory(os.path.join(root, 'lru_registry'), model_path, [1, 2, 3, 4]))
+    cache = ModelCache(registry, cache_dir=os.path.join(root, 'lru_cache'), max_bytes=1 << 40)
+    paths = {}
+    for version in (1, 2, 3):
+        cache.load_linker_json(f'models:/{MODEL_NAME}/{version}', normalize_model_json)
+        paths[version] = cache._cache_path(MODEL_NAME, str(version))
+        # Distinct, increasing access times regardless of the file system's resolution
+        os.utime(paths[version], (1_000_000 + version, 1_000_000 + version))
+
+    entry_bytes = max(os.path.getsize(path) for path in paths.values())
+    cache.max_bytes = int(entry_bytes * 2.5)
+    # Reading version 1 makes it the most recently used, so version 2 is now the oldest
+    cache.load_linker_json(f'models:/{MODEL_NAME}/1', normalize_model_json)
+    cache.load_linker_json(f'models:/{MODEL_NAME}/4', normalize_model_json)
+    paths[4] = cache._cache_path(MODEL_NAME, '4')
+
+    remaining = set(_cache_files(cache))
+    check(paths[2] not in remaining, "least recently used entry is evicted")
+    check({paths[1], paths[4]} <= remaining, "recently read and newly written entries are kept")
+    check(sum(os.path.getsize(path) for path in remaining) <= cache.max_bytes, "cache directory fits in max_bytes")
+
+    cache.max_bytes = 1
+    cache.load_linker_json(f'models:/{MODEL_NAME}/2', normalize_model_json)
+    check(_cache_files(cache) == [paths[2]], "the most recently used entry is kept even above max_bytes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='Linker JSON served by the local registry')
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix='matchai-model-cache-')
+    try:
+        check_pinned_hit(root, args.model)
+        check_unpinned_bypass(root, args.model)
+        check_gzip_round_trip(root, args.model)
+        check_lru_eviction(root, args.model)
+    except AssertionError as e:
+        print(f"FAILED {e}")
+        return 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    print("Model cache checks passed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""
+Offline benchmarks of the scoring path.
+
+Times each stage of a comparison separately against the bundled model settings
+(data/record_data.json), seeded from HARDCODED_RECORD_VALUES and extended with
+synthetic record pairs. Results are written as JSON and can be checked against
+an earlier run with per-stage regression thresholds. Stages with a serial
+counterpart (score_pairs_parallel vs score_pairs_sql) are also checked for a
+minimum speedup over it within the same run.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1 1000 --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd  # noqa: E402
+
+from components.record_forms import format_value_for_input  # noqa: E402
+from utils.batch_scoring import score_pairs as score_pairs_sql  # noqa: E402
+from utils.comparison_engine import ComparisonEngine  # noqa: E402
+from utils.parallel_scoring import ParallelBatchScorer  # noqa: E402
+from utils.pipeline import normalize_model_json  # noqa: E402
+from utils.record_schema import RecordSchema  # noqa: E402
+from utils.sample_records import HARDCODED_RECORD_VALUES  # noqa: E402
+from utils.splink_utils import prediction_row_to_waterfall_format, prediction_row_to_waterfall_frame, predictions_to_waterfall_format  # noqa: E402
+
+DEFAULT_MODEL_PATH = os.path.join(REPO_ROOT, 'data', 'record_data.json')
+DEFAULT_OUTPUT_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'results', 'latest.json')
+DEFAULT_THRESHOLDS_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'thresholds.json')
+DEFAULT_SIZES = (1, 1000, 100000)
+RANDOM_SEED = 20240601
+
+# Per-pair stages run on at most this many pairs of a size; their time is
+# reported per pair so runs of different sizes stay comparable
+STAGE_PAIR_LIMITS = {
+    'import_app': 1,
+    'coerce_records': None,
+    'linker_construction': 1,
+    'compare_two_records': 5,
+    'compare_pair': 2000,
+    'compare_many': None,
+    'score_pairs_sql': None,
+    'score_pairs_parallel': None,
+    'prediction_row_to_waterfall_format': None,
+    'predictions_to_waterfall_format': None,
+    'create_waterfall_chart': 50,
+    'record_table_html': 2000,
+}
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+def load_linker_json(model_path=DEFAULT_MODEL_PATH):
+    """Load and normalize the bundled model settings"""
+    with open(model_path, 'r') as f:
+        return normalize_model_json(json.load(f))
+
+
+def seed_records(linker_json):
+    """
+    HARDCODED_RECORD_VALUES as the record forms would parse them, keyed by the
+    model's columns (list columns fall back to the seed key without _list).
+    """
+    schema = RecordSchema.from_settings(linker_json)
+    seeds = []
+    for side in ('left', 'right'):
+        values = HARDCODED_RECORD_VALUES[side]
+        record = {}
+        for column in linker_json['additional_columns_to_retain']:
+            value = values.get(column, values.get(column[:-len('_list')]) if column.endswith('_list') else None)
+            record[column] = schema.parse_text(column, format_value_for_input(value))
+        seeds.append(record)
+    return seeds
+
+
+def _mutate_text(rng, text):
+    """Apply a random typo: substitution, deletion, insertion or transposition"""
+    if not text:
+        return rng.choice(string.ascii_lowercase)
+    position = rng.randrange(len(text))
+    operation = rng.randrange(4)
+    if operation == 0:
+        return text[:position] + rng.choice(string.ascii_lowercase) + text[position + 1:]
+    if operation == 1 and len(text) > 1:
+        return text[:position] + text[position + 1:]
+    if operation == 2:
+        return text[:position] + rng.choice(string.ascii_lowercase) + text[position:]
+    if position + 1 < len(text):
+        return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+    return text
+
+
+def _mutate_record(rng, record):
+    """Perturb a seed record: typos, dropped values and edited list items"""
+    mutated = {}
+    for column, value in record.items():
+        roll = rng.random()
+        if roll < 0.1:
+            mutated[column] = None
+        elif roll < 0.35:
+            if isinstance(value, list):
+                items = [_mutate_text(rng, str(item)) for item in value]
+                if rng.random() < 0.3:
+                    items.append(''.join(rng.choice(string.digits) for _ in range(10)))
+                mutated[column] = items
+            elif isinstance(value, str):
+                mutated[column] = _mutate_text(rng, value)
+            elif isinstance(value, int):
+                mutated[column] = value + rng.randint(-3, 3)
+            else:
+                mutated[column] = value
+        else:
+            mutated[column] = value
+    return mutated
+
+
+def synthetic_pairs(linker_json, size, seed=RANDOM_SEED):
+    """
+    Deterministic record pairs: the seed pair first, then perturbed copies.
+
+    Returns:
+        Tuple of (left records, right records) as form-parsed dictionaries
+    """
+    rng = random.Random(seed)
+    left_seed, right_seed = seed_records(linker_json)
+    lefts, rights = [left_seed], [right_seed]
+    while len(lefts) < size:
+        base = rng.choice((left_seed, right_seed))
+        lefts.append(_mutate_record(rng, base))
+        rights.append(_mutate_record(rng, base if rng.random() < 0.5 else right_seed))
+    return lefts[:size], rights[:size]
+
+
+def pairs_frame(linker_json, lefts, rights):
+    """Side-suffixed pairs table as uploaded to batch scoring"""
+    data = {}
+    for column in linker_json['additional_columns_to_retain']:
+        data[f'{column}_l'] = [record.get(column) for record in lefts]
+        data[f'{column}_r'] = [record.get(column) for record in rights]
+    return pd.DataFrame(data)
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+def _time(function, repeat):
+    """Median and minimum wall time of function over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), min(timings)
+
+
+def _limit(stage, size):
+    limit = STAGE_PAIR_LIMITS.get(stage)
+    return size if limit is None else min(size, limit)
+
+
+def run_stages(linker_json, size, repeat, stages=None):
+    """
+    Time every stage for one dataset size.
+
+    Returns:
+        List of result dictionaries, one per stage
+    """
+    # Imported lazily: Splink and Altair are only needed by their own stages
+    from splink import DuckDBAPI, Linker
+    from components.visualization import _build_record_table, create_waterfall_chart
+
+    lefts, rights = synthetic_pairs(linker_json, size)
+    engine = ComparisonEngine(linker_json)
+    batch_scorer = ParallelBatchScorer.from_env()
+    prediction_rows = engine.compare_many(lefts, rights)
+    predictions = pd.DataFrame(prediction_rows)
+    fields = linker_json['additional_columns_to_retain']
+
+    def compare_two_records(n):
+        # Splink infers column types from the two records, so NULL list values
+        # from synthetic pairs fail to bind; the seed pair is timed instead
+        linker = engine.linker
+        left, right = engine.schema.coerce(lefts[0]), engine.schema.coerce(rights[0])
+        for _ in range(n):
+            linker.inference.compare_two_records(left, right).as_record_dict()
+
+    def create_waterfall_charts(n):
+        for row in prediction_rows[:n]:
+            waterfall_df = prediction_row_to_waterfall_frame(row)
+            create_waterfall_chart(waterfall_df, row['match_weight'], row['match_probability']).to_dict()
+
+    def import_app(n):
+        # A fresh interpreter, so the modules the app loads at startup are timed cold
+        for _ in range(n):
+            subprocess.run([sys.executable, '-c', 'import app'], cwd=REPO_ROOT, check=True, capture_output=True)
+
+    stage_functions = {
+        'import_app': import_app,
+        'coerce_records': lambda n: engine.schema.columns_from_records(lefts[:n] + rights[:n]),
+        'linker_construction': lambda n: Linker(
+            input_table_or_tables=[pd.DataFrame(columns=fields), pd.DataFrame(columns=fields)],
+            db_api=DuckDBAPI(),
+            settings=dict(linker_json),
+        ),
+        'compare_two_records': compare_two_records,
+        'compare_pair': lambda n: [engine.compare(left, right) for left, right in zip(lefts[:n], rights[:n])],
+        'compare_many': lambda n: engine.compare_many(lefts[:n], rights[:n]),
+        'score_pairs_sql': lambda n: score_pairs_sql(pairs_frame(linker_json, lefts[:n], rights[:n]), linker_json),
+        'score_pairs_parallel': lambda n: batch_scorer.score_pairs(pairs_frame(linker_json, lefts[:n], rights[:n]), linker_json),
+        'prediction_row_to_waterfall_format': lambda n: [prediction_row_to_waterfall_format(row) for row in prediction_rows[:n]],
+        'predictions_to_waterfall_format': lambda n: predictions_to_waterfall_format(predictions.iloc[:n]),
+        'create_waterfall_chart': create_waterfall_charts,
+        'record_table_html': lambda n: [_build_record_table(left, right, fields) for left, right in zip(lefts[:n], rights[:n])],
+    }
+
+    results = []
+    for stage, function in stage_functions.items():
+        if stages and stage not in stages:
+            continue
+        measured_pairs = _limit(stage, size)
+        median_seconds, min_seconds = _time(lambda: function(measured_pairs), repeat)
+        results.append({
+            'stage': stage,
+            'pairs': size,
+            'measured_pairs': measured_pairs,
+            'median_seconds': median_seconds,
+            'min_seconds': min_seconds,
+            'seconds_per_pair': median_seconds / measured_pairs,
+        })
+        print(f"{stage:<38} {size:>7} pairs  {median_seconds:10.4f}s  {median_seconds / measured_pairs * 1e6:12.1f}us/pair", flush=True)
+    return results
+
+
+# =============================================================================
+# RESULTS
+# =============================================================================
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def check_regressions(results, baseline, thresholds):
+    """
+    Compare results to a baseline run.
+
+    A stage regresses when its median time per pair grows by more than its
+    threshold (a fraction, e.g. 0.25 for 25%) over the baseline at the same size.
+
+    Returns:
+        List of regression descriptions, empty if none
+    """
+    baseline_results = {(r['stage'], r['pairs']): r for r in baseline['results']}
+    default_threshold = thresholds.get('default', 0.25)
+    stage_thresholds = thresholds.get('stages', {})
+
+    regressions = []
+    for result in results:
+        previous = baseline_results.get((result['stage'], result['pairs']))
+        if previous is None or previous['seconds_per_pair'] <= 0:
+            continue
+        threshold = stage_thresholds.get(result['stage'], default_threshold)
+        change = result['seconds_per_pair'] / previous['seconds_per_pair'] - 1
+        if change > threshold:
+            regressions.append(
+                f"{result['stage']} @ {result['pairs']} pairs: {change:+.1%} "
+                f"(threshold {threshold:+.0%}, {previous['seconds_per_pair'] * 1e6:.1f} -> "
+                f"{result['seconds_per_pair'] * 1e6:.1f} us/pair)"
+            )
+    return regressions
+
+
+def check_speedups(results, thresholds):
+    """
+    Compare stages to their serial counterpart in the same run.
+
+    For each stage under thresholds['speedups'], the speedup is the serial
+    stage's median time over the stage's, at every size of at least min_pairs
+    where both ran.
+
+    Returns:
+        Tuple of (speedup descriptions, descriptions of those below min_speedup)
+    """
+    medians = {(r['stage'], r['pairs']): r['median_seconds'] for r in results}
+    lines, failures = [], []
+    for stage, rule in thresholds.get('speedups', {}).items():
+        for (result_stage, pairs), seconds in sorted(medians.items()):
+            serial_seconds = medians.get((rule['baseline_stage'], pairs))
+            if result_stage != stage or pairs < rule.get('min_pairs', 0) or not serial_seconds or seconds <= 0:
+                continue
+            speedup = serial_seconds / seconds
+            line = f"{stage} @ {pairs} pairs: {speedup:.2f}x {rule['baseline_stage']} (minimum {rule['min_speedup']:.2f}x)"
+            lines.append(line)
+            if speedup < rule['min_speedup']:
+                failures.append(line)
+    return lines, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Numbers of pairs to run')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGE_PAIR_LIMITS), help='Only run these stages')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage, the median is reported')
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='Linker JSON of the model to benchmark')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help='Where to write the JSON results')
+    parser.add_argument('--baseline', help='Earlier results to check for regressions')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS_PATH, help='Regression thresholds JSON')
+    args = parser.parse_args(argv)
+
+    linker_json = load_linker_json(args.model)
+    results = []
+    for size in args.sizes:
+        results.extend(run_stages(linker_json, size, args.repeat, args.stages))
+
+    report = {
+        'metadata': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model': os.path.relpath(args.model, REPO_ROOT),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, 'r') as f:
+            thresholds = json.load(f)
+
+    speedups, slow_stages = check_speedups(results, thresholds)
+    for line in speedups:
+        print(f"SPEEDUP {line}")
+    for line in slow_stages:
+        print(f"TOO SLOW {line}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = check_regressions(results, baseline, thresholds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 1 if slow_stages else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import pyarrow.compute as pc
+import streamlit as st
+
+from components.blocking_coverage import display_batch_blocking
+from utils.batch_scoring import read_pairs_file, score_pairs, table_to_csv
+from utils.blocking_analysis import analyze_batch_blocking
+from utils.data_paths import DATA_DIR_ENV, data_directory, resolve_data_path
+from utils.splink_utils import predictions_to_waterfall_format
+
+# Highest scoring pairs of the last chunk shown while a file is streamed
+STREAM_PREVIEW_ROWS = 20
+
+
+def create_batch_scoring_section(linker_json, key_prefix="batch", term_frequencies=None, streaming_scorer=None, batch_scorer=None, schema=None):
+    """Render the batch pair-scoring upload, results table and download button"""
+
+    st.markdown("### Batch Pair Scoring")
+    st.markdown(
+        "Upload a CSV or Parquet file with one record pair per row, using `<column>_l` and "
+        "`<column>_r` columns for each model column. Any other columns (labels, ids) are kept."
+    )
+
+    uploaded_file = st.file_uploader(
+        "Record pairs file",
+        type=["csv", "parquet"],
+        key=f"{key_prefix}_pairs_file",
+        label_visibility="collapsed"
+    )
+    score_button = st.button("Score Pairs", key=f"{key_prefix}_score_button", disabled=uploaded_file is None)
+
+    results_key = f"{key_prefix}_results"
+    waterfalls_key = f"{key_prefix}_waterfalls"
+    blocking_key = f"{key_prefix}_blocking"
+    if score_button and uploaded_file is not None:
+        with st.spinner("Scoring record pairs..."):
+            try:
+                pairs = read_pairs_file(uploaded_file, file_name=uploaded_file.name)
+                if batch_scorer is not None:
+                    st.session_state[results_key] = batch_scorer.score_pairs(
+                        pairs, linker_json, term_frequencies=term_frequencies, schema=schema
+                    )
+                else:
+                    st.session_state[results_key] = score_pairs(pairs, linker_json, term_frequencies=term_frequencies, schema=schema)
+                st.session_state[waterfalls_key] = predictions_to_waterfall_format(st.session_state[results_key])
+                st.session_state[blocking_key] = analyze_batch_blocking(pairs, linker_json, schema=schema)
+                st.success(f"Scored {st.session_state[results_key].num_rows} record pairs")
+            except Exception as e:
+                st.error(f"Failed to score record pairs: {str(e)}")
+
+    results = st.session_state.get(results_key)
+    if results is not None:
+        st.dataframe(results, use_container_width=True, hide_index=True)
+        st.download_button(
+            "Download Results as CSV",
+            data=table_to_csv(results),
+            file_name="batch_scores.csv",
+            mime="text/csv",
+            key=f"{key_prefix}_download_button"
+        )
+
+    waterfalls = st.session_state.get(waterfalls_key)
+    if waterfalls is not None:
+        st.download_button(
+            "Download Waterfalls as CSV",
+            data=waterfalls.to_csv(index=False),
+            file_name="batch_waterfalls.csv",
+            mime="text/csv",
+            key=f"{key_prefix}_waterfalls_download_button"
+        )
+
+    blocking = st.session_state.get(blocking_key)
+    if blocking is not None:
+        display_batch_blocking(*blocking)
+
+    if streaming_scorer is not None:
+        create_streaming_scoring_section(
+            linker_json, streaming_scorer, key_prefix=key_prefix, term_frequencies=term_frequencies, schema=schema
+        )
+
+
+def create_streaming_scoring_section(linker_json, streaming_scorer, key_prefix="batch", term_frequencies=None, schema=None):
+    """Render scoring of a pairs file in the data directory too large to upload, with live progress and partial results"""
+
+    with st.expander("Stream a large pairs file", expanded=False):
+        data_dir = data_directory()
+        if data_dir is None:
+            st.caption(f"Set `{DATA_DIR_ENV}` to stream pair files from a server directory.")
+            return
+        st.caption(
+            f"Scores a Parquet or CSV file in `{data_dir}` {streaming_scorer.chunk_rows:,} pairs at a time "
+            f"into a Parquet file there, within a {streaming_scorer.memory_limit} memory limit."
+        )
+        with st.form(f"{key_prefix}_stream_form", border=False):
+            source_path = st.text_input("Pairs file (Parquet or CSV, relative to the data directory)", key=f"{key_prefix}_stream_source")
+            output_path = st.text_input("Output Parquet file (relative to the data directory)", key=f"{key_prefix}_stream_output")
+            stream_button = st.form_submit_button("Stream Score")
+
+        summary_key = f"{key_prefix}_stream_summary"
+        if stream_button and source_path and output_path:
+            progress_bar = st.progress(0.0, text="Starting...")
+            preview = st.empty()
+
+            def show_chunk(pair_count, total_pairs, scores):
+                text = f"Scored {pair_count:,} of {total_pairs:,} pairs" if total_pairs else f"Scored {pair_count:,} pairs"
+                progress_bar.progress(min(pair_count / total_pairs, 1.0) if total_pairs else 0.0, text=text)
+                top_indices = pc.select_k_unstable(
+                    scores, k=min(STREAM_PREVIEW_ROWS, scores.num_rows), sort_keys=[('match_weight', 'descending')]
+                )
+                preview.dataframe(scores.take(top_indices), use_container_width=True, hide_index=True)
+
+            try:
+                st.session_state[summary_key] = streaming_scorer.score_file(
+                    resolve_data_path(source_path, data_dir),
+                    resolve_data_path(output_path, data_dir),
+                    linker_json,
+                    term_frequencies=term_frequencies,
+                    on_chunk=show_chunk,
+                    schema=schema
+                )
+                progress_bar.progress(1.0, text="Done")
+            except Exception as e:
+                st.error(f"Failed to score record pairs: {str(e)}")
+
+        summary = st.session_state.get(summary_key)
+        if summary is not None:
+            st.success(
+                f"Scored {summary['pair_count']:,} record pairs into `{summary['output_path']}` "
+                f"in {summary['seconds']:.1f}s"
+            )
@@ -0,0 +1,53 @@
+import pandas as pd
+import streamlit as st
+
+
+def _result_label(result):
+    """Symbol for a condition result; NULL fails a blocking rule like false"""
+    if result is None:
+        return "∅ NULL"
+    return "✅" if result else "❌"
+
+
+def display_blocking_coverage(analysis):
+    """Show which blocking rules generate the pair and which of their conditions fail"""
+
+    st.markdown("### Blocking Coverage")
+    if not analysis:
+        st.info("The model has no blocking rules")
+        return
+
+    firing = [number for number, rule in enumerate(analysis, start=1) if rule['fires']]
+    if firing:
+        st.success(f"Generated by blocking rule{'s' if len(firing) > 1 else ''} {', '.join(map(str, firing))}")
+    else:
+        st.warning("No blocking rule fires for this pair, so it would never be scored in production")
+
+    for number, rule in enumerate(analysis, start=1):
+        with st.expander(f"{'✅' if rule['fires'] else '❌'} Rule {number}: {rule['rule']}", expanded=False):
+            st.dataframe(
+                pd.DataFrame([
+                    {'condition': condition['condition'], 'result': _result_label(condition['result'])}
+                    for condition in rule['conditions']
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+
+
+def display_batch_blocking(report, uncovered_pairs):
+    """Show per-rule hit counts and pair-generation cost for a batch of pairs"""
+
+    st.markdown("#### Blocking Coverage")
+    if uncovered_pairs:
+        st.warning(f"{uncovered_pairs:,} pairs are generated by no blocking rule")
+    st.dataframe(
+        report.style.format({'share_hit': '{:.1%}', 'estimated_comparisons': '{:,}'}),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(
+        "pairs_first_hit counts pairs a rule generates that no earlier rule does. "
+        "estimated_comparisons is the number of pairs a rule generates across the uploaded records "
+        "before its fuzzy conditions are applied."
+    )
@@ -0,0 +1,105 @@
+import pandas as pd
+import streamlit as st
+
+from components.visualization import display_results
+from utils.candidate_search import DEFAULT_TOP_K
+from utils.data_paths import DATA_DIR_ENV, data_directory, resolve_data_path
+
+
+def _candidates_table(search_result, id_column):
+    """One row per candidate: id, score and the blocking rules that paired it"""
+    return pd.DataFrame([
+        {
+            id_column: result['candidate'].get(id_column),
+            'match_weight': result['match_weight'],
+            'match_probability': result['match_probability'],
+            'blocking_rules': ', '.join(str(number + 1) for number in result['blocking_rules']),
+        }
+        for result in search_result['results']
+    ])
+
+
+def create_candidate_search_section(candidate_index, comparison_engine, record, additional_columns_to_retain, key_prefix="candidates"):
+    """Render reference indexing, the top-K candidate search for Record A and the chosen candidate's waterfall"""
+
+    st.markdown("### Candidate Search")
+    st.markdown(
+        "Find the best matches for **Record A** in a reference table from the data directory. The "
+        "table is loaded into a DuckDB database and indexed for the model's blocking rules."
+    )
+
+    linker_json = comparison_engine.settings
+    metadata = candidate_index.metadata()
+
+    data_dir = data_directory()
+    if data_dir is None:
+        st.caption(f"Set `{DATA_DIR_ENV}` to index reference tables from a server directory.")
+    else:
+        with st.form(f"{key_prefix}_index_form", border=False):
+            source_path = st.text_input(
+                "Reference table (Parquet or CSV, relative to the data directory)",
+                value=metadata['source_path'] if metadata else "",
+                key=f"{key_prefix}_source_path"
+            )
+            build_button = st.form_submit_button("Build Index")
+        if build_button and source_path:
+            with st.spinner("Loading and indexing reference records..."):
+                try:
+                    metadata = candidate_index.build(resolve_data_path(source_path, data_dir), linker_json)
+                    st.success(f"Indexed {metadata['row_count']:,} reference records")
+                except Exception as e:
+                    st.error(f"Failed to build index: {str(e)}")
+
+    if metadata is None:
+        st.caption("No reference table indexed yet")
+        return
+    st.caption(f"{metadata['row_count']:,} records indexed from `{metadata['source_path']}`")
+
+    with st.expander("Blocking rules", expanded=False):
+        comparisons = metadata.get('estimated_comparisons') or [None] * len(metadata['blocking_rules'])
+        for number, (rule, count) in enumerate(zip(metadata['blocking_rules'], comparisons), start=1):
+            st.code(f"{number}. {rule}", language="sql")
+            if count is not None:
+                st.caption(f"{count:,} pairs within the reference table")
+
+    results_key = f"{key_prefix}_results"
+    with st.form(f"{key_prefix}_search_form", border=False):
+        top_k = st.number_input("Top K", min_value=1, max_value=100, value=DEFAULT_TOP_K, key=f"{key_prefix}_top_k")
+        search_button = st.form_submit_button("Find Candidates for Record A", type="primary")
+    if search_button:
+        if not record:
+            st.warning("Enter Record A first")
+        else:
+            with st.spinner("Searching candidates..."):
+                try:
+                    st.session_state[results_key] = (record, candidate_index.search(comparison_engine, record, top_k=int(top_k)))
+                except Exception as e:
+                    st.error(f"Failed to search candidates: {str(e)}")
+
+    if results_key not in st.session_state:
+        return
+    probe, search_result = st.session_state[results_key]
+
+    rule_counts = ", ".join(
+        f"rule {number}: {count}" for number, count in enumerate(search_result['rule_counts'], start=1)
+    )
+    st.markdown(f"**{search_result['candidate_count']} blocked candidates** ({rule_counts})")
+    if search_result['truncated']:
+        st.warning("Record A blocks to more candidates than are scored; only the first ones were ranked")
+    if not search_result['results']:
+        st.info("No blocking rule pairs Record A with any reference record")
+        return
+
+    id_column = linker_json.get('unique_id_column_name', 'unique_id')
+    st.dataframe(_candidates_table(search_result, id_column), use_container_width=True, hide_index=True)
+
+    rank = st.selectbox(
+        "Candidate",
+        range(len(search_result['results'])),
+        format_func=lambda index: f"#{index + 1}: {search_result['results'][index]['candidate'].get(id_column)}",
+        key=f"{key_prefix}_selected"
+    )
+    selected = search_result['results'][rank]
+    display_results(
+        selected['prediction'], probe, selected['candidate'], additional_columns_to_retain, key_prefix=f"{key_prefix}_"
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from components.visualization import display_results
+
+
+def _history_table(entries):
+    """One row per past comparison: when, which model and the score"""
+    return pd.DataFrame([
+        {
+            'scored_at': datetime.fromtimestamp(entry['created_at']).strftime('%Y-%m-%d %H:%M:%S'),
+            'model': f"{entry['model_uri']} (v{entry['model_version']})",
+            'match_weight': entry['match_weight'],
+            'match_probability': entry['match_probability'],
+        }
+        for entry in entries
+    ])
+
+
+def create_comparison_history_section(comparison_history, model_uri, additional_columns_to_retain, key_prefix="history"):
+    """Render search over past comparisons and the waterfall of a chosen one"""
+
+    st.markdown("### Comparison History")
+    stats = comparison_history.stats()
+    st.caption(f"{stats['entries']:,} comparisons stored ({stats['size_bytes'] / (1024 * 1024):.1f} MB)")
+
+    with st.form(f"{key_prefix}_search_form", border=False):
+        text = st.text_input("Record text contains", key=f"{key_prefix}_text")
+        current_model_only = st.checkbox("Current model only", value=True, key=f"{key_prefix}_current_model_only")
+        search_button = st.form_submit_button("Search History")
+    if search_button:
+        st.session_state[f"{key_prefix}_results"] = comparison_history.search(
+            text=text.strip() or None,
+            model_uri=model_uri if current_model_only else None
+        )
+
+    entries = st.session_state.get(f"{key_prefix}_results")
+    if entries is None:
+        return
+    if not entries:
+        st.info("No past comparisons match")
+        return
+
+    st.dataframe(
+        _history_table(entries).style.format({'match_weight': '{:.4f}', 'match_probability': '{:.2%}'}),
+        use_container_width=True,
+        hide_index=True
+    )
+    index = st.selectbox(
+        "Comparison",
+        range(len(entries)),
+        format_func=lambda i: f"#{i + 1}: {entries[i]['model_uri']}, match weight {entries[i]['match_weight']:.4f}",
+        key=f"{key_prefix}_selected"
+    )
+    entry = entries[index]
+    display_results(
+        entry['prediction'], entry['left_record'], entry['right_record'], additional_columns_to_retain, key_prefix=f"{key_prefix}_"
+    )
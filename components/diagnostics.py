@@ -0,0 +1,34 @@
+import pandas as pd
+import streamlit as st
+
+
+def create_diagnostics_panel(snapshot, last_timings=None):
+    """Render stage latency percentiles, counters and the last comparison's timings"""
+
+    with st.expander("🔧 Diagnostics", expanded=False):
+        if last_timings:
+            st.markdown("#### Last Comparison")
+            st.dataframe(
+                pd.DataFrame(
+                    [{'stage': stage, 'ms': seconds * 1000} for stage, seconds in last_timings.items()]
+                ).style.format({'ms': '{:.2f}'}),
+                use_container_width=True,
+                hide_index=True
+            )
+
+        st.markdown("#### Stage Latency (this server process)")
+        if snapshot['stages']:
+            stages = pd.DataFrame(snapshot['stages'])
+            st.dataframe(
+                stages.style.format({
+                    column: '{:.2f}' for column in stages.columns if column.endswith('_ms')
+                }, na_rep=''),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.caption("No timings recorded yet")
+
+        if snapshot['counters']:
+            st.markdown("#### Counters")
+            st.dataframe(pd.DataFrame(snapshot['counters']), use_container_width=True, hide_index=True)
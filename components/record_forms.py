@@ -2,6 +2,42 @@ import streamlit as st
 import json
 import ast
 
+# Form field styling shared by every record form on the page
+FORM_CSS = """
+<style>
+    .form-field {
+        margin-bottom: 1rem;
+    }
+
+    .form-field label {
+        font-weight: 600;
+        color: #495057;
+        margin-bottom: 0.5rem;
+        display: block;
+    }
+
+    .form-field .stTextInput > div > div > input {
+        border-radius: 8px;
+        border: 2px solid #e9ecef;
+        padding: 0.75rem;
+        font-size: 14px;
+        transition: border-color 0.2s ease;
+    }
+
+    .form-field .stTextInput > div > div > input:focus {
+        border-color: #007bff;
+        box-shadow: 0 0 0 0.2rem rgba(0, 123, 255, 0.25);
+    }
+
+    .field-help {
+        font-size: 0.85rem;
+        color: #6c757d;
+        margin-top: 0.25rem;
+        font-style: italic;
+    }
+</style>
+"""
+
 def detect_field_type(value):
     """Detect the type of a field value"""
     if value is None or value == '':
@@ -67,8 +103,19 @@ def parse_input_value(input_str):
     # Default to string
     return input_str
 
-def create_record_forms(initial_data, key_prefix, additional_columns_to_retain):
-    """Create clean, minimal input forms for record data"""
+# Form field type of each RecordSchema column type; other types are text
+SCHEMA_FIELD_TYPES = {
+    'VARCHAR[]': 'list',
+    'DOUBLE': 'number',
+}
+
+def create_record_forms(initial_data, key_prefix, additional_columns_to_retain, inject_css=True, schema=None):
+    """
+    Create clean, minimal input forms for record data.
+
+    With the model's RecordSchema, each field is parsed as its column type and
+    empty fields are NULL; without it, types are guessed from the input.
+    """
 
     # additional_columns_to_retain is required
     if not additional_columns_to_retain:
@@ -77,50 +124,21 @@ def create_record_forms(initial_data, key_prefix, additional_columns_to_retain):
     fields = additional_columns_to_retain
     record = {}
     
-    # Add custom CSS for form styling
-    st.markdown("""
-    <style>
-        .form-field {
-            margin-bottom: 1rem;
-        }
-        
-        .form-field label {
-            font-weight: 600;
-            color: #495057;
-            margin-bottom: 0.5rem;
-            display: block;
-        }
-        
-        .form-field .stTextInput > div > div > input {
-            border-radius: 8px;
-            border: 2px solid #e9ecef;
-            padding: 0.75rem;
-            font-size: 14px;
-            transition: border-color 0.2s ease;
-        }
-        
-        .form-field .stTextInput > div > div > input:focus {
-            border-color: #007bff;
-            box-shadow: 0 0 0 0.2rem rgba(0, 123, 255, 0.25);
-        }
-        
-        .field-help {
-            font-size: 0.85rem;
-            color: #6c757d;
-            margin-top: 0.25rem;
-            font-style: italic;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    # Add custom CSS for form styling, once per page
+    if inject_css:
+        st.markdown(FORM_CSS, unsafe_allow_html=True)
     
     # Clean, minimal form layout
     for field in fields:
         with st.container():
             st.markdown('<div class="form-field">', unsafe_allow_html=True)
             
-            # Get initial value and detect its type
+            # Get initial value and its type, declared by the schema or detected
             initial_value = initial_data.get(field, '')
-            field_type = detect_field_type(initial_value)
+            if schema is not None:
+                field_type = SCHEMA_FIELD_TYPES.get(schema.column_type(field), 'string')
+            else:
+                field_type = detect_field_type(initial_value)
             
             # Display field label
             field_display = field.replace("_", " ").title()
@@ -149,8 +167,11 @@ def create_record_forms(initial_data, key_prefix, additional_columns_to_retain):
                 label_visibility="collapsed"
             )
             
-            # Parse the input dynamically
-            record[field] = parse_input_value(user_input)
+            # Parse the input as its column type, or dynamically
+            if schema is not None:
+                record[field] = schema.parse_text(field, user_input)
+            else:
+                record[field] = parse_input_value(user_input)
             
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -0,0 +1,55 @@
+import altair as alt
+import pyarrow as pa
+import streamlit as st
+
+from utils.sensitivity import VARIANT_LABELS
+
+
+def create_sensitivity_chart(sweep):
+    """Horizontal bars of the match weight change of each variant, grouped by field"""
+    fields = sweep.groupby('field', sort=False)['delta'].apply(lambda delta: delta.abs().max())
+    field_order = fields.sort_values(ascending=False).index.tolist()
+    return alt.Chart(pa.Table.from_pandas(sweep, preserve_index=False)).mark_bar().encode(
+        y=alt.Y('field:N', sort=field_order, title=None, axis=alt.Axis(labelFontSize=14, labelLimit=240)),
+        yOffset=alt.YOffset('variant:N', sort=list(VARIANT_LABELS.values())),
+        x=alt.X('delta:Q', title='Change in match weight'),
+        color=alt.Color(
+            'variant:N',
+            sort=list(VARIANT_LABELS.values()),
+            title='Variant',
+            legend=alt.Legend(orient='bottom')
+        ),
+        tooltip=[
+            alt.Tooltip('field:N', title='Field'),
+            alt.Tooltip('variant:N', title='Variant'),
+            alt.Tooltip('match_weight:Q', title='Match weight', format='.4f'),
+            alt.Tooltip('delta:Q', title='Change', format='+.4f'),
+        ]
+    ).properties(
+        height=alt.Step(10),
+        title='Match weight change per field variant'
+    )
+
+
+def display_sensitivity(base_weight, sweep):
+    """Show which fields move the match weight most, as a chart and a table"""
+
+    if sweep.empty:
+        st.info("No field of this pair can be varied")
+        return
+
+    matched = sweep[sweep['variant'] == VARIANT_LABELS['match']]
+    if not matched.empty and matched['delta'].max() > 0:
+        best = matched.loc[matched['delta'].idxmax()]
+        st.markdown(
+            f"**{best['field']}** holds this match back most: if Record B agreed with Record A, "
+            f"the match weight would rise by **{best['delta']:.2f}** (from {base_weight:.2f} to {best['match_weight']:.2f})."
+        )
+
+    st.altair_chart(create_sensitivity_chart(sweep), use_container_width=True)
+    with st.expander("Variant scores", expanded=False):
+        st.dataframe(
+            sweep.style.format({'match_weight': '{:.4f}', 'delta': '{:+.4f}'}),
+            use_container_width=True,
+            hide_index=True
+        )
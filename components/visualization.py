@@ -1,25 +1,58 @@
 import streamlit as st
 import altair as alt
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import hashlib
 import json
-from utils.splink_utils import prediction_row_to_waterfall_format, bayes_factor_to_prob, generate_diff_html
+import threading
+from collections import OrderedDict
+from utils.diff_engine import diff_columns_html
+from utils.splink_utils import prediction_row_to_waterfall_frame, bayes_factor_to_prob
 
-def display_results(result, left_record, right_record, additional_columns_to_retain):
-    """Display comparison results with waterfall chart and table"""
+# Number of rendered results (chart spec, HTML) kept across reruns and sessions
+RENDER_CACHE_MAX_ENTRIES = 128
+
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def render_cache_key(*parts):
+    """Stable hash of the values a rendered element is built from"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cached_render(kind, parts, build):
+    """Return the rendered element for parts, building and caching it on a miss"""
+    key = (kind, render_cache_key(*parts))
+    with _render_cache_lock:
+        if key in _render_cache:
+            _render_cache.move_to_end(key)
+            return _render_cache[key]
+
+    rendered = build()
+    with _render_cache_lock:
+        _render_cache[key] = rendered
+        while len(_render_cache) > RENDER_CACHE_MAX_ENTRIES:
+            _render_cache.popitem(last=False)
+    return rendered
+
+
+def _build_results(result, left_record, right_record):
+    """Build the header HTML, waterfall chart spec and JSON export of a result"""
     
     # Create waterfall chart first to get the recalculated final score (without TF adjustments)
-    waterfall_data = prediction_row_to_waterfall_format(result)
-    waterfall_df = pd.DataFrame(waterfall_data)
+    waterfall_df = prediction_row_to_waterfall_frame(result)
     
     # Extract the recalculated final score from waterfall data (without TF adjustments)
     final_score_row = waterfall_df[waterfall_df['column_name'] == 'Final score'].iloc[0]
     match_weight = final_score_row['log2_bayes_factor']
     bayes_factor = final_score_row['bayes_factor']
     match_probability = bayes_factor_to_prob(bayes_factor)
-    error_probability = 1 - match_probability
     
-    # Display results header with metrics
-    st.markdown("""
+    # Results header with metrics
+    header_html = """
     <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                 padding: 2rem; border-radius: 15px; margin-bottom: 2rem; text-align: center;">
         <h2 style="color: white; margin: 0 0 1rem 0; font-size: 2rem;">Match Analysis Results</h2>
@@ -34,34 +67,76 @@ def display_results(result, left_record, right_record, additional_columns_to_ret
             </div>
         </div>
     </div>
-    """.format(match_weight, match_probability), unsafe_allow_html=True)
+    """.format(match_weight, match_probability)
+    
+    # Waterfall chart, converted to its Vega-Lite spec once
+    chart_spec = create_waterfall_chart(waterfall_df, match_weight, match_probability).to_dict()
+    
+    # JSON export
+    records_json = json.dumps({
+        'record_left': left_record,
+        'record_right': right_record,
+        'match_analysis': {
+            'match_weight': match_weight,
+            'match_probability': match_probability,
+            'bayes_factor': bayes_factor
+        }
+    }, indent=2)
     
-    # Create the waterfall chart using Altair with full width
-    chart = create_waterfall_chart(waterfall_df, match_weight, match_probability)
-    st.altair_chart(chart, use_container_width=True)
+    return {'header_html': header_html, 'chart_spec': chart_spec, 'records_json': records_json}
+
+
+def prerender_results(result, left_record, right_record, additional_columns_to_retain):
+    """Build and cache the elements display_results shows for a result, without showing them"""
+    _cached_render('results', (result, left_record, right_record), lambda: _build_results(result, left_record, right_record))
+    _cached_render(
+        'record_table',
+        (left_record, right_record, additional_columns_to_retain),
+        lambda: _build_record_table(left_record, right_record, additional_columns_to_retain)
+    )
+
+
+def display_results(result, left_record, right_record, additional_columns_to_retain, key_prefix=""):
+    """Display comparison results with waterfall chart and table"""
+    
+    rendered = _cached_render(
+        'results',
+        (result, left_record, right_record),
+        lambda: _build_results(result, left_record, right_record)
+    )
+    
+    # Display results header with metrics
+    st.markdown(rendered['header_html'], unsafe_allow_html=True)
+    
+    # Waterfall chart with full width
+    st.vega_lite_chart(rendered['chart_spec'], use_container_width=True)
     
     
     # JSON export
     with st.expander("📄 Export Records as JSON", expanded=False):
-        records_json = json.dumps({
-            'record_left': left_record,
-            'record_right': right_record,
-            'match_analysis': {
-                'match_weight': match_weight,
-                'match_probability': match_probability,
-                'bayes_factor': bayes_factor
-            }
-        }, indent=2)
-        st.code(records_json, language='json')
+        st.code(rendered['records_json'], language='json')
         
-        if st.button("Copy to Clipboard", key="copy_json"):
+        if st.button("Copy to Clipboard", key=f"{key_prefix}copy_json"):
             st.code("Use Ctrl+C to copy the JSON above")
 
+    display_record_table(left_record, right_record, additional_columns_to_retain)
+
+def display_record_table(left_record, right_record, fields):
+    """Display the records side by side with a diff row"""
+
     # Comparison table (Left, Right, Diff)
     st.markdown("### Detailed Record Comparison")
     st.markdown("Compare individual fields between the two records:")
-    
-    fields = additional_columns_to_retain
+
+    table_html = _cached_render(
+        'record_table',
+        (left_record, right_record, fields),
+        lambda: _build_record_table(left_record, right_record, fields)
+    )
+    st.markdown(table_html, unsafe_allow_html=True)
+
+def _build_record_table(left_record, right_record, fields):
+    """Build the HTML table of both records with a diff row"""
 
     # Build HTML table with minimal styling and diff highlighting
     header_cells = ''.join([f'<th style="padding:8px 12px; border-bottom:1px solid #e6e6e6; text-align:left; font-size:16px; font-weight:600;">{col}</th>' for col in fields])
@@ -97,9 +172,13 @@ def display_results(result, left_record, right_record, additional_columns_to_ret
         f'<td style="padding:8px 12px; border-bottom:1px solid #f2f2f2; font-size:16px;">{safe_str(get_field_value(right_record, col))}</td>'
         for col in fields
     ])
+    diffs = diff_columns_html(
+        [get_field_value(left_record, col) for col in fields],
+        [get_field_value(right_record, col) for col in fields]
+    )
     diff_cells = ''.join([
-        f'<td style="padding:8px 12px; border-bottom:1px solid #f2f2f2; font-size:16px;">{generate_diff_html(safe_str(get_field_value(left_record, col)), safe_str(get_field_value(right_record, col)))}</td>'
-        for col in fields
+        f'<td style="padding:8px 12px; border-bottom:1px solid #f2f2f2; font-size:16px;">{diff}</td>'
+        for diff in diffs
     ])
 
     table_html = f'''
@@ -129,31 +208,57 @@ def display_results(result, left_record, right_record, additional_columns_to_ret
     </div>
     '''
 
-    st.markdown(table_html, unsafe_allow_html=True)
+    return table_html
+
+def waterfall_y_domain(df):
+    """Match weight range spanned by the cumulative bars of a waterfall"""
+    cumulative = df.sort_values('bar_sort_order')['log2_bayes_factor'].cumsum()
+    previous_cumulative = cumulative.shift(1).fillna(0)
+    return (
+        float(min(0, previous_cumulative.min(), cumulative.min())),
+        float(max(0, previous_cumulative.max(), cumulative.max()))
+    )
 
-def create_waterfall_chart(df, match_weight, match_probability):
-    """Create waterfall chart using Altair with improved styling"""
+
+def create_waterfall_chart(df, match_weight, match_probability, column_names=None, y_domain=None):
+    """
+    Create waterfall chart using Altair with improved styling
+
+    column_names and y_domain pin the bars and axis range, so charts of
+    several models line up when rendered next to each other. The bar data is
+    computed column-wise and handed to Altair as an Arrow table.
+    """
     
     # Remove zero-height contributions (keep Prior and Final score always)
     tolerance = 1e-9
-    df = df[(df['column_name'].isin(['Prior', 'Final score'])) | (df['log2_bayes_factor'].abs() > tolerance)].copy()
+    if column_names is not None:
+        keep = df['column_name'].isin(['Prior', 'Final score']) | df['column_name'].isin(column_names)
+    else:
+        keep = (df['column_name'].isin(['Prior', 'Final score'])) | (df['log2_bayes_factor'].abs() > tolerance)
+    df = df[keep].copy()
     df = df.sort_values('bar_sort_order').reset_index(drop=True)
     df['bar_sort_order'] = range(len(df))
 
     # Calculate cumulative sums for waterfall effect
-    df['cumulative'] = df['log2_bayes_factor'].cumsum()
-    df['previous_cumulative'] = df['cumulative'].shift(1).fillna(0)
-    
+    cumulative = df['log2_bayes_factor'].to_numpy(dtype=float).cumsum()
+    previous_cumulative = np.concatenate(([0.0], cumulative[:-1]))
+    df['cumulative'] = cumulative
+    df['previous_cumulative'] = previous_cumulative
+
     # Add probability scale (right y-axis equivalent)
-    df['probability'] = df['cumulative'].apply(lambda x: 2**x / (2**x + 1))
-    df['prev_probability'] = df['previous_cumulative'].apply(lambda x: 2**x / (2**x + 1))
+    df['probability'] = np.float_power(2.0, cumulative) / (np.float_power(2.0, cumulative) + 1)
+    df['prev_probability'] = np.float_power(2.0, previous_cumulative) / (np.float_power(2.0, previous_cumulative) + 1)
+    df['bar_middle'] = (previous_cumulative + cumulative) / 2
 
     # Compute a shared y-domain to keep dual axes aligned
-    y_min = float(min(0, df['previous_cumulative'].min(), df['cumulative'].min()))
-    y_max = float(max(0, df['previous_cumulative'].max(), df['cumulative'].max()))
+    if y_domain is not None:
+        y_min, y_max = y_domain
+    else:
+        y_min = float(min(0, df['previous_cumulative'].min(), df['cumulative'].min()))
+        y_max = float(max(0, df['previous_cumulative'].max(), df['cumulative'].max()))
 
     # Create base chart
-    base = alt.Chart(df)
+    base = alt.Chart(pa.Table.from_pandas(df, preserve_index=False))
 
     # Main bars (waterfall)
     bars = base.mark_bar(
@@ -201,7 +306,6 @@ def create_waterfall_chart(df, match_weight, match_probability):
     )
 
     # Add text labels on bars (white, centered)
-    df['bar_middle'] = (df['previous_cumulative'] + df['cumulative']) / 2
     text_labels = base.mark_text(
         align='center',
         baseline='middle',
@@ -219,7 +323,7 @@ def create_waterfall_chart(df, match_weight, match_probability):
     )
 
     # Zero line baseline
-    zero_line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(
+    zero_line = alt.Chart(pa.table({'y': [0]})).mark_rule(
         color='black',
         strokeWidth=2
     ).encode(
@@ -282,4 +386,83 @@ def create_waterfall_chart(df, match_weight, match_probability):
         )
     )
     
-    return chart
\ No newline at end of file
+    return chart
+
+def display_model_comparison(results, left_record, right_record, additional_columns_to_retain):
+    """
+    Display the same record pair scored by several models, aligned per comparison.
+
+    Args:
+        results: Dict of model label to prediction row, the first is the baseline
+        left_record: First record that was compared
+        right_record: Second record that was compared
+        additional_columns_to_retain: Fields shown in the record table
+    """
+    tolerance = 1e-9
+    labels = list(results.keys())
+    waterfall_dfs = {label: prediction_row_to_waterfall_frame(row) for label, row in results.items()}
+
+    # Match weight and probability per model, with the change against the baseline
+    summary_rows = []
+    baseline_weight = None
+    for label in labels:
+        final_score_row = waterfall_dfs[label][waterfall_dfs[label]['column_name'] == 'Final score'].iloc[0]
+        match_weight = final_score_row['log2_bayes_factor']
+        if baseline_weight is None:
+            baseline_weight = match_weight
+        summary_rows.append({
+            'Model': label,
+            'Match Weight': match_weight,
+            'Match Probability': bayes_factor_to_prob(final_score_row['bayes_factor']),
+            'Δ Match Weight': match_weight - baseline_weight
+        })
+    st.markdown("### Model Comparison")
+    st.dataframe(
+        pd.DataFrame(summary_rows).style.format({
+            'Match Weight': '{:.4f}', 'Match Probability': '{:.2%}', 'Δ Match Weight': '{:+.4f}'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # Contribution of each comparison per model, side by side
+    contributions = pd.DataFrame({
+        label: df.set_index('column_name')['log2_bayes_factor'] for label, df in waterfall_dfs.items()
+    })
+    contributions = contributions.reindex(waterfall_dfs[labels[0]]['column_name'].tolist() + [
+        name for name in contributions.index if name not in set(waterfall_dfs[labels[0]]['column_name'])
+    ])
+    changed = (contributions.sub(contributions[labels[0]], axis=0).abs() > tolerance).any(axis=1)
+    nonzero = (contributions.abs() > tolerance).any(axis=1)
+    contributions = contributions[nonzero | contributions.index.isin(['Prior', 'Final score'])]
+
+    st.markdown("#### Match Weight per Comparison")
+    st.dataframe(
+        contributions.style.format('{:.4f}', na_rep='').apply(
+            lambda row: ['background-color: #fff3cd' if changed[row.name] else '' for _ in row], axis=1
+        ),
+        use_container_width=True
+    )
+
+    # Waterfalls with the same bars and axis range so differences line up
+    column_names = [name for name in contributions.index if name not in ('Prior', 'Final score')]
+    y_domains = [waterfall_y_domain(df) for df in waterfall_dfs.values()]
+    y_domain = (min(low for low, _ in y_domains), max(high for _, high in y_domains))
+    for column, label in zip(st.columns(len(labels)), labels):
+        with column:
+            st.markdown(f"**{label}**")
+            summary = summary_rows[labels.index(label)]
+            chart_spec = _cached_render(
+                'model_waterfall',
+                (results[label], column_names, y_domain),
+                lambda: create_waterfall_chart(
+                    waterfall_dfs[label],
+                    summary['Match Weight'],
+                    summary['Match Probability'],
+                    column_names=column_names,
+                    y_domain=y_domain
+                ).to_dict()
+            )
+            st.vega_lite_chart(chart_spec, use_container_width=True)
+
+    display_record_table(left_record, right_record, additional_columns_to_retain)
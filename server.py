@@ -0,0 +1,227 @@
+# Standard library imports
+import asyncio
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Union
+
+# Third-party imports
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+# Local imports
+# pandas, pyarrow and DuckDB are imported with the first model (see
+# get_engine_cache), so the health check answers before they load
+from utils.model_cache import ModelCache
+from utils.telemetry import configure_logging, telemetry
+from utils.warmup import ModelWarmup, warmup_model_uris
+
+# Constants
+SCORING_WORKERS = int(os.environ.get('MATCHAI_SCORING_WORKERS', os.cpu_count() or 4))
+MAX_CACHED_ENGINES = int(os.environ.get('MATCHAI_MAX_CACHED_ENGINES', 4))
+MAX_BATCH_PAIRS = 10000
+
+# =============================================================================
+# REQUEST / RESPONSE MODELS
+# =============================================================================
+
+class PairRequest(BaseModel):
+    """A single record pair to score"""
+    model_uri: str
+    left_record: Dict[str, Any]
+    right_record: Dict[str, Any]
+    include_waterfall: bool = True
+
+
+class RecordPair(BaseModel):
+    """One record pair of a batch"""
+    left_record: Dict[str, Any]
+    right_record: Dict[str, Any]
+
+
+class BatchRequest(BaseModel):
+    """Record pairs scored against the same model"""
+    model_uri: str
+    pairs: List[RecordPair] = Field(..., max_length=MAX_BATCH_PAIRS)
+    include_waterfall: bool = True
+
+
+class PairResult(BaseModel):
+    """Score and explanation of a record pair"""
+    match_weight: Optional[Union[float, str]]
+    match_probability: Optional[float]
+    prediction: Dict[str, Any]
+    waterfall: Optional[List[Dict[str, Any]]] = None
+
+
+class BatchResult(BaseModel):
+    """Scores of a batch, in request order"""
+    model_uri: str
+    results: List[PairResult]
+
+# =============================================================================
+# SERVICE STATE
+# =============================================================================
+
+# CPU-bound scoring runs here so the event loop keeps accepting requests
+scoring_executor = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix='scoring')
+engine_cache = None
+model_warmup = None
+_engine_cache_lock = threading.Lock()
+
+
+def get_engine_cache():
+    """Shared model cache, created with the first model together with the scoring stack it imports."""
+    global engine_cache
+    with _engine_cache_lock:
+        if engine_cache is None:
+            from utils.comparison_engine import ComparisonEngineCache
+            from utils.pipeline import normalize_model_json
+            from utils.term_frequencies import TermFrequencyStore
+            engine_cache = ComparisonEngineCache(
+                ModelCache.from_env(),
+                normalize_model_json,
+                max_entries=MAX_CACHED_ENGINES,
+                term_frequencies=TermFrequencyStore.from_env()
+            )
+        return engine_cache
+
+
+def _load_warm_engine(model_uri: str):
+    """Load a model into the shared cache for the warmup thread."""
+    return get_engine_cache().get(model_uri)
+
+
+def _warm_rendering(engine, prediction_row: Dict[str, Any]) -> None:
+    """Build the waterfall of the warmup pair, as every response does."""
+    from utils.splink_utils import prediction_row_to_waterfall_format
+    prediction_row_to_waterfall_format(prediction_row)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start warming the configured models, and stop the workers and close the DuckDB pool on exit."""
+    global model_warmup
+    configure_logging()
+    # Warmed in the background, so the health check answers while they load
+    model_warmup = ModelWarmup(_load_warm_engine, on_scored=_warm_rendering)
+    model_warmup.start(warmup_model_uris())
+    yield
+    scoring_executor.shutdown(wait=False)
+    if engine_cache is not None:
+        from utils.connection_pool import connection_pool
+        connection_pool.close()
+
+
+app = FastAPI(title="MatchAI Record Comparison API", lifespan=lifespan)
+
+
+def _json_safe(value: Any) -> Any:
+    """
+    Make prediction values JSON-compliant.
+
+    Infinite match weights and Bayes factors become the strings "Infinity" or
+    "-Infinity", and NaN becomes null.
+    """
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        if math.isnan(value):
+            return None
+        return 'Infinity' if value > 0 else '-Infinity'
+    return value
+
+
+def _format_result(result: Dict[str, Any], include_waterfall: bool) -> Dict[str, Any]:
+    """Convert a pipeline result to the JSON shape of PairResult."""
+    if not include_waterfall:
+        result = {key: value for key, value in result.items() if key != 'waterfall'}
+    return _json_safe(result)
+
+
+async def _run_scoring(function, *args):
+    """Run a scoring function on the worker pool, mapping errors to HTTP responses."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(scoring_executor, function, *args)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running comparison: {e}")
+
+# =============================================================================
+# ENDPOINTS
+# =============================================================================
+
+@app.post("/v1/compare", response_model=PairResult)
+async def compare(request: PairRequest) -> Dict[str, Any]:
+    """Score one record pair and explain its match weight."""
+    def run():
+        from utils.pipeline import score_pair
+        with telemetry.timed('request_compare', request.model_uri):
+            engine = get_engine_cache().get(request.model_uri)
+            return score_pair(engine, request.left_record, request.right_record)
+
+    return _format_result(await _run_scoring(run), request.include_waterfall)
+
+
+@app.post("/v1/compare/batch", response_model=BatchResult)
+async def compare_batch(request: BatchRequest) -> Dict[str, Any]:
+    """Score a batch of record pairs against one model in a single vectorized pass."""
+    def run():
+        from utils.pipeline import score_pairs
+        with telemetry.timed('request_compare_batch', request.model_uri):
+            engine = get_engine_cache().get(request.model_uri)
+            return score_pairs(
+                engine,
+                [pair.left_record for pair in request.pairs],
+                [pair.right_record for pair in request.pairs]
+            )
+
+    results = await _run_scoring(run) if request.pairs else []
+    return {
+        'model_uri': request.model_uri,
+        'results': [_format_result(result, request.include_waterfall) for result in results]
+    }
+
+
+@app.get("/v1/health")
+async def health() -> Dict[str, Any]:
+    """Liveness check, answered without loading any model or the scoring stack, with the warmup state of each preloaded model."""
+    return {
+        'status': 'ok',
+        'models_loaded': len(engine_cache.model_uris()) if engine_cache is not None else 0,
+        'warmup': model_warmup.states() if model_warmup is not None else {}
+    }
+
+
+@app.get("/v1/ready")
+async def ready() -> Dict[str, Any]:
+    """Readiness check running a trivial query on every pooled DuckDB database; unhealthy databases are replaced and reported with a 503."""
+    def run():
+        from utils.connection_pool import connection_pool
+        return connection_pool.check_health()
+
+    loop = asyncio.get_running_loop()
+    health = await loop.run_in_executor(scoring_executor, run)
+    if not all(health.values()):
+        raise HTTPException(status_code=503, detail={'duckdb_databases': health})
+    return {'status': 'ready', 'duckdb_databases': health}
+
+
+@app.get("/v1/models")
+async def loaded_models() -> Dict[str, List[str]]:
+    """List the models currently held warm in memory."""
+    return {'model_uris': engine_cache.model_uris() if engine_cache is not None else []}
+
+
+@app.get("/v1/metrics")
+async def metrics() -> Dict[str, Any]:
+    """Per-stage latency percentiles and counters since the process started."""
+    return telemetry.snapshot()
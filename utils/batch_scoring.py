@@ -0,0 +1,201 @@
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from utils.record_schema import RecordSchema
+from utils.scoring_sql import _prefixes, build_scoring_sql, comparison_input_columns, model_record_columns, score_columns, tf_adjustment_columns
+
+PAIRS_TABLE_NAME = '__splink__batch_pairs'
+LEFT_TABLE_NAME = '__splink__batch_left'
+RIGHT_TABLE_NAME = '__splink__batch_right'
+PAIR_INDEX_COLUMN = 'pair_index'
+
+
+def read_pairs_file(file, file_name=None):
+    """
+    Read an uploaded CSV or Parquet file of record pairs into an Arrow table.
+
+    Args:
+        file: Path or binary file-like object
+        file_name: Name used to detect the format when file is file-like
+
+    Returns:
+        pyarrow.Table with one row per record pair
+    """
+    name = (file_name or str(file)).lower()
+    if name.endswith('.parquet'):
+        return pq.read_table(file)
+    if name.endswith('.csv'):
+        return pa_csv.read_csv(file)
+    raise ValueError(f"Unsupported pairs file format: {name}")
+
+
+def pairs_source_sql(path):
+    """DuckDB table function scanning a Parquet or CSV pairs file"""
+    quoted_path = path.replace("'", "''")
+    if path.lower().endswith('.parquet'):
+        return f"read_parquet('{quoted_path}')"
+    return f"read_csv_auto('{quoted_path}')"
+
+
+def table_to_csv(table):
+    """CSV bytes of an Arrow table, written without converting it to pandas"""
+    # The CSV writer only takes flat columns; nested passthrough columns are
+    # written as their Python text form
+    for index, field in enumerate(table.schema):
+        if pa.types.is_nested(field.type):
+            text = [None if value is None else str(value) for value in table.column(index).to_pylist()]
+            table = table.set_column(index, field.name, pa.array(text, type=pa.string()))
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def load_pairs(conn, pairs, linker_json, schema=None):
+    """
+    Load record pairs into two aligned DuckDB tables.
+
+    pairs must hold a <column>_l and <column>_r column for each model column.
+    Columns are cast to the model's RecordSchema types, so pairs from CSV or
+    Parquet are scored with the same types as records from the forms or API.
+    The left and right tables share a pair_index column so row N of one lines
+    up with row N of the other. Columns that are not model columns (labels,
+    pair ids) stay on the raw pairs table and are passed through to the output.
+
+    Args:
+        conn: DuckDB connection
+        pairs: pandas DataFrame, Arrow table or Parquet/CSV path
+        linker_json: Splink linker configuration
+        schema: Optional RecordSchema of the model, derived from linker_json otherwise
+
+    Returns:
+        List of passthrough column names
+
+    Raises:
+        ValueError: If a column used by the model's comparisons is missing
+    """
+    if isinstance(pairs, str):
+        source_sql = pairs_source_sql(pairs)
+    else:
+        conn.register('__splink__batch_pairs_input', pairs)
+        source_sql = '__splink__batch_pairs_input'
+
+    conn.execute(
+        f"CREATE OR REPLACE TEMP TABLE {PAIRS_TABLE_NAME} AS "
+        f"SELECT row_number() OVER () - 1 AS {PAIR_INDEX_COLUMN}, * FROM {source_sql}"
+    )
+    if not isinstance(pairs, str):
+        conn.unregister('__splink__batch_pairs_input')
+
+    column_types = {
+        name: column_type
+        for name, column_type, *_ in conn.execute(f"DESCRIBE {PAIRS_TABLE_NAME}").fetchall()
+    }
+
+    missing = [
+        column for column in comparison_input_columns(linker_json)
+        if f'{column}_l' not in column_types or f'{column}_r' not in column_types
+    ]
+    if missing:
+        raise ValueError(f"Pairs are missing _l/_r columns for: {', '.join(missing)}")
+
+    if schema is None:
+        schema = RecordSchema.from_settings(linker_json)
+    model_columns = model_record_columns(linker_json)
+    for table_name, side in ((LEFT_TABLE_NAME, 'l'), (RIGHT_TABLE_NAME, 'r')):
+        selects = [PAIR_INDEX_COLUMN]
+        for column in model_columns:
+            source_column = f'{column}_{side}'
+            if source_column not in column_types:
+                selects.append(f'NULL::{schema.column_type(column)} AS "{column}"')
+            else:
+                cast_sql = schema.cast_sql(column, f'"{source_column}"', column_types[source_column])
+                selects.append(f'{cast_sql} AS "{column}"')
+        conn.execute(
+            f"CREATE OR REPLACE TEMP TABLE {table_name} AS "
+            f"SELECT {', '.join(selects)} FROM {PAIRS_TABLE_NAME} ORDER BY {PAIR_INDEX_COLUMN}"
+        )
+
+    model_side_columns = {f'{column}_{side}' for column in model_columns for side in ('l', 'r')}
+    return [
+        column for column in column_types
+        if column != PAIR_INDEX_COLUMN and column not in model_side_columns
+    ]
+
+
+def aligned_pairs_relation(linker_json, tf_views=None):
+    """
+    SQL subquery joining the aligned left/right tables into _l/_r columns.
+
+    With tf_views (column name to term frequency view, see
+    TermFrequencyStore.register), each side is also joined to the term
+    frequency table of every tf adjustment column, adding tf_<column>_l/_r.
+    """
+    selects = [f'l.{PAIR_INDEX_COLUMN}']
+    for column in model_record_columns(linker_json):
+        selects.append(f'l."{column}" AS "{column}_l"')
+        selects.append(f'r."{column}" AS "{column}_r"')
+    joins = []
+    if tf_views is not None:
+        _, _, tf_prefix = _prefixes(linker_json)
+        for number, column in enumerate(tf_adjustment_columns(linker_json)):
+            tf_column = f'{tf_prefix}{column}'
+            for side in ('l', 'r'):
+                if column not in tf_views:
+                    selects.append(f'CAST(NULL AS DOUBLE) AS "{tf_column}_{side}"')
+                    continue
+                alias = f'tf_{number}_{side}'
+                joins.append(f'LEFT JOIN {tf_views[column]} AS {alias} ON {alias}."{column}" = {side}."{column}"')
+                selects.append(f'{alias}."{tf_column}" AS "{tf_column}_{side}"')
+    return (
+        f"(SELECT {', '.join(selects)} FROM {LEFT_TABLE_NAME} AS l "
+        f"JOIN {RIGHT_TABLE_NAME} AS r USING ({PAIR_INDEX_COLUMN}) {' '.join(joins)})"
+    )
+
+
+def score_loaded_pairs_sql(linker_json, passthrough_columns=(), tf_views=None):
+    """SQL scoring every loaded pair in one set-based statement"""
+    scoring_sql = build_scoring_sql(
+        linker_json, aligned_pairs_relation(linker_json, tf_views), tf_columns_provided=tf_views is not None
+    )
+    output_columns = [f'p."{column}"' for column in passthrough_columns]
+    output_columns += ['s.match_weight', 's.match_probability']
+    output_columns += [f's."{column}"' for column in score_columns(linker_json)]
+    return f"""
+    WITH __splink__batch_scores AS ({scoring_sql})
+    SELECT p.{PAIR_INDEX_COLUMN}, {', '.join(output_columns)}
+    FROM __splink__batch_scores AS s
+    JOIN {PAIRS_TABLE_NAME} AS p USING ({PAIR_INDEX_COLUMN})
+    ORDER BY p.{PAIR_INDEX_COLUMN}
+    """
+
+
+def score_pairs(pairs, linker_json, conn=None, term_frequencies=None, schema=None):
+    """
+    Score a whole table of record pairs against a model in one query.
+
+    Arrow and pandas inputs are scanned in place by DuckDB and the scores are
+    fetched as Arrow, so the batch is never copied through Python objects.
+
+    Args:
+        pairs: pandas DataFrame, Arrow table or Parquet/CSV path with _l/_r columns
+        linker_json: Splink linker configuration
+        conn: Optional DuckDB connection, a private in-memory one is used otherwise
+        term_frequencies: Optional TermFrequencyStore joined for tf adjustments
+        schema: Optional RecordSchema of the model, derived from linker_json otherwise
+
+    Returns:
+        pyarrow.Table with passthrough columns, match_weight,
+        match_probability and per-comparison gamma/bf columns
+    """
+    owns_connection = conn is None
+    if owns_connection:
+        conn = duckdb.connect()
+    try:
+        passthrough_columns = load_pairs(conn, pairs, linker_json, schema)
+        tf_views = term_frequencies.register(conn, linker_json) if term_frequencies is not None else None
+        return conn.execute(score_loaded_pairs_sql(linker_json, passthrough_columns, tf_views)).fetch_arrow_table()
+    finally:
+        if owns_connection:
+            conn.close()
@@ -0,0 +1,194 @@
+import duckdb
+import pandas as pd
+
+from utils.batch_scoring import LEFT_TABLE_NAME, PAIR_INDEX_COLUMN, RIGHT_TABLE_NAME, load_pairs
+from utils.blocking_rules import _key_sql, blocking_rule_keys, model_blocking_rules, split_conjuncts
+from utils.connection_pool import connection_pool
+from utils.record_schema import RecordSchema
+
+
+def _record_relation(record, schema):
+    """
+    One-row relation of a record, typed by the model's RecordSchema.
+
+    Returns:
+        Tuple of (relation SQL with ? parameters, parameter values)
+    """
+    items = [(column, value) for column, value in schema.coerce(record).items() if column in schema.column_types]
+    selects = [f'CAST(? AS {schema.column_type(column)}) AS "{column}"' for column, _ in items]
+    return f"(SELECT {', '.join(selects)})", [value for _, value in items]
+
+
+def _truth_sql(condition):
+    """Condition as a NULL-safe boolean, the way a join treats it"""
+    return f"COALESCE(({condition}), false)"
+
+
+def analyze_pair_blocking(linker_json, left_record, right_record, conn=None, schema=None):
+    """
+    Evaluate every blocking rule, and each of its AND-ed conditions, on a pair.
+
+    All rules are evaluated in a single query.
+
+    Args:
+        linker_json: Splink linker configuration
+        left_record: Record playing l in the rules
+        right_record: Record playing r in the rules
+        conn: Optional DuckDB connection, a cursor of the shared pooled
+            database otherwise
+        schema: Optional RecordSchema of the model, derived from linker_json otherwise
+
+    Returns:
+        List with one dict per rule: 'rule', 'fires' and 'conditions', a
+        list of {'condition', 'result'} where result is True, False or None
+        (NULL, which fails the rule like False)
+    """
+    rules = model_blocking_rules(linker_json)
+    if not rules:
+        return []
+    conditions = [split_conjuncts(rule) for rule in rules]
+    if schema is None:
+        schema = RecordSchema.from_settings(linker_json)
+
+    selects = []
+    for number, rule in enumerate(rules):
+        selects.append(f"{_truth_sql(rule)} AS rule_{number}")
+        selects.extend(
+            f"({condition}) AS rule_{number}_condition_{index}"
+            for index, condition in enumerate(conditions[number])
+        )
+    left_relation, left_parameters = _record_relation(left_record, schema)
+    right_relation, right_parameters = _record_relation(right_record, schema)
+    query = f"SELECT {', '.join(selects)} FROM {left_relation} AS l, {right_relation} AS r"
+    parameters = left_parameters + right_parameters
+
+    if conn is None:
+        with connection_pool.acquire() as pooled:
+            values = iter(pooled.cursor.execute(query, parameters).fetchone())
+    else:
+        values = iter(conn.execute(query, parameters).fetchone())
+
+    analysis = []
+    for number, rule in enumerate(rules):
+        fires = bool(next(values))
+        analysis.append({
+            'rule': rule,
+            'fires': fires,
+            'conditions': [
+                {'condition': condition, 'result': next(values)}
+                for condition in conditions[number]
+            ],
+        })
+    return analysis
+
+
+def estimate_rule_comparisons(conn, linker_json, left_relation, right_relation=None):
+    """
+    Number of pairs each blocking rule generates between two tables, before
+    its non-equality conditions are applied.
+
+    This is the pair-generation cost Splink reports for a rule: the size of
+    the join on the rule's equality keys. A rule without equality keys costs
+    the full cross product.
+
+    Args:
+        conn: DuckDB connection holding the tables
+        linker_json: Splink linker configuration
+        left_relation: Table or subquery of l records
+        right_relation: Table or subquery of r records; None to dedupe
+            left_relation against itself
+
+    Returns:
+        List of pair counts, one per rule
+    """
+    counts = []
+    for number, rule in enumerate(model_blocking_rules(linker_json)):
+        keys = blocking_rule_keys(rule)
+        if right_relation is None:
+            if keys:
+                key_sql = _key_sql(number, [column for column, _ in keys], 't')
+                query = (
+                    f"SELECT sum(n * (n - 1) / 2) FROM (SELECT count(*) AS n FROM {left_relation} AS t "
+                    f"WHERE {key_sql} IS NOT NULL GROUP BY {key_sql})"
+                )
+            else:
+                query = f"SELECT count(*) * (count(*) - 1) / 2 FROM {left_relation}"
+        elif keys:
+            left_key = _key_sql(number, [column for column, _ in keys], 't')
+            right_key = _key_sql(number, [column for _, column in keys], 't')
+            query = (
+                f"SELECT sum(l.n * r.n) FROM "
+                f"(SELECT {left_key} AS key, count(*) AS n FROM {left_relation} AS t GROUP BY key) AS l JOIN "
+                f"(SELECT {right_key} AS key, count(*) AS n FROM {right_relation} AS t GROUP BY key) AS r USING (key)"
+            )
+        else:
+            query = f"SELECT (SELECT count(*) FROM {left_relation}) * (SELECT count(*) FROM {right_relation})"
+        counts.append(int(conn.execute(query).fetchone()[0] or 0))
+    return counts
+
+
+def analyze_batch_blocking(pairs, linker_json, conn=None, schema=None):
+    """
+    Blocking coverage of a table of record pairs.
+
+    For each rule: how many of the pairs it would generate, how many it is
+    the first rule to generate (Splink generates each pair once), and the
+    estimated number of comparisons it would generate linking the left
+    records against the right ones (or deduplicating them, for dedupe_only
+    models).
+
+    Args:
+        pairs: pandas DataFrame, Arrow table or Parquet/CSV path with _l/_r columns
+        linker_json: Splink linker configuration
+        conn: Optional DuckDB connection, a private in-memory one is used otherwise
+        schema: Optional RecordSchema of the model, derived from linker_json otherwise
+
+    Returns:
+        Tuple of (pandas DataFrame with one row per rule, number of pairs no rule generates)
+    """
+    rules = model_blocking_rules(linker_json)
+    owns_connection = conn is None
+    if owns_connection:
+        conn = duckdb.connect()
+    try:
+        load_pairs(conn, pairs, linker_json, schema)
+        aggregates = ['count(*)']
+        for number, rule in enumerate(rules):
+            earlier = [_truth_sql(previous) for previous in rules[:number]]
+            first_filter = ' AND '.join([_truth_sql(rule)] + [f'NOT {sql}' for sql in earlier])
+            aggregates.append(f"count(*) FILTER (WHERE {_truth_sql(rule)})")
+            aggregates.append(f"count(*) FILTER (WHERE {first_filter})")
+        if rules:
+            aggregates.append(f"count(*) FILTER (WHERE NOT ({' OR '.join(_truth_sql(rule) for rule in rules)}))")
+        else:
+            aggregates.append('count(*)')
+        row = conn.execute(
+            f"SELECT {', '.join(aggregates)} FROM {LEFT_TABLE_NAME} AS l "
+            f"JOIN {RIGHT_TABLE_NAME} AS r USING ({PAIR_INDEX_COLUMN})"
+        ).fetchone()
+
+        if linker_json.get('link_type') == 'dedupe_only':
+            records = (
+                f"(SELECT * EXCLUDE ({PAIR_INDEX_COLUMN}) FROM {LEFT_TABLE_NAME} "
+                f"UNION ALL SELECT * EXCLUDE ({PAIR_INDEX_COLUMN}) FROM {RIGHT_TABLE_NAME})"
+            )
+            comparisons = estimate_rule_comparisons(conn, linker_json, records)
+        else:
+            comparisons = estimate_rule_comparisons(conn, linker_json, LEFT_TABLE_NAME, RIGHT_TABLE_NAME)
+    finally:
+        if owns_connection:
+            conn.close()
+
+    pair_count = row[0]
+    report = pd.DataFrame([
+        {
+            'rule': number + 1,
+            'blocking_rule': rule,
+            'pairs_hit': row[1 + 2 * number],
+            'share_hit': row[1 + 2 * number] / pair_count if pair_count else 0.0,
+            'pairs_first_hit': row[2 + 2 * number],
+            'estimated_comparisons': comparisons[number],
+        }
+        for number, rule in enumerate(rules)
+    ], columns=['rule', 'blocking_rule', 'pairs_hit', 'share_hit', 'pairs_first_hit', 'estimated_comparisons'])
+    return report, row[-1]
@@ -0,0 +1,72 @@
+import re
+
+# Separates the rule number and key values inside a blocking key
+KEY_SEPARATOR = 'chr(31)'
+
+AND_PATTERN = re.compile(r'\s+AND\s+', re.IGNORECASE)
+# "l.col = r.col" conjuncts, the index-driven part of a blocking rule
+EQUALITY_PATTERN = re.compile(r'^\(?\s*([lr])\."?(\w+)"?\s*=\s*([lr])\."?(\w+)"?\s*\)?$')
+
+
+def split_conjuncts(sql):
+    """Split a SQL condition on its top-level ANDs, leaving nested ones alone"""
+    conjuncts = []
+    depth = 0
+    quote = None
+    start = 0
+    index = 0
+    while index < len(sql):
+        char = sql[index]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0:
+            match = AND_PATTERN.match(sql, index)
+            if match:
+                conjuncts.append(sql[start:index].strip())
+                start = index = match.end()
+                continue
+        index += 1
+    conjuncts.append(sql[start:].strip())
+    return [conjunct for conjunct in conjuncts if conjunct]
+
+
+def blocking_rule_keys(blocking_rule):
+    """
+    Equality keys of a blocking rule.
+
+    Args:
+        blocking_rule: Splink blocking rule SQL using l. and r. columns
+
+    Returns:
+        List of (probe_column, reference_column) pairs, where the probe
+        record plays l; empty if the rule has no equality conjunct
+    """
+    keys = []
+    for conjunct in split_conjuncts(blocking_rule):
+        match = EQUALITY_PATTERN.match(conjunct)
+        if match is None or match.group(1) == match.group(3):
+            continue
+        side, column, _, other_column = match.groups()
+        keys.append((column, other_column) if side == 'l' else (other_column, column))
+    return keys
+
+
+def model_blocking_rules(linker_json):
+    """Blocking rule SQL strings of a model, in settings order"""
+    rules = []
+    for rule in linker_json.get('blocking_rules_to_generate_predictions') or []:
+        rules.append(rule['blocking_rule'] if isinstance(rule, dict) else rule)
+    return rules
+
+
+def _key_sql(rule_number, columns, alias):
+    """Blocking key expression; NULL when any key column is NULL, like the rule's equality"""
+    parts = [f"'{rule_number}'"] + [f'CAST({alias}."{column}" AS VARCHAR)' for column in columns]
+    return f' || {KEY_SEPARATOR} || '.join(parts)
@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+
+import duckdb
+
+from utils.blocking_analysis import estimate_rule_comparisons
+from utils.blocking_rules import _key_sql, blocking_rule_keys, model_blocking_rules
+from utils.record_schema import RecordSchema
+from utils.scoring_sql import comparison_input_columns, model_record_columns
+from utils.splink_utils import prediction_row_to_waterfall_format
+from utils.telemetry import telemetry
+
+CANDIDATE_INDEX_PATH_ENV = 'MATCHAI_CANDIDATE_INDEX_PATH'
+DEFAULT_CANDIDATE_INDEX_PATH = os.path.join('~', '.cache', 'matchai', 'candidates.duckdb')
+
+REFERENCE_TABLE = 'reference_records'
+BLOCKING_KEYS_TABLE = 'blocking_keys'
+METADATA_TABLE = 'candidate_index_metadata'
+ROW_ID_COLUMN = '__row_id'
+
+DEFAULT_TOP_K = 10
+# Blocked candidates scored per lookup; a record blocking to more is truncated
+MAX_CANDIDATES = 5000
+
+def _source_sql(source_path):
+    """DuckDB table function reading a Parquet or CSV reference file"""
+    path = source_path.replace("'", "''")
+    lower = source_path.lower()
+    if lower.endswith('.parquet'):
+        return f"read_parquet('{path}')"
+    if lower.endswith('.csv'):
+        return f"read_csv_auto('{path}')"
+    raise ValueError(f"Unsupported reference file format: {source_path}")
+
+
+class CandidateIndex:
+    """
+    Reference records in a persistent DuckDB database, indexed for the
+    blocking rules of a model.
+
+    Each equality part of a blocking rule (e.g. first_lower + email_cleaned)
+    becomes one key per reference row in an ART-indexed key table, so a
+    lookup is a handful of index probes regardless of the table size. The
+    full rule, including its fuzzy parts (damerau_levenshtein,
+    array_has_any), is then checked on the few rows the keys return. Rules
+    without any equality part are checked with a scan.
+
+    Args:
+        database_path: DuckDB database file, created if missing
+    """
+
+    def __init__(self, database_path):
+        self.database_path = os.path.expanduser(database_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.database_path)), exist_ok=True)
+        self.conn = duckdb.connect(self.database_path)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Index at MATCHAI_CANDIDATE_INDEX_PATH, or under ~/.cache/matchai"""
+        return cls(os.environ.get(CANDIDATE_INDEX_PATH_ENV) or DEFAULT_CANDIDATE_INDEX_PATH)
+
+    def metadata(self):
+        """Source, blocking rules and row count of the built index, or None"""
+        with self._lock:
+            tables = {row[0] for row in self.conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+            if METADATA_TABLE not in tables:
+                return None
+            rows = self.conn.execute(f"SELECT name, value FROM {METADATA_TABLE}").fetchall()
+        return {name: json.loads(value) for name, value in rows}
+
+    def build(self, source_path, linker_json):
+        """
+        Load a reference table and index it for the model's blocking rules.
+
+        Replaces any previously built index in the database.
+
+        Args:
+            source_path: Parquet or CSV file with one record per row
+            linker_json: Splink linker configuration
+
+        Returns:
+            Metadata of the new index
+
+        Raises:
+            ValueError: If the file format is unsupported or model columns are missing
+        """
+        rules = model_blocking_rules(linker_json)
+        with self._lock, telemetry.timed('candidate_index_build'):
+            conn = self.conn
+            conn.execute(f"CREATE OR REPLACE TEMP VIEW __reference_source AS SELECT * FROM {_source_sql(source_path)}")
+            column_types = {
+                name: column_type
+                for name, column_type, *_ in conn.execute("DESCRIBE __reference_source").fetchall()
+            }
+            required = set(comparison_input_columns(linker_json))
+            for rule in rules:
+                required.update(reference for _, reference in blocking_rule_keys(rule))
+            missing = sorted(column for column in required if column not in column_types)
+            if missing:
+                raise ValueError(f"Reference table is missing columns: {', '.join(missing)}")
+
+            schema = RecordSchema.from_settings(linker_json)
+            selects = [f"row_number() OVER () - 1 AS {ROW_ID_COLUMN}"]
+            for column in model_record_columns(linker_json):
+                if column not in column_types:
+                    selects.append(f'NULL::{schema.column_type(column)} AS "{column}"')
+                else:
+                    cast_sql = schema.cast_sql(column, f'"{column}"', column_types[column])
+                    selects.append(f'{cast_sql} AS "{column}"')
+
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute(f"DROP TABLE IF EXISTS {BLOCKING_KEYS_TABLE}")
+                conn.execute(
+                    f"CREATE OR REPLACE TABLE {REFERENCE_TABLE} AS "
+                    f"SELECT {', '.join(selects)} FROM __reference_source"
+                )
+                key_selects = [
+                    f"SELECT {_key_sql(number, [reference for _, reference in keys], 'r')} AS key, "
+                    f"{ROW_ID_COLUMN} FROM {REFERENCE_TABLE} AS r"
+                    for number, keys in enumerate(blocking_rule_keys(rule) for rule in rules)
+                    if keys
+                ]
+                conn.execute(
+                    f"CREATE TABLE {BLOCKING_KEYS_TABLE} AS "
+                    f"SELECT * FROM ({' UNION ALL '.join(key_selects) or f'SELECT NULL::VARCHAR AS key, NULL::BIGINT AS {ROW_ID_COLUMN}'}) "
+                    f"WHERE key IS NOT NULL"
+                )
+                conn.execute(f"CREATE INDEX {BLOCKING_KEYS_TABLE}_key ON {BLOCKING_KEYS_TABLE} (key)")
+                conn.execute(f"CREATE INDEX {REFERENCE_TABLE}_row_id ON {REFERENCE_TABLE} ({ROW_ID_COLUMN})")
+
+                metadata = {
+                    'source_path': source_path,
+                    'blocking_rules': rules,
+                    'row_count': conn.execute(f"SELECT count(*) FROM {REFERENCE_TABLE}").fetchone()[0],
+                    # Pairs each rule generates deduplicating the reference table
+                    'estimated_comparisons': estimate_rule_comparisons(conn, linker_json, REFERENCE_TABLE),
+                    'built_at': time.time(),
+                }
+                conn.execute(f"CREATE OR REPLACE TABLE {METADATA_TABLE} (name VARCHAR, value VARCHAR)")
+                conn.executemany(
+                    f"INSERT INTO {METADATA_TABLE} VALUES (?, ?)",
+                    [(name, json.dumps(value)) for name, value in metadata.items()]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.execute("DROP VIEW IF EXISTS __reference_source")
+        return metadata
+
+    def _probe_sql(self, record, column_types):
+        """One-row relation holding the probe record, typed like the reference table"""
+        selects = []
+        parameters = []
+        for column, column_type in column_types.items():
+            if column == ROW_ID_COLUMN:
+                continue
+            selects.append(f'TRY_CAST(? AS {column_type}) AS "{column}"')
+            parameters.append(record.get(column))
+        return f"SELECT {', '.join(selects)}", parameters
+
+    def blocked_candidates(self, record, linker_json, max_candidates=MAX_CANDIDATES):
+        """
+        Reference records that any blocking rule pairs with a record.
+
+        Args:
+            record: Probe record, coerced to the model's RecordSchema
+            linker_json: Splink linker configuration the index was built for
+            max_candidates: Cap on the number of candidates returned
+
+        Returns:
+            Tuple of (candidate records, matching rule numbers per candidate,
+            number of candidates per rule, True if the cap was hit)
+
+        Raises:
+            ValueError: If no index is built or it was built for other blocking rules
+        """
+        metadata = self.metadata()
+        if metadata is None:
+            raise ValueError("No reference table has been indexed yet")
+        rules = model_blocking_rules(linker_json)
+        if metadata['blocking_rules'] != rules:
+            raise ValueError("The candidate index was built for different blocking rules; rebuild it for this model")
+
+        with self._lock:
+            cursor = self.conn.cursor()
+        try:
+            column_types = {
+                name: column_type
+                for name, column_type, *_ in cursor.execute(f"DESCRIBE {REFERENCE_TABLE}").fetchall()
+            }
+            probe_sql, probe_parameters = self._probe_sql(record, column_types)
+
+            rule_keys = [blocking_rule_keys(rule) for rule in rules]
+            indexed = [number for number, keys in enumerate(rule_keys) if keys]
+            key_row = cursor.execute(
+                f"SELECT {', '.join(_key_sql(number, [probe for probe, _ in rule_keys[number]], 'l') for number in indexed) or 'NULL'} "
+                f"FROM ({probe_sql}) AS l",
+                probe_parameters
+            ).fetchone()
+            probe_keys = [key for key in key_row if key is not None] if indexed else []
+
+            with telemetry.timed('candidate_blocking'):
+                row_ids = []
+                if probe_keys:
+                    row_ids = [
+                        row[0] for row in cursor.execute(
+                            f"SELECT DISTINCT {ROW_ID_COLUMN} FROM {BLOCKING_KEYS_TABLE} "
+                            f"WHERE key IN ({', '.join('?' * len(probe_keys))})",
+                            probe_keys
+                        ).fetchall()
+                    ]
+
+                # The full rules check the fuzzy parts on the indexed hits;
+                # rules without keys have to look at every row
+                rule_columns = ', '.join(f'COALESCE(({rule}), false) AS __rule_{number}' for number, rule in enumerate(rules))
+                if len(indexed) < len(rules):
+                    row_filter = 'true'
+                    row_parameters = []
+                elif row_ids:
+                    row_filter = f"r.{ROW_ID_COLUMN} IN ({', '.join('?' * len(row_ids))})"
+                    row_parameters = row_ids
+                else:
+                    return [], [], [0] * len(rules), False
+                query = (
+                    f"SELECT * FROM (SELECT r.*, {rule_columns} FROM {REFERENCE_TABLE} AS r, ({probe_sql}) AS l "
+                    f"WHERE {row_filter}) WHERE {' OR '.join(f'__rule_{number}' for number in range(len(rules)))} "
+                    f"ORDER BY {ROW_ID_COLUMN} LIMIT {int(max_candidates) + 1}"
+                )
+                result = cursor.execute(query, probe_parameters + row_parameters)
+                names = [description[0] for description in result.description]
+                rows = result.fetchall()
+        finally:
+            cursor.close()
+
+        truncated = len(rows) > max_candidates
+        candidates = []
+        matched_rules = []
+        rule_counts = [0] * len(rules)
+        for row in rows[:max_candidates]:
+            values = dict(zip(names, row))
+            matched = [number for number in range(len(rules)) if values.pop(f'__rule_{number}')]
+            for number in matched:
+                rule_counts[number] += 1
+            values.pop(ROW_ID_COLUMN)
+            candidates.append(values)
+            matched_rules.append(matched)
+        return candidates, matched_rules, rule_counts, truncated
+
+    def search(self, comparison_engine, record, top_k=DEFAULT_TOP_K, max_candidates=MAX_CANDIDATES):
+        """
+        Top-K scored reference records for a probe record.
+
+        Args:
+            comparison_engine: Comparison engine of the model
+            record: Record as entered in the forms
+            top_k: Number of best candidates to return
+            max_candidates: Cap on the number of blocked candidates scored
+
+        Returns:
+            Dict with 'results' (top-K dicts like pipeline.score_pair output
+            plus 'candidate' and 'blocking_rules'), 'rule_counts',
+            'candidate_count' and 'truncated'
+        """
+        probe = comparison_engine.schema.coerce(record)
+        candidates, matched_rules, rule_counts, truncated = self.blocked_candidates(
+            probe, comparison_engine.settings, max_candidates
+        )
+        results = []
+        if candidates:
+            with telemetry.timed('candidate_scoring', comparison_engine.model_uri):
+                prediction_rows = comparison_engine.compare_many([probe] * len(candidates), candidates)
+            ranked = sorted(
+                range(len(candidates)),
+                key=lambda index: prediction_rows[index]['match_weight'],
+                reverse=True
+            )[:top_k]
+            for index in ranked:
+                row = prediction_rows[index]
+                results.append({
+                    'match_weight': row['match_weight'],
+                    'match_probability': row['match_probability'],
+                    'prediction': row,
+                    'waterfall': prediction_row_to_waterfall_format(row),
+                    'candidate': candidates[index],
+                    'blocking_rules': matched_rules[index],
+                })
+        return {
+            'results': results,
+            'rule_counts': rule_counts,
+            'candidate_count': len(candidates),
+            'truncated': truncated,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,170 @@
+import copy
+import threading
+from collections import OrderedDict
+
+from utils.duckdb_handler import DuckDBHandler
+from utils.model_cache import parse_model_uri
+from utils.numpy_scorer import NumpyScorer
+from utils.record_schema import RecordSchema
+from utils.telemetry import telemetry
+
+
+class ComparisonEngine:
+    """
+    Model-scoped comparison engine.
+
+    Builds the Splink Linker (and therefore validates the settings) and the
+    model's typed RecordSchema once per model. Pairs are scored in-process by
+    a NumpyScorer; models whose conditions cannot be translated fall back to
+    a DuckDBHandler whose comparison SQL is generated and prepared once. With
+    a TermFrequencyStore, records are given their tf_<column> values before
+    scoring so tf adjustments match production.
+
+    Args:
+        linker_json: Splink linker configuration
+        model_uri: Model the engine belongs to, used to label telemetry
+        term_frequencies: Optional TermFrequencyStore shared across engines
+    """
+
+    def __init__(self, linker_json, model_uri=None, term_frequencies=None):
+        self.settings = copy.deepcopy(linker_json)
+        self.model_uri = model_uri
+        self.term_frequencies = term_frequencies
+
+        # Splink is only needed here, so it is imported with the first model
+        with telemetry.timed('import_splink'):
+            import pandas as pd
+            from splink import DuckDBAPI, Linker
+
+        # The Linker is only used to validate the settings, so an empty frame
+        # with the model's columns is enough as input
+        with telemetry.timed('linker_setup', model_uri):
+            template_df = pd.DataFrame(columns=self.settings.get('additional_columns_to_retain', []))
+            self.linker = Linker(
+                input_table_or_tables=[template_df, template_df.copy()],
+                db_api=DuckDBAPI(),
+                settings=self.settings,
+            )
+
+        with telemetry.timed('scorer_setup', model_uri):
+            self.schema = RecordSchema.from_settings(self.settings)
+            self.handler = DuckDBHandler(self.settings, model_uri=model_uri, schema=self.schema)
+            self.scorer = NumpyScorer(self.settings, fallback=self.handler, model_uri=model_uri, schema=self.schema)
+
+    @property
+    def connection(self):
+        """Pooled DuckDB database holding the prepared comparison SQL of this model"""
+        return self.handler.database
+
+    def _with_term_frequencies(self, records):
+        """Records coerced to the schema with their term frequencies, when a store is configured"""
+        if self.term_frequencies is None:
+            return records
+        with telemetry.timed('tf_lookup', self.model_uri):
+            return self.term_frequencies.add_term_frequencies([self.schema.coerce(record) for record in records], self.settings)
+
+    def compare(self, left_record, right_record):
+        """
+        Score a pair of records.
+
+        Args:
+            left_record: First record to compare
+            right_record: Second record to compare
+
+        Returns:
+            List of prediction rows as dictionaries
+        """
+        if self.term_frequencies is not None:
+            left_record, right_record = self._with_term_frequencies([left_record, right_record])
+        with telemetry.timed('score_pair', self.model_uri):
+            row = self.scorer.compare_records(left_record, right_record)
+        return [row] if row is not None else []
+
+    def compare_many(self, left_records, right_records):
+        """
+        Score aligned lists of record pairs in one vectorized pass.
+
+        Args:
+            left_records: List of first records
+            right_records: List of second records, same length
+
+        Returns:
+            List of prediction rows as dictionaries, one per pair
+        """
+        left_records = self._with_term_frequencies(left_records)
+        right_records = self._with_term_frequencies(right_records)
+        with telemetry.timed('score_pairs', self.model_uri):
+            rows = self.scorer.score_records(left_records, right_records)
+        telemetry.increment('pairs_scored', self.model_uri, len(rows))
+        return rows
+
+
+class ComparisonEngineCache:
+    """
+    Thread-safe LRU of comparison engines keyed by model URI and resolved version.
+
+    Models are fetched through a ModelCache on first use. The URI's version is
+    resolved again on every request, so an alias or stage URI picks up the
+    version the registry now points it at, and the engine of the version it
+    pointed at before is evicted. URIs that do not resolve to a version get a
+    fresh engine on every request, as ModelCache never caches them either.
+    Concurrent requests for a model that is still loading wait for that load
+    instead of repeating it.
+
+    Args:
+        model_cache: ModelCache used to resolve versions and fetch normalized linker JSON
+        normalize: Function turning raw model JSON into normalized linker JSON
+        max_entries: Maximum number of engines kept in memory
+        term_frequencies: Optional TermFrequencyStore given to every engine
+    """
+
+    def __init__(self, model_cache, normalize, max_entries=4, term_frequencies=None):
+        self.model_cache = model_cache
+        self.normalize = normalize
+        self.max_entries = max_entries
+        self.term_frequencies = term_frequencies
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def _load(self, model_uri):
+        linker_json, version = self.model_cache.load_linker_json(model_uri, self.normalize)
+        return ComparisonEngine(linker_json, model_uri=model_uri, term_frequencies=self.term_frequencies), version
+
+    def get(self, model_uri):
+        """Return the engine of the version a model URI currently resolves to, loading it on first use"""
+        name, _, _ = parse_model_uri(model_uri)
+        with telemetry.timed('model_version_resolve', model_uri):
+            version = self.model_cache.registry.resolve_version(model_uri)
+        if name is None or version is None:
+            engine, _ = self._load(model_uri)
+            return engine
+
+        key = (model_uri, version)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+                return engine
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                engine = self._engines.get(key)
+            if engine is None:
+                engine, loaded_version = self._load(model_uri)
+                with self._lock:
+                    # Engines of versions the URI no longer resolves to are never used again
+                    for stale_key in [cached for cached in self._engines if cached[0] == model_uri]:
+                        del self._engines[stale_key]
+                    self._engines[(model_uri, loaded_version or version)] = engine
+                    while len(self._engines) > self.max_entries:
+                        self._engines.popitem(last=False)
+        with self._lock:
+            self._loading.pop(key, None)
+        return engine
+
+    def model_uris(self):
+        """URIs of the models currently held in memory"""
+        with self._lock:
+            return [model_uri for model_uri, _ in self._engines]
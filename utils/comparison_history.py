@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.telemetry import telemetry
+
+# Environment variables configuring the comparison history
+COMPARISON_HISTORY_PATH_ENV = 'MATCHAI_COMPARISON_HISTORY_PATH'
+COMPARISON_HISTORY_MAX_BYTES_ENV = 'MATCHAI_COMPARISON_HISTORY_MAX_BYTES'
+
+DEFAULT_COMPARISON_HISTORY_PATH = os.path.join('~', '.cache', 'matchai', 'history.sqlite')
+DEFAULT_COMPARISON_HISTORY_MAX_BYTES = 64 * 1024 * 1024
+
+DEFAULT_SEARCH_LIMIT = 50
+
+HISTORY_TABLE = 'comparisons'
+
+
+def pair_hash(left_record, right_record):
+    """
+    Canonical hash of a record pair.
+
+    Key order does not matter, so callers should pass records coerced by the
+    model's RecordSchema to make equivalent form input hash the same.
+    """
+    payload = json.dumps([left_record, right_record], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ComparisonHistory:
+    """
+    Scored record pairs kept in a local SQLite file.
+
+    Each entry is keyed by (model URI, model version, pair hash) and holds the
+    full prediction row, so a pair seen before is recalled with a primary key
+    lookup instead of being scored again. SQLite allows the app and the API
+    server to share one file. Entries are evicted least-recently-used first
+    once their stored size exceeds max_bytes.
+
+    Args:
+        database_path: SQLite database file, created if missing
+        max_bytes: Size bound of the stored records and prediction rows
+    """
+
+    def __init__(self, database_path, max_bytes=DEFAULT_COMPARISON_HISTORY_MAX_BYTES):
+        self.database_path = os.path.expanduser(database_path)
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.database_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.database_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+                    model_uri TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    pair_hash TEXT NOT NULL,
+                    left_record TEXT NOT NULL,
+                    right_record TEXT NOT NULL,
+                    prediction TEXT NOT NULL,
+                    match_weight REAL,
+                    match_probability REAL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    PRIMARY KEY (model_uri, model_version, pair_hash)
+                )
+            """)
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {HISTORY_TABLE}_last_used ON {HISTORY_TABLE} (last_used_at)")
+
+    @classmethod
+    def from_env(cls):
+        """History at MATCHAI_COMPARISON_HISTORY_PATH, or under ~/.cache/matchai"""
+        return cls(
+            os.environ.get(COMPARISON_HISTORY_PATH_ENV) or DEFAULT_COMPARISON_HISTORY_PATH,
+            max_bytes=int(os.environ.get(COMPARISON_HISTORY_MAX_BYTES_ENV, DEFAULT_COMPARISON_HISTORY_MAX_BYTES)),
+        )
+
+    def get(self, model_uri, model_version, left_record, right_record):
+        """
+        Prediction row stored for a pair and model, or None.
+
+        Args:
+            model_uri: URI of the model that scored the pair
+            model_version: Resolved version of the model
+            left_record: First record, as passed to put()
+            right_record: Second record, as passed to put()
+
+        Returns:
+            Prediction row dictionary, or None if the pair was not seen
+        """
+        key = (model_uri, str(model_version), pair_hash(left_record, right_record))
+        with telemetry.timed('history_lookup', model_uri):
+            with self._lock, self.conn:
+                row = self.conn.execute(
+                    f"SELECT prediction FROM {HISTORY_TABLE} "
+                    f"WHERE model_uri = ? AND model_version = ? AND pair_hash = ?",
+                    key
+                ).fetchone()
+                if row is not None:
+                    # Mark as recently used
+                    self.conn.execute(
+                        f"UPDATE {HISTORY_TABLE} SET last_used_at = ? "
+                        f"WHERE model_uri = ? AND model_version = ? AND pair_hash = ?",
+                        (time.time(),) + key
+                    )
+        telemetry.increment('history_hit' if row is not None else 'history_miss', model_uri)
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, model_uri, model_version, left_record, right_record, prediction):
+        """Store the prediction row of a pair, replacing an earlier entry"""
+        left_json = json.dumps(left_record, default=str)
+        right_json = json.dumps(right_record, default=str)
+        prediction_json = json.dumps(prediction, default=str)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {HISTORY_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    model_uri, str(model_version), pair_hash(left_record, right_record),
+                    left_json, right_json, prediction_json,
+                    prediction.get('match_weight'), prediction.get('match_probability'),
+                    now, now, len(left_json) + len(right_json) + len(prediction_json),
+                )
+            )
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the history fits in max_bytes"""
+        total_bytes = self.conn.execute(f"SELECT coalesce(sum(size_bytes), 0) FROM {HISTORY_TABLE}").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        # Keep at least the most recently used entry
+        self.conn.execute(f"""
+            DELETE FROM {HISTORY_TABLE} WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT
+                        rowid,
+                        row_number() OVER recent AS position,
+                        sum(size_bytes) OVER recent AS kept_bytes
+                    FROM {HISTORY_TABLE}
+                    WINDOW recent AS (ORDER BY last_used_at DESC, rowid DESC)
+                )
+                WHERE position > 1 AND kept_bytes > ?
+            )
+        """, (self.max_bytes,))
+
+    def search(self, text=None, model_uri=None, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Past comparisons, most recently used first.
+
+        Args:
+            text: Optional text the left or right record must contain
+            model_uri: Optional model URI to restrict the search to
+            limit: Maximum number of entries returned
+
+        Returns:
+            List of dicts with model_uri, model_version, match_weight,
+            match_probability, created_at, left_record, right_record and prediction
+        """
+        conditions = []
+        parameters = []
+        if text:
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append("(left_record LIKE ? ESCAPE '\\' OR right_record LIKE ? ESCAPE '\\')")
+            parameters += [pattern, pattern]
+        if model_uri:
+            conditions.append("model_uri = ?")
+            parameters.append(model_uri)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT model_uri, model_version, match_weight, match_probability, created_at, "
+                f"left_record, right_record, prediction FROM {HISTORY_TABLE} {where} "
+                f"ORDER BY last_used_at DESC LIMIT ?",
+                parameters + [int(limit)]
+            ).fetchall()
+        return [
+            {
+                'model_uri': row[0],
+                'model_version': row[1],
+                'match_weight': row[2],
+                'match_probability': row[3],
+                'created_at': row[4],
+                'left_record': json.loads(row[5]),
+                'right_record': json.loads(row[6]),
+                'prediction': json.loads(row[7]),
+            }
+            for row in rows
+        ]
+
+    def stats(self):
+        """Number of entries and their stored size in bytes"""
+        with self._lock:
+            count, size_bytes = self.conn.execute(
+                f"SELECT count(*), coalesce(sum(size_bytes), 0) FROM {HISTORY_TABLE}"
+            ).fetchone()
+        return {'entries': count, 'size_bytes': size_bytes}
@@ -0,0 +1,324 @@
+import atexit
+import itertools
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import duckdb
+
+from utils.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Environment variables configuring the shared connection pool
+DUCKDB_POOL_SIZE_ENV = 'MATCHAI_DUCKDB_POOL_SIZE'
+DUCKDB_THREADS_ENV = 'MATCHAI_DUCKDB_THREADS'
+DUCKDB_MAX_CURSORS_ENV = 'MATCHAI_DUCKDB_MAX_CURSORS'
+DUCKDB_EXTENSIONS_ENV = 'MATCHAI_DUCKDB_EXTENSIONS'
+
+DEFAULT_POOL_SIZE = 8
+# Pooled databases run single-pair queries, which never benefit from parallel
+# execution and where the thread hand-off dominates the runtime
+DEFAULT_THREADS = 1
+DEFAULT_MAX_CURSORS = 32
+# Seconds a health check waits for a cursor of a busy database
+HEALTH_CHECK_TIMEOUT = 1.0
+
+# Database shared by model-independent queries (e.g. blocking analysis of a pair)
+SHARED_DATABASE_KEY = '__shared__'
+
+_statement_counter = itertools.count()
+
+
+class PooledCursor:
+    """A cursor on a pooled database and the statements prepared on it"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.statements = {}
+
+    def prepare(self, key, build_sql, setup_statements=()):
+        """
+        Name of a statement prepared on this cursor, preparing it on first use.
+
+        Args:
+            key: Identity of the statement, e.g. its input type signature
+            build_sql: Callable returning the SQL of the statement
+            setup_statements: SQL run on the cursor before the statement is
+                prepared, e.g. creating the temp tables it reads
+
+        Returns:
+            Statement name to EXECUTE on the cursor
+        """
+        statement_name = self.statements.get(key)
+        if statement_name is None:
+            statement_name = f'__pooled_statement_{next(_statement_counter)}'
+            for statement in setup_statements:
+                self.cursor.execute(statement)
+            self.cursor.execute(f'PREPARE {statement_name} AS {build_sql()}')
+            self.statements[key] = statement_name
+        return statement_name
+
+
+class PooledDatabase:
+    """
+    One in-memory DuckDB database, shared by every thread through pooled cursors.
+
+    Cursors are connections to the same database, so they share its tables and
+    macros. A thread checks a cursor out for the duration of its queries and
+    no other thread uses it meanwhile. Cursors are kept between checkouts with
+    their prepared statements. Streamlit runs every script run on a new
+    thread, so cursors tied to threads would be prepared over and over. At
+    most max_cursors cursors are opened, and further threads wait for one to
+    be returned. Setup statements (extension loads, macros) run once, when the
+    database is created. A retired database is closed as soon as no cursor is
+    checked out, and refuses new checkouts from then on.
+
+    Args:
+        key: Key of the database in its pool
+        threads: DuckDB threads of the database
+        max_cursors: Number of cursors opened at most
+        setup_statements: SQL run once on the new database
+    """
+
+    def __init__(self, key, threads=DEFAULT_THREADS, max_cursors=DEFAULT_MAX_CURSORS, setup_statements=()):
+        self.key = key
+        self.max_cursors = max_cursors
+        with telemetry.timed('duckdb_connect'):
+            self._conn = duckdb.connect(config={'threads': threads})
+            for statement in setup_statements:
+                self._conn.execute(statement)
+        self._idle = []
+        self._open_cursors = 0
+        self._available = threading.Condition()
+        self._closed = False
+        self.retired = False
+
+    def _checkout(self, timeout=None):
+        with self._available:
+            while True:
+                if self._closed or self.retired:
+                    raise duckdb.ConnectionException(f"Pooled database {self.key} is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._open_cursors < self.max_cursors:
+                    self._open_cursors += 1
+                    break
+                if not self._available.wait(timeout):
+                    raise TimeoutError(f"No cursor of pooled database {self.key} was returned in {timeout}s")
+        try:
+            return PooledCursor(self._conn.cursor())
+        except BaseException:
+            self._release(None)
+            raise
+
+    def _release(self, pooled):
+        with self._available:
+            if pooled is None or self._closed:
+                self._open_cursors -= 1
+                if pooled is not None:
+                    pooled.cursor.close()
+            else:
+                self._idle.append(pooled)
+            self._available.notify()
+            unused = self.retired and self._open_cursors == len(self._idle)
+        if unused:
+            self.close()
+
+    def retire(self):
+        """Close the database once every checked-out cursor is returned"""
+        with self._available:
+            self.retired = True
+            unused = self._open_cursors == len(self._idle)
+        if unused:
+            self.close()
+
+    @contextmanager
+    def acquire(self):
+        """
+        Check a cursor out for the calling thread.
+
+        A cursor whose connection failed is closed instead of being returned
+        to the pool.
+
+        Yields:
+            PooledCursor
+        """
+        with self._checked_out(self._checkout()) as pooled:
+            yield pooled
+
+    @contextmanager
+    def _checked_out(self, pooled):
+        try:
+            yield pooled
+        except duckdb.ConnectionException:
+            try:
+                pooled.cursor.close()
+            except duckdb.Error:
+                pass
+            self._release(None)
+            raise
+        except BaseException:
+            self._release(pooled)
+            raise
+        self._release(pooled)
+
+    def healthy(self, timeout=HEALTH_CHECK_TIMEOUT):
+        """Whether the database still answers a trivial query; a database too busy to hand out a cursor counts as healthy"""
+        try:
+            with self._checked_out(self._checkout(timeout)) as pooled:
+                return pooled.cursor.execute("SELECT 1").fetchone() == (1,)
+        except TimeoutError:
+            return True
+        except duckdb.Error:
+            return False
+
+    def close(self):
+        """Close the idle cursors and the database; cursors checked out fail on their next query"""
+        with self._available:
+            if self._closed:
+                return
+            self._closed = True
+            for pooled in self._idle:
+                pooled.cursor.close()
+            self._open_cursors -= len(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        self._conn.close()
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of in-memory DuckDB databases, one per key.
+
+    Databases are created on first use with the configured extensions loaded
+    and open up to max_cursors cursors each. The least recently used database
+    is retired once more than max_databases are open: cursors already checked
+    out finish their queries, and the database is closed when the last one is
+    returned. Databases found unhealthy by check_health are replaced on their
+    next use.
+
+    Args:
+        max_databases: Number of databases kept open
+        threads: DuckDB threads of each database
+        max_cursors: Cursors opened at most on each database
+        extensions: DuckDB extensions loaded into each database
+    """
+
+    def __init__(self, max_databases=DEFAULT_POOL_SIZE, threads=DEFAULT_THREADS, max_cursors=DEFAULT_MAX_CURSORS, extensions=()):
+        self.max_databases = max_databases
+        self.threads = threads
+        self.max_cursors = max_cursors
+        self.extensions = tuple(extensions)
+        self._databases = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Pool configured by MATCHAI_DUCKDB_POOL_SIZE, _THREADS, _MAX_CURSORS and _EXTENSIONS"""
+        extensions = os.environ.get(DUCKDB_EXTENSIONS_ENV, '')
+        return cls(
+            max_databases=int(os.environ.get(DUCKDB_POOL_SIZE_ENV, DEFAULT_POOL_SIZE)),
+            threads=int(os.environ.get(DUCKDB_THREADS_ENV, DEFAULT_THREADS)),
+            max_cursors=int(os.environ.get(DUCKDB_MAX_CURSORS_ENV, DEFAULT_MAX_CURSORS)),
+            extensions=[extension.strip() for extension in extensions.split(',') if extension.strip()],
+        )
+
+    def database(self, key=SHARED_DATABASE_KEY, setup_statements=()):
+        """
+        Pooled database of a key, created on first use.
+
+        Args:
+            key: Database key, e.g. a model's settings hash
+            setup_statements: SQL run once when the database is created,
+                after the extensions are loaded
+
+        Returns:
+            PooledDatabase
+        """
+        with self._lock:
+            database = self._databases.get(key)
+            if database is not None:
+                self._databases.move_to_end(key)
+                return database
+
+        statements = [f'LOAD {extension}' for extension in self.extensions] + list(setup_statements)
+        database = PooledDatabase(key, threads=self.threads, max_cursors=self.max_cursors, setup_statements=statements)
+        with self._lock:
+            # Another thread may have created the database meanwhile
+            existing = self._databases.get(key)
+            if existing is not None:
+                database.close()
+                return existing
+            self._databases[key] = database
+            evicted = []
+            while len(self._databases) > self.max_databases:
+                evicted.append(self._databases.popitem(last=False)[1])
+        for old_database in evicted:
+            old_database.retire()
+        return database
+
+    @contextmanager
+    def acquire(self, key=SHARED_DATABASE_KEY, setup_statements=()):
+        """
+        Check a cursor out of the pooled database of a key.
+
+        A database retired between being looked up and checked out is
+        replaced by a new one.
+
+        Args:
+            key: Database key, e.g. a model's settings hash
+            setup_statements: SQL run once when the database is created
+
+        Yields:
+            PooledCursor
+        """
+        while True:
+            database = self.database(key, setup_statements)
+            try:
+                pooled = database._checkout()
+            except duckdb.ConnectionException:
+                if not database.retired:
+                    raise
+                with self._lock:
+                    if self._databases.get(key) is database:
+                        del self._databases[key]
+                continue
+            break
+        with database._checked_out(pooled):
+            yield pooled
+
+    def check_health(self):
+        """
+        Retire every database that no longer answers, so it is recreated on next use.
+
+        Returns:
+            Dict of database key to whether it was healthy
+        """
+        with self._lock:
+            databases = list(self._databases.items())
+        health = {}
+        for key, database in databases:
+            health[key] = database.healthy()
+            if not health[key]:
+                logger.warning("Replacing unhealthy DuckDB database %s", key)
+                with self._lock:
+                    if self._databases.get(key) is database:
+                        del self._databases[key]
+                database.retire()
+        return health
+
+    def close(self):
+        """Close every database of the pool"""
+        with self._lock:
+            databases = list(self._databases.values())
+            self._databases.clear()
+        for database in databases:
+            database.close()
+
+
+# Process-wide pool shared by every session and request
+connection_pool = ConnectionPool.from_env()
+atexit.register(connection_pool.close)
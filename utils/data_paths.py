@@ -0,0 +1,35 @@
+import os
+
+# Directory holding the server-side files the UI may read and write
+DATA_DIR_ENV = 'MATCHAI_DATA_DIR'
+
+
+def data_directory():
+    """Resolved directory set by MATCHAI_DATA_DIR, or None when it is not set"""
+    data_dir = os.environ.get(DATA_DIR_ENV)
+    if not data_dir:
+        return None
+    return os.path.realpath(os.path.expanduser(data_dir))
+
+
+def resolve_data_path(path, data_dir):
+    """
+    Resolve a user-supplied path inside the data directory.
+
+    Relative paths are taken from the data directory. Symlinks and '..' are
+    resolved first, so a path cannot reach outside the directory through them.
+
+    Args:
+        path: Path entered by the user
+        data_dir: Resolved data directory, from data_directory()
+
+    Returns:
+        Absolute, resolved path inside data_dir
+
+    Raises:
+        ValueError: If the path resolves outside data_dir
+    """
+    resolved = os.path.realpath(os.path.join(data_dir, os.path.expanduser(path.strip())))
+    if resolved == data_dir or os.path.commonpath([resolved, data_dir]) != data_dir:
+        raise ValueError(f"{path} is outside the data directory")
+    return resolved
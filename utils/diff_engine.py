@@ -0,0 +1,216 @@
+# Edit distance above which a pair is shown as one replaced block instead of a detailed diff
+MAX_EDIT_DISTANCE = 64
+# Combined length (characters or list items) above which only the common prefix/suffix is kept
+MAX_DIFF_LENGTH = 2000
+# Separator list items are rendered with, matching how the record table shows lists
+LIST_SEPARATOR = ', '
+
+DELETE_SPAN = '<span style="background-color: #ffcccc; text-decoration: line-through;">'
+INSERT_SPAN = '<span style="background-color: #ccffcc;">'
+SPAN_END = '</span>'
+
+
+def _common_affixes(a, b):
+    """Lengths of the common prefix and of the common suffix of two sequences"""
+    limit = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def _myers_moves(a, b, max_distance):
+    """
+    Shortest edit script of a into b with Myers' O((N+M)D) algorithm.
+
+    Returns a list of 'equal' / 'delete' / 'insert' moves, or None when more
+    than max_distance edits are needed.
+    """
+    n, m = len(a), len(b)
+    max_d = min(n + m, max_distance)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace = []
+
+    for d in range(max_d + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m, d, offset)
+    return None
+
+
+def _backtrack(trace, n, m, distance, offset):
+    """Walk the saved Myers frontiers back from (n, m) into forward moves"""
+    moves = []
+    x, y = n, m
+    for d in range(distance, 0, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = v[offset + previous_k]
+        previous_y = previous_x - previous_k
+        while x > previous_x and y > previous_y:
+            moves.append('equal')
+            x -= 1
+            y -= 1
+        moves.append('insert' if x == previous_x else 'delete')
+        x, y = previous_x, previous_y
+    moves.extend(['equal'] * x)
+    moves.reverse()
+    return moves
+
+
+def _moves_to_opcodes(moves, i, j):
+    """Group moves into SequenceMatcher-style opcodes starting at a[i], b[j]"""
+    opcodes = []
+    index = 0
+    while index < len(moves):
+        i1, j1 = i, j
+        if moves[index] == 'equal':
+            while index < len(moves) and moves[index] == 'equal':
+                i += 1
+                j += 1
+                index += 1
+            opcodes.append(('equal', i1, i, j1, j))
+            continue
+        while index < len(moves) and moves[index] != 'equal':
+            if moves[index] == 'delete':
+                i += 1
+            else:
+                j += 1
+            index += 1
+        if i > i1 and j > j1:
+            opcodes.append(('replace', i1, i, j1, j))
+        elif i > i1:
+            opcodes.append(('delete', i1, i, j1, j))
+        else:
+            opcodes.append(('insert', i1, i, j1, j))
+    return opcodes
+
+
+def diff_opcodes(a, b, max_distance=MAX_EDIT_DISTANCE, max_length=MAX_DIFF_LENGTH):
+    """
+    Diff two sequences (strings or token lists) into SequenceMatcher-style opcodes.
+
+    The common prefix and suffix are trimmed first. The rest is diffed with
+    Myers' algorithm, bounded by max_distance edits; past that bound, or past
+    max_length combined items, the middle is reported as a single replace.
+
+    Returns:
+        List of (tag, i1, i2, j1, j2) tuples
+    """
+    prefix, suffix = _common_affixes(a, b)
+    a_end, b_end = len(a) - suffix, len(b) - suffix
+    middle_a, middle_b = a[prefix:a_end], b[prefix:b_end]
+
+    opcodes = [('equal', 0, prefix, 0, prefix)] if prefix else []
+    moves = None
+    if len(middle_a) + len(middle_b) <= max_length:
+        moves = _myers_moves(middle_a, middle_b, max_distance)
+    if moves is not None:
+        opcodes.extend(_moves_to_opcodes(moves, prefix, prefix))
+    elif middle_a and middle_b:
+        opcodes.append(('replace', prefix, a_end, prefix, b_end))
+    elif middle_a:
+        opcodes.append(('delete', prefix, a_end, prefix, prefix))
+    elif middle_b:
+        opcodes.append(('insert', prefix, prefix, prefix, b_end))
+    if suffix:
+        opcodes.append(('equal', a_end, len(a), b_end, len(b)))
+    return opcodes
+
+
+def _render_opcodes(opcodes, a, b, join):
+    """Render opcodes as HTML in one pass, join turning a slice into text"""
+    parts = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            parts.append(join(a[i1:i2]))
+            continue
+        if tag in ('delete', 'replace'):
+            parts.append(DELETE_SPAN + join(a[i1:i2]) + SPAN_END)
+        if tag in ('insert', 'replace'):
+            parts.append(INSERT_SPAN + join(b[j1:j2]) + SPAN_END)
+    return parts
+
+
+def _list_tokens(value):
+    """List items as strings, skipping empty items like the record table does"""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [str(item) for item in value if item]
+
+
+def _text(value):
+    """Text of a scalar value as shown in the record table"""
+    return '' if value is None else str(value)
+
+
+def diff_values_html(left_value, right_value):
+    """
+    HTML diff of two field values.
+
+    Lists (e.g. phone_list, business_name_list) are diffed item by item, so a
+    changed phone number shows up as one replaced item; other values are
+    diffed character by character.
+
+    Args:
+        left_value: Field value of the left record
+        right_value: Field value of the right record
+
+    Returns:
+        HTML with deletions struck through in red and insertions in green
+    """
+    if isinstance(left_value, list) or isinstance(right_value, list):
+        left_tokens, right_tokens = _list_tokens(left_value), _list_tokens(right_value)
+        if left_tokens == right_tokens:
+            return LIST_SEPARATOR.join(left_tokens)
+        parts = _render_opcodes(diff_opcodes(left_tokens, right_tokens), left_tokens, right_tokens, LIST_SEPARATOR.join)
+        return LIST_SEPARATOR.join(part for part in parts if part)
+
+    left_text, right_text = _text(left_value), _text(right_value)
+    if left_text == right_text:
+        return left_text
+    return ''.join(_render_opcodes(diff_opcodes(left_text, right_text), left_text, right_text, ''.join))
+
+
+def diff_columns_html(left_values, right_values):
+    """
+    HTML diffs of aligned columns of values, e.g. one field across many pairs.
+
+    Identical pairs, which repeat heavily in tabular data, are diffed once.
+
+    Args:
+        left_values: Iterable of left values
+        right_values: Iterable of right values, same length
+
+    Returns:
+        List of HTML diffs, one per pair
+    """
+    diffs = []
+    memo = {}
+    for left_value, right_value in zip(left_values, right_values):
+        key = (repr(left_value), repr(right_value))
+        html = memo.get(key)
+        if html is None:
+            html = memo[key] = diff_values_html(left_value, right_value)
+        diffs.append(html)
+    return diffs
@@ -1,56 +1,152 @@
-import duckdb
+import hashlib
+import itertools
 import json
-import pandas as pd
-import numpy as np
+
+import pyarrow as pa
+
+from utils.connection_pool import connection_pool
+from utils.record_schema import RecordSchema, _number
+from utils.scoring_sql import _prefixes, build_scoring_sql, model_record_columns, tf_adjustment_columns
+from utils.telemetry import telemetry
+
+_statement_counter = itertools.count()
+
+# Column restoring input order when a list of pairs is scored in one query
+PAIR_ORDER_COLUMN = '__pair_order'
+
+# Cursor-local temp table holding the pair scored by the prepared statement
+PAIR_INPUT_TABLE = '__splink__pair_input'
+
+# The input table is empty when the statement is prepared, and statistics
+# propagation would fold the plan against that empty table (every input
+# NULL). Batches are scanned from Arrow, which has no statistics either.
+MODEL_DATABASE_SETUP = ("SET disabled_optimizers = 'statistics_propagation'",)
+
 
 class DuckDBHandler:
-    def __init__(self):
-        self.conn = duckdb.connect()
-    
+    """
+    Fast path scoring a record pair with the model's own comparison SQL.
+
+    The gamma/bf/tf/match_weight SQL is generated from the model's comparisons
+    and prepared once per cursor of the model's database in the shared
+    ConnectionPool, with input types taken from the model's RecordSchema.
+    Concurrent sessions score on their own pooled cursors without waiting on
+    each other. The prepared statement reads a one-row temp table of the
+    cursor, so a pair is scored by inserting its values as bound parameters,
+    cast to the schema's types, and executing the statement; record text
+    never becomes SQL. Lists of pairs are registered as one Arrow table and
+    scored in a single query. Term frequencies are taken from the records'
+    tf_<column> values and are NULL (neutral) when absent.
+
+    Args:
+        linker_json: Splink linker configuration
+        pool: ConnectionPool holding the model's database, the shared pool by default
+        model_uri: Model the handler scores for, used to label telemetry
+        schema: Optional RecordSchema of the model, derived from linker_json otherwise
+    """
+
+    def __init__(self, linker_json, pool=None, model_uri=None, schema=None):
+        self.settings = linker_json
+        self.model_uri = model_uri
+        self.pool = pool if pool is not None else connection_pool
+        # Engines of the same model settings share one database
+        self.database_key = hashlib.sha256(
+            json.dumps(linker_json, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+        self.schema = schema if schema is not None else RecordSchema.from_settings(linker_json)
+        self.columns = model_record_columns(linker_json)
+        _, _, tf_prefix = _prefixes(linker_json)
+        self.tf_columns = [f'{tf_prefix}{column}' for column in tf_adjustment_columns(linker_json)]
+
+    @property
+    def database(self):
+        """Pooled database of the model"""
+        return self.pool.database(self.database_key, MODEL_DATABASE_SETUP)
+
+    def _column_types(self):
+        """Return the DuckDB type of each bound column, left columns first, then term frequencies"""
+        return tuple(self.schema.column_type(column) for column in self.columns) * 2 + ('DOUBLE',) * (2 * len(self.tf_columns))
+
+    def _input_names(self):
+        """Return the quoted input column names, in the order of _column_types"""
+        names = [f'"{column}_{side}"' for side in ('l', 'r') for column in self.columns]
+        return names + [f'"{column}_{side}"' for column in self.tf_columns for side in ('l', 'r')]
+
+    def _input_table_sql(self, column_types):
+        """SQL creating the cursor's pair input table for a type signature"""
+        columns = ', '.join(f'{name} {column_type}' for name, column_type in zip(self._input_names(), column_types))
+        return f'CREATE TEMP TABLE IF NOT EXISTS {PAIR_INPUT_TABLE} ({columns})'
+
+    def _insert_sql(self, column_types):
+        """SQL inserting one pair as ? parameters cast to a type signature"""
+        casts = ', '.join(f'CAST(? AS {column_type})' for column_type in column_types)
+        return f'INSERT INTO {PAIR_INPUT_TABLE} SELECT {casts}'
+
+    def _scoring_sql(self):
+        """Scoring SQL of the pair in the cursor's input table"""
+        return build_scoring_sql(self.settings, PAIR_INPUT_TABLE, tf_columns_provided=True)
+
     def compare_records(self, left_record, right_record):
         """Run Splink comparison between two records"""
         try:
-            # Load SQL query
-            with open('data/query.sql', 'r') as f:
-                sql_query = f.read()
-            
-            # Create temporary tables
-            left_df = pd.DataFrame([left_record])
-            right_df = pd.DataFrame([right_record])
-            
-            # Register dataframes with correct Splink table names
-            self.conn.register('__splink__compare_two_records_left', left_df)
-            self.conn.register('__splink__compare_two_records_right', right_df)
-            
-            # Run the comparison query using a cursor object
-            cursor = self.conn.execute(sql_query)
-            row = cursor.fetchone()
-
-            if row is not None:
-                # Get column names reliably from the cursor
-                if cursor.description is None:
-                    raise Exception('No cursor description available after executing query')
-                columns = [col[0] for col in cursor.description]
-                # Build a dictionary mapping column names to values
-                df = pd.DataFrame([row], columns=columns)
-                if df is not None and not df.empty:
-                    # Convert the first row to a plain Python dict with native Python scalars
-                    series = df.iloc[0]
-                    def to_py(v):
-                        if isinstance(v, (np.generic,)):
-                            return v.item()
-                        return v
-                    result_dict = {k: to_py(v) for k, v in series.to_dict().items()}
-                    return result_dict
-                else:
+            values = [self.schema.coerce_value(column, left_record.get(column)) for column in self.columns]
+            values += [self.schema.coerce_value(column, right_record.get(column)) for column in self.columns]
+            values += [
+                _number(record.get(column))
+                for column in self.tf_columns for record in (left_record, right_record)
+            ]
+            column_types = self._column_types()
+
+            with telemetry.timed('duckdb_execute', self.model_uri), self.pool.acquire(self.database_key, MODEL_DATABASE_SETUP) as pooled:
+                statement_name = pooled.prepare(
+                    column_types, self._scoring_sql, setup_statements=[self._input_table_sql(column_types)]
+                )
+                pooled.cursor.execute(f'DELETE FROM {PAIR_INPUT_TABLE}')
+                pooled.cursor.execute(self._insert_sql(column_types), values)
+                cursor = pooled.cursor.execute(f'EXECUTE {statement_name}')
+                row = cursor.fetchone()
+                if row is None:
                     return None
-            else:
-                return None
-            
+                columns = [col[0] for col in cursor.description]
+
+            return dict(zip(columns, row))
+
         except Exception as e:
             # Re-raise the exception to be handled by the calling code
             raise Exception(f"Error running comparison: {str(e)}")
-    
-    def __del__(self):
-        if hasattr(self, 'conn'):
-            self.conn.close()
\ No newline at end of file
+
+    def score_records(self, left_records, right_records):
+        """
+        Score aligned lists of record pairs in one query.
+
+        The pairs are handed to DuckDB as an Arrow table and the scores are
+        fetched back as Arrow, so no per-pair statement or DataFrame is built.
+
+        Returns:
+            List of prediction rows as dictionaries, one per pair
+        """
+        if not left_records:
+            return []
+        pairs = self.schema.pairs_to_arrow(left_records, right_records)
+        for column in self.tf_columns:
+            for side, records in (('l', left_records), ('r', right_records)):
+                pairs = pairs.append_column(
+                    f'{column}_{side}', pa.array([_number(record.get(column)) for record in records], type=pa.float64())
+                )
+        pairs = pairs.append_column(PAIR_ORDER_COLUMN, pa.array(range(pairs.num_rows), type=pa.int64()))
+        input_name = f'__splink__score_pairs_input_{next(_statement_counter)}'
+        sql = build_scoring_sql(self.settings, input_name, tf_columns_provided=True)
+        try:
+            with telemetry.timed('duckdb_execute', self.model_uri), self.pool.acquire(self.database_key, MODEL_DATABASE_SETUP) as pooled:
+                cursor = pooled.cursor
+                cursor.register(input_name, pairs)
+                try:
+                    scores = cursor.execute(
+                        f"SELECT * EXCLUDE ({PAIR_ORDER_COLUMN}) FROM ({sql}) ORDER BY {PAIR_ORDER_COLUMN}"
+                    ).fetch_arrow_table()
+                finally:
+                    cursor.unregister(input_name)
+        except Exception as e:
+            raise Exception(f"Error running comparison: {str(e)}")
+        return scores.to_pylist()
@@ -0,0 +1,252 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+
+from utils.telemetry import telemetry
+
+# Environment variables configuring the model cache and registry
+MODEL_CACHE_DIR_ENV = 'MATCHAI_MODEL_CACHE_DIR'
+MODEL_CACHE_MAX_BYTES_ENV = 'MATCHAI_MODEL_CACHE_MAX_BYTES'
+LOCAL_MODEL_REGISTRY_ENV = 'MATCHAI_LOCAL_MODEL_REGISTRY'
+
+DEFAULT_MODEL_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'matchai', 'models')
+DEFAULT_MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE_SUFFIX = '.json.gz'
+
+# models:/<name>/<version>, models:/<name>/<stage> or models:/<name>@<alias>
+MODEL_URI_PATTERN = re.compile(r'^models:/(?P<name>[^/@]+)(?:/(?P<version>[^/@]+)|@(?P<alias>[^/@]+))$')
+
+
+def parse_model_uri(model_uri):
+    """
+    Split a registry model URI into (name, version, alias).
+
+    Returns (None, None, None) for URIs that do not point at the model registry.
+    """
+    match = MODEL_URI_PATTERN.match(model_uri.strip())
+    if match is None:
+        return None, None, None
+    return match.group('name'), match.group('version'), match.group('alias')
+
+
+class MlflowModelRegistry:
+    """
+    Model registry backed by MLflow (Databricks Unity Catalog by default).
+
+    MLflow is imported, and pointed at the tracking and registry URIs, the
+    first time a model is resolved or fetched rather than at startup.
+
+    Args:
+        tracking_uri: MLflow tracking URI
+        registry_uri: MLflow model registry URI
+    """
+
+    def __init__(self, tracking_uri='databricks', registry_uri='databricks-uc'):
+        self.tracking_uri = tracking_uri
+        self.registry_uri = registry_uri
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _mlflow(self):
+        """The mlflow module, configured for this registry"""
+        with self._lock:
+            if self._module is None:
+                with telemetry.timed('import_mlflow'):
+                    import mlflow
+                mlflow.set_tracking_uri(self.tracking_uri)
+                mlflow.set_registry_uri(self.registry_uri)
+                self._module = mlflow
+            return self._module
+
+    def resolve_version(self, model_uri):
+        """
+        Resolve a model URI to the concrete registry version it points at.
+
+        Returns None when the URI cannot be pinned to a version.
+        """
+        name, version, alias = parse_model_uri(model_uri)
+        if name is None:
+            return None
+        if version is not None and version.isdigit():
+            return version
+
+        client = self._mlflow().MlflowClient()
+        try:
+            if alias is not None:
+                return str(client.get_model_version_by_alias(name, alias).version)
+            stages = None if version.lower() == 'latest' else [version]
+            versions = client.get_latest_versions(name, stages=stages)
+            return str(max(int(v.version) for v in versions)) if versions else None
+        except Exception:
+            return None
+
+    def load_model_json(self, model_uri):
+        """Fetch a model and return the raw linker JSON held by its python model"""
+        model = self._mlflow().pyfunc.load_model(model_uri)
+        return model.unwrap_python_model().model_json.copy()
+
+
+class LocalModelRegistry:
+    """
+    Offline stand-in for the model registry.
+
+    Points either at a single linker JSON file served for every model URI, or at
+    a directory laid out as <directory>/<model name>/<version>.json.
+
+    Args:
+        path: JSON file or registry directory
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _model_path(self, model_uri):
+        if os.path.isfile(self.path):
+            return self.path
+        name, version, alias = parse_model_uri(model_uri)
+        if name is None:
+            raise ValueError(f"Unsupported model URI for the local registry: {model_uri}")
+        return os.path.join(self.path, name, f"{self.resolve_version(model_uri)}.json")
+
+    def resolve_version(self, model_uri):
+        """Resolve a model URI to a version, using the highest version for aliases"""
+        name, version, alias = parse_model_uri(model_uri)
+        if name is None:
+            return None
+        if version is not None and version.isdigit():
+            return version
+        if os.path.isfile(self.path):
+            return 'local'
+        model_dir = os.path.join(self.path, name)
+        versions = [
+            int(file_name[:-len('.json')]) for file_name in os.listdir(model_dir)
+            if file_name.endswith('.json') and file_name[:-len('.json')].isdigit()
+        ] if os.path.isdir(model_dir) else []
+        return str(max(versions)) if versions else None
+
+    def load_model_json(self, model_uri):
+        """Read the raw linker JSON of a model from disk"""
+        with open(self._model_path(model_uri), 'r') as f:
+            return json.load(f)
+
+
+def model_registry_from_env():
+    """Return the local registry stand-in if configured, otherwise the MLflow registry"""
+    local_path = os.environ.get(LOCAL_MODEL_REGISTRY_ENV)
+    if local_path:
+        return LocalModelRegistry(local_path)
+    return MlflowModelRegistry()
+
+
+class ModelCache:
+    """
+    On-disk cache of normalized linker JSON keyed by model name and version.
+
+    Entries are stored as gzipped compact JSON, one file per model version, and
+    evicted least-recently-used first once the directory exceeds max_bytes.
+    Access time is tracked through the file modification time, so the cache is
+    shared by every session and process pointing at the same directory.
+
+    Args:
+        registry: Registry used to resolve versions and fetch models on a miss
+        cache_dir: Directory holding cached models
+        max_bytes: Size bound of the cache directory
+    """
+
+    def __init__(self, registry, cache_dir=DEFAULT_MODEL_CACHE_DIR, max_bytes=DEFAULT_MODEL_CACHE_MAX_BYTES):
+        self.registry = registry
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache configured from environment variables"""
+        return cls(
+            model_registry_from_env(),
+            cache_dir=os.environ.get(MODEL_CACHE_DIR_ENV, DEFAULT_MODEL_CACHE_DIR),
+            max_bytes=int(os.environ.get(MODEL_CACHE_MAX_BYTES_ENV, DEFAULT_MODEL_CACHE_MAX_BYTES)),
+        )
+
+    def _cache_path(self, name, version):
+        digest = hashlib.sha256(f"{name}/{version}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}{CACHE_FILE_SUFFIX}")
+
+    def _read(self, path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used
+        os.utime(path)
+        return entry['linker_json']
+
+    def _write(self, path, model_uri, version, linker_json):
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = {'model_uri': model_uri, 'version': version, 'linker_json': linker_json}
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for file_name in os.listdir(self.cache_dir):
+                if not file_name.endswith(CACHE_FILE_SUFFIX):
+                    continue
+                path = os.path.join(self.cache_dir, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            # Keep at least the most recently used entry
+            for _, size, path in sorted(entries)[:-1]:
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+    def load_linker_json(self, model_uri, normalize):
+        """
+        Return the normalized linker JSON of a model, fetching it on a cache miss.
+
+        Args:
+            model_uri: URI of the model to load
+            normalize: Function turning the raw model JSON into the normalized form
+
+        Returns:
+            Tuple of (normalized linker JSON, resolved version or None)
+        """
+        name, _, _ = parse_model_uri(model_uri)
+        with telemetry.timed('model_version_resolve', model_uri):
+            version = self.registry.resolve_version(model_uri)
+
+        # Unpinned URIs could silently change, so they always go to the registry
+        if name is None or version is None:
+            with telemetry.timed('model_fetch', model_uri):
+                return normalize(self.registry.load_model_json(model_uri)), None
+
+        path = self._cache_path(name, version)
+        with telemetry.timed('model_cache_read', model_uri):
+            linker_json = self._read(path) if os.path.exists(path) else None
+        if linker_json is None:
+            telemetry.increment('model_cache_miss', model_uri)
+            with telemetry.timed('model_fetch', model_uri):
+                linker_json = normalize(self.registry.load_model_json(model_uri))
+            self._write(path, model_uri, version, linker_json)
+        else:
+            telemetry.increment('model_cache_hit', model_uri)
+        return linker_json, version
@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on models scored at the same time for one record pair
+MAX_MODEL_COMPARISON_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_MODEL_COMPARISON_WORKERS, thread_name_prefix='model-comparison')
+
+
+def compare_across_models(comparison_engines, left_record, right_record):
+    """
+    Score one record pair against several models concurrently.
+
+    The records are parsed once by the caller and shared by every engine, so
+    total latency is close to that of the slowest model rather than the sum.
+
+    Args:
+        comparison_engines: Mapping of model label to ComparisonEngine
+        left_record: First record to compare
+        right_record: Second record to compare
+
+    Returns:
+        Dict of model label to prediction row, in the order of comparison_engines
+
+    Raises:
+        Exception: If any model fails, naming the model that failed
+    """
+    futures = {
+        label: _executor.submit(engine.compare, left_record, right_record)
+        for label, engine in comparison_engines.items()
+    }
+
+    results = {}
+    for label, future in futures.items():
+        try:
+            prediction_rows = future.result()
+        except Exception as e:
+            raise Exception(f"{label}: {e}") from e
+        if not prediction_rows or not prediction_rows[0]:
+            raise Exception(f"{label}: no comparison results returned")
+        results[label] = prediction_rows[0]
+    return results
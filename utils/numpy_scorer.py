@@ -0,0 +1,803 @@
+import itertools
+import math
+import re
+
+import numpy as np
+
+from utils.scoring_sql import (
+    _exact_match_u_probability,
+    _prefixes,
+    level_bayes_factors,
+    level_comparison_vector_values,
+    model_record_columns,
+)
+from utils.splink_utils import prob_to_bayes_factor
+from utils.telemetry import telemetry
+
+
+class UnsupportedConditionError(ValueError):
+    """Raised when a comparison level condition cannot be translated to NumPy"""
+
+
+# =============================================================================
+# STRING SIMILARITY FUNCTIONS (matching DuckDB semantics)
+# =============================================================================
+
+# DuckDB's edit distance and similarity functions operate on UTF-8 bytes rather
+# than characters, so the functions below take bytes from _utf8_bytes
+
+def _utf8_bytes(function):
+    def wrapped(left, right):
+        return function(str(left).encode('utf-8'), str(right).encode('utf-8'))
+    return wrapped
+
+
+def damerau_levenshtein(left, right):
+    """Unrestricted Damerau-Levenshtein distance, as computed by DuckDB"""
+    if left == right:
+        return 0
+    len_left, len_right = len(left), len(right)
+    if len_left == 0 or len_right == 0:
+        return len_left + len_right
+    max_distance = len_left + len_right
+    last_row_of_char = {}
+    distances = [[0] * (len_right + 2) for _ in range(len_left + 2)]
+    distances[0][0] = max_distance
+    for i in range(len_left + 1):
+        distances[i + 1][0] = max_distance
+        distances[i + 1][1] = i
+    for j in range(len_right + 1):
+        distances[0][j + 1] = max_distance
+        distances[1][j + 1] = j
+    for i in range(1, len_left + 1):
+        last_match_column = 0
+        for j in range(1, len_right + 1):
+            last_match_row = last_row_of_char.get(right[j - 1], 0)
+            previous_match_column = last_match_column
+            cost = 1
+            if left[i - 1] == right[j - 1]:
+                cost = 0
+                last_match_column = j
+            distances[i + 1][j + 1] = min(
+                distances[i][j] + cost,
+                distances[i + 1][j] + 1,
+                distances[i][j + 1] + 1,
+                distances[last_match_row][previous_match_column]
+                + (i - last_match_row - 1) + 1 + (j - previous_match_column - 1),
+            )
+        last_row_of_char[left[i - 1]] = i
+    return distances[len_left + 1][len_right + 1]
+
+
+def levenshtein(left, right):
+    """Levenshtein edit distance"""
+    if len(left) < len(right):
+        left, right = right, left
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, start=1):
+        current = [i]
+        for j, right_char in enumerate(right, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (left_char != right_char),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def jaro_similarity(left, right):
+    """Jaro similarity, 0.0 when either string is empty"""
+    if not left or not right:
+        return 0.0
+    if left == right:
+        return 1.0
+    match_window = max(max(len(left), len(right)) // 2 - 1, 0)
+    left_matches = [False] * len(left)
+    right_matches = [False] * len(right)
+    matches = 0
+    for i, left_char in enumerate(left):
+        start = max(0, i - match_window)
+        end = min(i + match_window + 1, len(right))
+        for j in range(start, end):
+            if not right_matches[j] and right[j] == left_char:
+                left_matches[i] = right_matches[j] = True
+                matches += 1
+                break
+    if matches == 0:
+        return 0.0
+    transpositions = 0
+    j = 0
+    for i, left_char in enumerate(left):
+        if left_matches[i]:
+            while not right_matches[j]:
+                j += 1
+            if left_char != right[j]:
+                transpositions += 1
+            j += 1
+    transpositions //= 2
+    return (matches / len(left) + matches / len(right) + (matches - transpositions) / matches) / 3
+
+
+def jaro_winkler_similarity(left, right):
+    """Jaro-Winkler similarity with the standard 0.1 prefix weight over up to 4 characters"""
+    similarity = jaro_similarity(left, right)
+    if similarity > 0.7:
+        prefix = 0
+        for left_char, right_char in zip(left[:4], right[:4]):
+            if left_char != right_char:
+                break
+            prefix += 1
+        similarity += prefix * 0.1 * (1 - similarity)
+    return similarity
+
+
+def jaccard(left, right):
+    """Jaccard similarity of the character sets of two strings"""
+    if not left or not right:
+        raise ValueError("Jaccard Function: An argument too short!")
+    left_chars, right_chars = set(left), set(right)
+    return len(left_chars & right_chars) / len(left_chars | right_chars)
+
+
+# =============================================================================
+# CONDITION TRANSLATION
+# =============================================================================
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>\d+\.\d*|\.\d+|\d+)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*")
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>->|<>|!=|<=|>=|\|\||[=<>(),\[\]+\-*/])
+""", re.VERBOSE)
+
+COMPARISON_OPERATORS = {'=', '<>', '!=', '<', '<=', '>', '>='}
+
+
+def _tokenize(sql):
+    tokens = []
+    position = 0
+    while position < len(sql):
+        match = TOKEN_PATTERN.match(sql, position)
+        if match is None:
+            raise UnsupportedConditionError(f"Unsupported syntax near: {sql[position:position + 20]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group()
+        if kind == 'space':
+            continue
+        if kind == 'name':
+            upper = text.upper()
+            if upper in ('AND', 'OR', 'NOT', 'IS', 'NULL', 'TRUE', 'FALSE'):
+                tokens.append(('keyword', upper))
+                continue
+        if kind == 'quoted':
+            kind, text = 'name', text[1:-1].replace('""', '"')
+        tokens.append((kind, text))
+    tokens.append(('end', None))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser for the DuckDB SQL subset used in comparison levels"""
+
+    def __init__(self, sql):
+        self.tokens = _tokenize(sql)
+        self.position = 0
+
+    def peek(self, offset=0):
+        return self.tokens[self.position + offset]
+
+    def advance(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def accept(self, kind, text=None):
+        token = self.peek()
+        if token[0] == kind and (text is None or token[1] == text):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, kind, text=None):
+        if not self.accept(kind, text):
+            raise UnsupportedConditionError(f"Expected {text or kind}, found {self.peek()[1]!r}")
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] != 'end':
+            raise UnsupportedConditionError(f"Unexpected token {self.peek()[1]!r}")
+        return node
+
+    def parse_argument(self):
+        if self.peek()[0] == 'name' and self.peek(1) == ('op', '->'):
+            parameter = self.advance()[1]
+            self.advance()
+            return ('lambda', parameter, self.parse_or())
+        return self.parse_or()
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept('keyword', 'OR'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept('keyword', 'AND'):
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.accept('keyword', 'NOT'):
+            return ('not', self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        node = self.parse_additive()
+        while True:
+            token = self.peek()
+            if token[0] == 'op' and token[1] in COMPARISON_OPERATORS:
+                self.advance()
+                node = ('compare', token[1], node, self.parse_additive())
+            elif token == ('keyword', 'IS'):
+                self.advance()
+                negated = self.accept('keyword', 'NOT')
+                self.expect('keyword', 'NULL')
+                node = ('is_not_null' if negated else 'is_null', node)
+            else:
+                return node
+
+    def parse_additive(self):
+        node = self.parse_multiplicative()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('+', '-', '||'):
+            node = ('arithmetic', self.advance()[1], node, self.parse_multiplicative())
+        return node
+
+    def parse_multiplicative(self):
+        node = self.parse_unary()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('*', '/'):
+            node = ('arithmetic', self.advance()[1], node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.accept('op', '-'):
+            return ('arithmetic', '-', ('literal', 0), self.parse_unary())
+        return self.parse_postfix()
+
+    def parse_postfix(self):
+        node = self.parse_primary()
+        while self.accept('op', '['):
+            index = self.parse_or()
+            self.expect('op', ']')
+            node = ('index', node, index)
+        return node
+
+    def parse_primary(self):
+        kind, text = self.advance()
+        if kind == 'number':
+            return ('literal', float(text) if '.' in text else int(text))
+        if kind == 'string':
+            return ('literal', text[1:-1].replace("''", "'"))
+        if kind == 'keyword' and text in ('TRUE', 'FALSE'):
+            return ('literal', text == 'TRUE')
+        if kind == 'keyword' and text == 'NULL':
+            return ('literal', None)
+        if kind == 'op' and text == '(':
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        if kind == 'op' and text == '[':
+            items = []
+            if not self.accept('op', ']'):
+                items.append(self.parse_or())
+                while self.accept('op', ','):
+                    items.append(self.parse_or())
+                self.expect('op', ']')
+            return ('list', items)
+        if kind == 'name':
+            if self.accept('op', '('):
+                arguments = []
+                if not self.accept('op', ')'):
+                    arguments.append(self.parse_argument())
+                    while self.accept('op', ','):
+                        arguments.append(self.parse_argument())
+                    self.expect('op', ')')
+                return ('call', text.lower(), arguments)
+            return ('column', text)
+        raise UnsupportedConditionError(f"Unsupported token {text!r}")
+
+
+# =============================================================================
+# VECTORIZED EVALUATION
+# =============================================================================
+
+def _constant(n, value):
+    array = np.empty(n, dtype=object)
+    array.fill(value)
+    return array
+
+
+def _object_array(values, n):
+    return np.fromiter(values, dtype=object, count=n)
+
+
+def _null_propagating(function):
+    """Wrap a scalar function so that any NULL argument yields NULL"""
+    def wrapped(*values):
+        for value in values:
+            if value is None:
+                return None
+        return function(*values)
+    return wrapped
+
+
+def _elementwise(function, arity):
+    """Build an object-array ufunc applying function with SQL NULL propagation"""
+    ufunc = np.frompyfunc(_null_propagating(function), arity, 1)
+
+    def apply(*arrays):
+        return ufunc(*arrays).astype(object, copy=False)
+    return apply
+
+
+def _sql_equal(left, right):
+    """Equality with DuckDB's implicit string-to-number cast"""
+    if isinstance(left, str) and isinstance(right, (int, float)) and not isinstance(right, bool):
+        left, right = right, left
+    if isinstance(right, str) and isinstance(left, (int, float)) and not isinstance(left, bool):
+        try:
+            return left == type(left)(right)
+        except ValueError:
+            return False
+    return left == right
+
+
+COMPARE_FUNCTIONS = {
+    '=': _sql_equal,
+    '<>': lambda left, right: not _sql_equal(left, right),
+    '!=': lambda left, right: not _sql_equal(left, right),
+    '<': lambda left, right: left < right,
+    '<=': lambda left, right: left <= right,
+    '>': lambda left, right: left > right,
+    '>=': lambda left, right: left >= right,
+}
+
+ARITHMETIC_FUNCTIONS = {
+    '+': lambda left, right: left + right,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+    '/': lambda left, right: left / right,
+    '||': lambda left, right: f"{left}{right}",
+}
+
+
+def _list_contains(values, item):
+    return any(_sql_equal(value, item) for value in values if value is not None)
+
+
+def _list_has_any(left_values, right_values):
+    right_set = [value for value in right_values if value is not None]
+    return any(value in right_set for value in left_values if value is not None)
+
+
+def _list_min(values):
+    present = [value for value in values if value is not None]
+    return min(present) if present else None
+
+
+def _list_max(values):
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+def _flatten(values):
+    return [item for sublist in values if sublist is not None for item in sublist]
+
+
+def _list_index(values, index):
+    if 1 <= index <= len(values):
+        return values[index - 1]
+    return None
+
+
+SCALAR_FUNCTIONS = {
+    'damerau_levenshtein': (_utf8_bytes(damerau_levenshtein), 2),
+    'levenshtein': (_utf8_bytes(levenshtein), 2),
+    'jaro_similarity': (_utf8_bytes(jaro_similarity), 2),
+    'jaro_winkler_similarity': (_utf8_bytes(jaro_winkler_similarity), 2),
+    'jaccard': (_utf8_bytes(jaccard), 2),
+    'length': (len, 1),
+    'len': (len, 1),
+    'array_length': (len, 1),
+    'lower': (str.lower, 1),
+    'upper': (str.upper, 1),
+    'left': (lambda value, count: value[:count], 2),
+    'right': (lambda value, count: value[-count:] if count else '', 2),
+    'abs': (abs, 1),
+    'list_contains': (_list_contains, 2),
+    'array_contains': (_list_contains, 2),
+    'list_has_any': (_list_has_any, 2),
+    'array_has_any': (_list_has_any, 2),
+    'list_min': (_list_min, 1),
+    'list_max': (_list_max, 1),
+    'flatten': (_flatten, 1),
+}
+
+ELEMENTWISE_FUNCTIONS = {
+    name: _elementwise(function, arity) for name, (function, arity) in SCALAR_FUNCTIONS.items()
+}
+ELEMENTWISE_COMPARE = {op: _elementwise(function, 2) for op, function in COMPARE_FUNCTIONS.items()}
+ELEMENTWISE_ARITHMETIC = {op: _elementwise(function, 2) for op, function in ARITHMETIC_FUNCTIONS.items()}
+ELEMENTWISE_INDEX = _elementwise(_list_index, 2)
+
+LAMBDA_FUNCTIONS = {'list_transform', 'array_transform', 'list_filter', 'array_filter'}
+
+
+def _truth_codes(array):
+    """Encode SQL booleans as 0 (false), 0.5 (NULL) and 1 (true) so AND/OR become min/max"""
+    return np.fromiter(
+        (0.5 if value is None else float(bool(value)) for value in array),
+        dtype=float,
+        count=len(array),
+    )
+
+
+def _from_truth_codes(codes):
+    result = np.empty(len(codes), dtype=object)
+    result[codes == 1.0] = True
+    result[codes == 0.0] = False
+    return result
+
+
+def _compile(node):
+    """Compile a parsed condition into a function of (env, n) returning an object array"""
+    kind = node[0]
+
+    if kind == 'literal':
+        value = node[1]
+        return lambda env, n: _constant(n, value)
+
+    if kind == 'column':
+        name = node[1]
+
+        def column(env, n):
+            array = env.get(name)
+            return array if array is not None else _constant(n, None)
+        return column
+
+    if kind == 'list':
+        items = [_compile(item) for item in node[1]]
+
+        def list_literal(env, n):
+            arrays = [item(env, n) for item in items]
+            return _object_array((list(values) for values in zip(*arrays)), n)
+        return list_literal
+
+    if kind in ('and', 'or'):
+        left, right = _compile(node[1]), _compile(node[2])
+        combine = np.minimum if kind == 'and' else np.maximum
+        return lambda env, n: _from_truth_codes(
+            combine(_truth_codes(left(env, n)), _truth_codes(right(env, n)))
+        )
+
+    if kind == 'not':
+        operand = _compile(node[1])
+        return lambda env, n: _from_truth_codes(1.0 - _truth_codes(operand(env, n)))
+
+    if kind in ('is_null', 'is_not_null'):
+        operand = _compile(node[1])
+        want_null = kind == 'is_null'
+        return lambda env, n: _object_array(
+            ((value is None) == want_null for value in operand(env, n)), n
+        )
+
+    if kind == 'compare':
+        function = ELEMENTWISE_COMPARE[node[1]]
+        left, right = _compile(node[2]), _compile(node[3])
+        return lambda env, n: function(left(env, n), right(env, n))
+
+    if kind == 'arithmetic':
+        function = ELEMENTWISE_ARITHMETIC[node[1]]
+        left, right = _compile(node[2]), _compile(node[3])
+        return lambda env, n: function(left(env, n), right(env, n))
+
+    if kind == 'index':
+        values, index = _compile(node[1]), _compile(node[2])
+        return lambda env, n: ELEMENTWISE_INDEX(values(env, n), index(env, n))
+
+    if kind == 'call':
+        name, arguments = node[1], node[2]
+        if name in LAMBDA_FUNCTIONS:
+            return _compile_lambda_call(name, arguments)
+        if name == 'coalesce':
+            compiled = [_compile(argument) for argument in arguments]
+
+            def coalesce(env, n):
+                arrays = [argument(env, n) for argument in compiled]
+                return _object_array(
+                    (next((value for value in values if value is not None), None) for values in zip(*arrays)),
+                    n,
+                )
+            return coalesce
+        if name not in ELEMENTWISE_FUNCTIONS:
+            raise UnsupportedConditionError(f"Unsupported function: {name}")
+        if len(arguments) != SCALAR_FUNCTIONS[name][1]:
+            raise UnsupportedConditionError(f"Unexpected number of arguments for {name}")
+        function = ELEMENTWISE_FUNCTIONS[name]
+        compiled = [_compile(argument) for argument in arguments]
+        return lambda env, n: function(*(argument(env, n) for argument in compiled))
+
+    raise UnsupportedConditionError(f"Unsupported expression: {kind}")
+
+
+def _compile_lambda_call(name, arguments):
+    """
+    Compile list_transform/list_filter by flattening every row's list into one
+    array, evaluating the lambda body once over it and regrouping by row.
+    """
+    if len(arguments) != 2 or arguments[1][0] != 'lambda':
+        raise UnsupportedConditionError(f"{name} requires a list and a lambda")
+    values_function = _compile(arguments[0])
+    parameter = arguments[1][1]
+    body = _compile(arguments[1][2])
+    is_filter = name.endswith('filter')
+
+    def apply(env, n):
+        lists = values_function(env, n)
+        lengths = np.fromiter((len(values) if values is not None else 0 for values in lists), dtype=np.int64, count=n)
+        total = int(lengths.sum())
+        parents = np.repeat(np.arange(n), lengths)
+
+        inner_env = {key: array[parents] for key, array in env.items()}
+        inner_env[parameter] = _object_array(
+            itertools.chain.from_iterable(values for values in lists if values is not None),
+            total,
+        )
+        results = body(inner_env, total)
+        if is_filter:
+            keep = _truth_codes(results) == 1.0
+            elements = inner_env[parameter]
+
+        output = np.empty(n, dtype=object)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        for row, values in enumerate(lists):
+            if values is None:
+                continue
+            start, end = offsets[row], offsets[row + 1]
+            if is_filter:
+                output[row] = list(elements[start:end][keep[start:end]])
+            else:
+                output[row] = list(results[start:end])
+        return output
+    return apply
+
+
+def compile_condition(sql_condition):
+    """
+    Translate a comparison level SQL condition into a vectorized predicate.
+
+    Args:
+        sql_condition: DuckDB SQL condition from the model settings
+
+    Returns:
+        Function of (env, n) returning an object array of True/False/None
+
+    Raises:
+        UnsupportedConditionError: If the condition uses unsupported syntax or functions
+    """
+    return _compile(_Parser(sql_condition).parse())
+
+
+# =============================================================================
+# SCORER
+# =============================================================================
+
+class NumpyScorer:
+    """
+    In-process Fellegi-Sunter scorer working on NumPy arrays.
+
+    Every comparison level condition is translated once into a vectorized
+    predicate, so scoring needs no database, SQL planning or DataFrame
+    construction. If any condition cannot be translated, scoring falls back to
+    the model's DuckDBHandler.
+
+    Args:
+        linker_json: Splink linker configuration
+        fallback: Optional DuckDBHandler used when the model cannot be translated
+        model_uri: Model the scorer belongs to, used to label telemetry
+        schema: Optional RecordSchema of the model, derived from linker_json otherwise
+    """
+
+    def __init__(self, linker_json, fallback=None, model_uri=None, schema=None):
+        if schema is None:
+            from utils.record_schema import RecordSchema
+            schema = RecordSchema.from_settings(linker_json)
+        self.settings = linker_json
+        self.model_uri = model_uri
+        self.schema = schema
+        self.columns = model_record_columns(linker_json)
+        self.gamma_prefix, self.bf_prefix, self.tf_prefix = _prefixes(linker_json)
+        self.prior_bayes_factor = prob_to_bayes_factor(linker_json['probability_two_random_records_match'])
+        self._fallback = fallback
+        self.unsupported_reason = None
+
+        self.comparisons = []
+        try:
+            for comparison in linker_json.get('comparisons', []):
+                self.comparisons.append(self._compile_comparison(comparison))
+        except UnsupportedConditionError as e:
+            self.unsupported_reason = str(e)
+            self.comparisons = []
+
+    @property
+    def supported(self):
+        """Whether every comparison level could be translated"""
+        return self.unsupported_reason is None
+
+    def _compile_comparison(self, comparison):
+        levels = comparison['comparison_levels']
+        values = level_comparison_vector_values(comparison)
+        bayes_factors = level_bayes_factors(comparison)
+
+        predicates = []
+        else_value = 0
+        tf_levels = []
+        for level, value in zip(levels, values):
+            condition = level['sql_condition'].strip()
+            if condition.upper() == 'ELSE':
+                else_value = value
+                continue
+            predicates.append((value, compile_condition(condition)))
+            tf_column = level.get('tf_adjustment_column')
+            weight = level.get('tf_adjustment_weight', 1.0)
+            if value != -1 and tf_column and weight != 0:
+                tf_levels.append((
+                    value,
+                    tf_column,
+                    float(weight),
+                    float(level.get('tf_minimum_u_value', 0.0)),
+                    _exact_match_u_probability(comparison, tf_column),
+                ))
+
+        # Bayes factor lookup indexed by gamma + 1, so the null level (-1) sits at 0
+        bayes_factor_lookup = np.full(max(values) + 2, np.nan)
+        for value, bayes_factor in zip(values, bayes_factors):
+            bayes_factor_lookup[value + 1] = np.nan if bayes_factor is None else bayes_factor
+
+        has_tf = any(level.get('tf_adjustment_column') for level in levels)
+        return {
+            'name': comparison['output_column_name'],
+            'predicates': predicates,
+            'else_value': else_value,
+            'bayes_factor_lookup': bayes_factor_lookup,
+            'tf_levels': tf_levels,
+            'has_tf': has_tf,
+        }
+
+    def _fallback_handler(self):
+        if self._fallback is None:
+            from utils.duckdb_handler import DuckDBHandler
+            self._fallback = DuckDBHandler(self.settings, model_uri=self.model_uri, schema=self.schema)
+        return self._fallback
+
+    def _fallback_records(self, left_records, right_records):
+        telemetry.increment('duckdb_fallback_pairs', self.model_uri, len(left_records))
+        return self._fallback_handler().score_records(left_records, right_records)
+
+    def _tf_bayes_factors(self, comparison, gamma, env, n):
+        tf_bayes_factors = np.ones(n)
+        for value, tf_column, weight, minimum_u, u_exact in comparison['tf_levels']:
+            tf_l = env.get(f'{self.tf_prefix}{tf_column}_l')
+            tf_r = env.get(f'{self.tf_prefix}{tf_column}_r')
+            if tf_l is None and tf_r is None:
+                continue
+            tf_l = np.array([np.nan if v is None else v for v in (tf_l if tf_l is not None else _constant(n, None))], dtype=float)
+            tf_r = np.array([np.nan if v is None else v for v in (tf_r if tf_r is not None else _constant(n, None))], dtype=float)
+            divisor = np.fmax(tf_l, tf_r)
+            if minimum_u:
+                divisor = np.fmax(divisor, minimum_u)
+            rows = (gamma == value) & ~np.isnan(divisor)
+            tf_bayes_factors[rows] = (u_exact / divisor[rows]) ** weight
+        return tf_bayes_factors
+
+    def score_columns(self, env, n):
+        """
+        Score n pairs given as <column>_l / <column>_r object arrays.
+
+        Args:
+            env: Mapping of side-suffixed column names to arrays of length n
+            n: Number of pairs
+
+        Returns:
+            Dictionary of output column name to array of length n
+        """
+        output = {}
+        bayes_factor_terms = []
+        for comparison in self.comparisons:
+            gamma = np.full(n, comparison['else_value'], dtype=np.int64)
+            remaining = np.arange(n)
+            for value, predicate in comparison['predicates']:
+                if len(remaining) == 0:
+                    break
+                # Like SQL CASE, only evaluate a level on rows no earlier level matched
+                remaining_env = {key: array[remaining] for key, array in env.items()}
+                hits = _truth_codes(predicate(remaining_env, len(remaining))) == 1.0
+                gamma[remaining[hits]] = value
+                remaining = remaining[~hits]
+
+            name = comparison['name']
+            bayes_factors = comparison['bayes_factor_lookup'][gamma + 1]
+            output[f'{self.gamma_prefix}{name}'] = gamma
+            output[f'{self.bf_prefix}{name}'] = bayes_factors
+            bayes_factor_terms.append(bayes_factors)
+            if comparison['has_tf']:
+                tf_bayes_factors = self._tf_bayes_factors(comparison, gamma, env, n)
+                output[f'{self.bf_prefix}tf_adj_{name}'] = tf_bayes_factors
+                bayes_factor_terms.append(tf_bayes_factors)
+
+        # Multiply in the same order as the SQL so results match bit for bit
+        combined = np.full(n, self.prior_bayes_factor)
+        for term in bayes_factor_terms:
+            combined = combined * term
+        any_infinite = np.zeros(n, dtype=bool)
+        for term in bayes_factor_terms:
+            any_infinite |= np.isinf(term)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            output['match_weight'] = np.log2(combined)
+            output['match_probability'] = np.where(any_infinite, 1.0, combined / (1 + combined))
+        return output
+
+    def score_records(self, left_records, right_records):
+        """
+        Score aligned lists of left and right records.
+
+        Records are coerced to the model's RecordSchema column by column, so
+        values are never type-inferred per pair.
+
+        Args:
+            left_records: List of left record dictionaries
+            right_records: List of right record dictionaries, same length
+
+        Returns:
+            List of prediction rows as dictionaries
+        """
+        if not self.supported:
+            return self._fallback_records(left_records, right_records)
+
+        n = len(left_records)
+        env = {}
+        for side, records in (('l', left_records), ('r', right_records)):
+            for column, values in self.schema.columns_from_records(records).items():
+                env[f'{column}_{side}'] = _object_array(values, n)
+
+        try:
+            scores = self.score_columns(env, n)
+        except Exception:
+            # Values the translated predicates cannot handle (e.g. mismatched
+            # types) are left to DuckDB, which raises its own error if invalid
+            return self._fallback_records(left_records, right_records)
+        score_lists = {
+            column: [None if isinstance(value, float) and math.isnan(value) else value for value in array.tolist()]
+            for column, array in scores.items()
+        }
+
+        rows = []
+        for i in range(n):
+            row = {'match_weight': score_lists['match_weight'][i], 'match_probability': score_lists['match_probability'][i]}
+            for column in self.columns:
+                row[f'{column}_l'] = env[f'{column}_l'][i]
+                row[f'{column}_r'] = env[f'{column}_r'][i]
+            for column, values in score_lists.items():
+                if column not in row:
+                    row[column] = values[i]
+            rows.append(row)
+        return rows
+
+    def compare_records(self, left_record, right_record):
+        """Score a single pair of records, returning a prediction row dictionary"""
+        return self.score_records([left_record], [right_record])[0]
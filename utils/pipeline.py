@@ -0,0 +1,103 @@
+import ast
+from typing import Any, Dict, List
+
+from utils.splink_utils import prediction_row_to_waterfall_format
+
+
+def convert_to_json(data: Any) -> Any:
+    """
+    Recursively convert data to JSON-serializable format.
+
+    Args:
+        data: Any data type to convert
+
+    Returns:
+        JSON-serializable version of the data
+    """
+    if isinstance(data, dict):
+        return {k: convert_to_json(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [convert_to_json(item) for item in data]
+    elif isinstance(data, (str, int, float, bool)):
+        return data
+    elif data is None:
+        return None
+    else:
+        try:
+            return str(data)
+        except Exception:
+            return None
+
+
+def normalize_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ensure 'additional_columns_to_retain' is converted from a string
+    representation of a list into an actual Python list.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        Normalized configuration dictionary
+
+    Raises:
+        ValueError: If additional_columns_to_retain has invalid format
+    """
+    if isinstance(config.get("additional_columns_to_retain"), str):
+        try:
+            config["additional_columns_to_retain"] = ast.literal_eval(config["additional_columns_to_retain"])
+        except (ValueError, SyntaxError):
+            raise ValueError("Invalid format for 'additional_columns_to_retain'")
+    return config
+
+
+def normalize_model_json(model_json: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn the raw linker JSON of a registry model into the normalized linker JSON.
+
+    Args:
+        model_json: Linker JSON held by the MLflow python model
+
+    Returns:
+        Normalized linker JSON
+    """
+    return normalize_config(convert_to_json(model_json))
+
+
+def score_pair(comparison_engine, left_record: Dict[str, Any], right_record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score a pair of records and build the waterfall of its match weight.
+
+    Args:
+        comparison_engine: Comparison engine of the model
+        left_record: First record to compare
+        right_record: Second record to compare
+
+    Returns:
+        Dictionary with match_weight, match_probability, the prediction row and waterfall
+    """
+    return score_pairs(comparison_engine, [left_record], [right_record])[0]
+
+
+def score_pairs(comparison_engine, left_records: List[Dict[str, Any]], right_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Score aligned lists of record pairs and build the waterfall of each.
+
+    Args:
+        comparison_engine: Comparison engine of the model
+        left_records: First records to compare
+        right_records: Second records to compare, same length
+
+    Returns:
+        List of dictionaries as returned by score_pair
+    """
+    prediction_rows = comparison_engine.compare_many(left_records, right_records)
+    return [
+        {
+            'match_weight': row['match_weight'],
+            'match_probability': row['match_probability'],
+            'prediction': row,
+            'waterfall': prediction_row_to_waterfall_format(row)
+        }
+        for row in prediction_rows
+    ]
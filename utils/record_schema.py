@@ -0,0 +1,314 @@
+import ast
+import math
+
+import pyarrow as pa
+
+from utils.numpy_scorer import UnsupportedConditionError, _Parser
+from utils.scoring_sql import SIDE_COLUMN_PATTERN, _prefixes, model_record_columns
+
+LIST_COLUMN_SUFFIX = '_list'
+
+TEXT_TYPE = 'VARCHAR'
+TEXT_LIST_TYPE = 'VARCHAR[]'
+NUMBER_TYPE = 'DOUBLE'
+
+ARROW_TYPES = {
+    TEXT_TYPE: pa.string(),
+    TEXT_LIST_TYPE: pa.list_(pa.string()),
+    NUMBER_TYPE: pa.float64(),
+}
+
+# Argument positions that functions in comparison SQL read as lists
+LIST_ARGUMENTS = {
+    'list_has_any': (0, 1), 'array_has_any': (0, 1),
+    'list_has_all': (0, 1), 'array_has_all': (0, 1),
+    'list_intersect': (0, 1), 'array_intersect': (0, 1),
+    'list_contains': (0,), 'array_contains': (0,),
+    'list_transform': (0,), 'array_transform': (0,),
+    'list_filter': (0,), 'array_filter': (0,),
+    'list_min': (0,), 'list_max': (0,),
+    'flatten': (0,), 'array_length': (0,),
+}
+# ...and as text; list_contains' second argument is a list element
+TEXT_ARGUMENTS = {
+    'damerau_levenshtein': (0, 1), 'levenshtein': (0, 1),
+    'jaro_similarity': (0, 1), 'jaro_winkler_similarity': (0, 1), 'jaccard': (0, 1),
+    'lower': (0,), 'upper': (0,), 'left': (0,), 'right': (0,),
+    'strlen': (0,), 'substr': (0,), 'substring': (0,), 'starts_with': (0, 1),
+    'list_contains': (1,), 'array_contains': (1,),
+}
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return str(value)
+
+
+def _text_list(value):
+    """
+    List of non-empty strings. Text is parsed the way the forms and CSV files
+    write lists: "['a', 'b']" or "a, b".
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        parsed = None
+        if text.startswith('[') and text.endswith(']'):
+            try:
+                parsed = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                parsed = None
+        value = parsed if isinstance(parsed, (list, tuple)) else text.split(',')
+    elif not isinstance(value, (list, tuple)):
+        if hasattr(value, 'tolist'):
+            value = value.tolist()
+        else:
+            value = [value]
+    items = []
+    for item in value:
+        item = _text(item)
+        if item is not None:
+            item = item.strip()
+            if item:
+                items.append(item)
+    return items
+
+
+def _number(value):
+    if value is None or isinstance(value, float):
+        return None if value is None or math.isnan(value) else value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+COERCERS = {
+    TEXT_TYPE: _text,
+    TEXT_LIST_TYPE: _text_list,
+    NUMBER_TYPE: _number,
+}
+
+
+def _side_column(name, columns):
+    """Model column of a <column>_l / <column>_r identifier, or None"""
+    match = SIDE_COLUMN_PATTERN.fullmatch(name)
+    if match and match.group(1) in columns:
+        return match.group(1)
+    return None
+
+
+def _collect_evidence(node, columns, evidence, equalities):
+    """Walk a parsed condition, noting how each model column is used"""
+    kind = node[0]
+
+    def column_of(child):
+        return _side_column(child[1], columns) if child[0] == 'column' else None
+
+    def note(child, type_name):
+        column = column_of(child)
+        if column is not None:
+            evidence.setdefault(column, set()).add(type_name)
+
+    if kind == 'call':
+        name, arguments = node[1], node[2]
+        for position in LIST_ARGUMENTS.get(name, ()):
+            if position < len(arguments):
+                note(arguments[position], TEXT_LIST_TYPE)
+        for position in TEXT_ARGUMENTS.get(name, ()):
+            if position < len(arguments):
+                note(arguments[position], TEXT_TYPE)
+        for argument in arguments:
+            _collect_evidence(argument[2] if argument[0] == 'lambda' else argument, columns, evidence, equalities)
+        return
+    if kind == 'index':
+        note(node[1], TEXT_LIST_TYPE)
+    elif kind == 'arithmetic':
+        for child in node[2:]:
+            note(child, TEXT_TYPE if node[1] == '||' else NUMBER_TYPE)
+    elif kind == 'compare':
+        left, right = node[2], node[3]
+        for child, other in ((left, right), (right, left)):
+            if other[0] == 'literal' and isinstance(other[1], str):
+                note(child, TEXT_TYPE)
+            elif other[0] == 'literal' and isinstance(other[1], (int, float)) and not isinstance(other[1], bool):
+                note(child, NUMBER_TYPE)
+        left_column, right_column = column_of(left), column_of(right)
+        if left_column and right_column and left_column != right_column:
+            equalities.append((left_column, right_column))
+
+    for child in node[1:]:
+        if isinstance(child, tuple):
+            _collect_evidence(child, columns, evidence, equalities)
+        elif isinstance(child, list):
+            for item in child:
+                if isinstance(item, tuple):
+                    _collect_evidence(item, columns, evidence, equalities)
+
+
+def infer_column_types(settings):
+    """
+    DuckDB type of each model column, from how the comparison SQL uses it.
+
+    Columns passed to list functions, indexed or named *_list are VARCHAR[];
+    columns used in arithmetic or compared with numbers are DOUBLE; anything
+    else, including columns only compared for equality, is VARCHAR. Columns
+    compared with each other share a type.
+
+    Args:
+        settings: Splink linker configuration
+
+    Returns:
+        Dict of column name to DuckDB type, in model column order
+    """
+    columns = model_record_columns(settings)
+    evidence = {}
+    equalities = []
+    for comparison in settings.get('comparisons', []):
+        for level in comparison['comparison_levels']:
+            condition = level['sql_condition'].strip()
+            if condition.upper() == 'ELSE':
+                continue
+            try:
+                tree = _Parser(condition).parse()
+            except UnsupportedConditionError:
+                continue
+            _collect_evidence(tree, columns, evidence, equalities)
+
+    def resolve(column):
+        found = evidence.get(column, set())
+        if TEXT_LIST_TYPE in found or column.endswith(LIST_COLUMN_SUFFIX):
+            return TEXT_LIST_TYPE
+        if TEXT_TYPE in found:
+            return TEXT_TYPE
+        if NUMBER_TYPE in found:
+            return NUMBER_TYPE
+        return None
+
+    types = {column: resolve(column) for column in columns}
+    changed = True
+    while changed:
+        changed = False
+        for left, right in equalities:
+            if types[left] is None and types[right] is not None:
+                types[left], changed = types[right], True
+            elif types[right] is None and types[left] is not None:
+                types[right], changed = types[left], True
+    return {column: column_type or TEXT_TYPE for column, column_type in types.items()}
+
+
+class RecordSchema:
+    """
+    Typed record layout of a model, derived once from its settings.
+
+    Every path that hands records to a scorer coerces them through the
+    schema, so a column has the same type whether it came from a form, an
+    API request, a CSV or a Parquet file. Scoring therefore never infers
+    types from values, and DuckDB sees one stable input signature.
+
+    Args:
+        column_types: Dict of column name to DuckDB type
+        tf_prefix: Prefix of optional term frequency columns, kept as DOUBLE
+    """
+
+    def __init__(self, column_types, tf_prefix='tf_'):
+        self.column_types = dict(column_types)
+        self.columns = list(self.column_types)
+        self.tf_prefix = tf_prefix
+        self._coercers = [(column, COERCERS[column_type]) for column, column_type in self.column_types.items()]
+        self.arrow_schema = pa.schema([(column, ARROW_TYPES[column_type]) for column, column_type in self.column_types.items()])
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(infer_column_types(settings), tf_prefix=_prefixes(settings)[2])
+
+    def column_type(self, column):
+        return self.column_types.get(column, TEXT_TYPE)
+
+    def coerce_value(self, column, value):
+        """Value converted to the column's type; None if it cannot be"""
+        return COERCERS[self.column_type(column)](value)
+
+    def parse_text(self, column, text):
+        """Value typed into a form field; empty input is NULL"""
+        text = (text or '').strip()
+        return self.coerce_value(column, text) if text else None
+
+    def _tf_columns(self, records):
+        columns = []
+        for record in records:
+            for key in record:
+                if key.startswith(self.tf_prefix) and key not in columns and key not in self.column_types:
+                    columns.append(key)
+        return columns
+
+    def coerce(self, record):
+        """Record with exactly the model's columns, each of its declared type"""
+        coerced = {column: coerce(record.get(column)) for column, coerce in self._coercers}
+        for column in self._tf_columns([record]):
+            coerced[column] = _number(record[column])
+        return coerced
+
+    def columns_from_records(self, records):
+        """
+        Typed column-wise values of a list of records.
+
+        Returns:
+            Dict of column name to list of values, model columns first, then
+            any term frequency columns the records carry
+        """
+        values = {column: [coerce(record.get(column)) for record in records] for column, coerce in self._coercers}
+        for column in self._tf_columns(records):
+            values[column] = [_number(record.get(column)) for record in records]
+        return values
+
+    def to_arrow(self, records):
+        """Records as an Arrow table with the schema's column types"""
+        columns = self.columns_from_records(records)
+        fields = list(self.arrow_schema) + [
+            pa.field(column, pa.float64()) for column in columns if column not in self.column_types
+        ]
+        return pa.Table.from_pydict(columns, schema=pa.schema(fields))
+
+    def pairs_to_arrow(self, left_records, right_records):
+        """
+        Aligned record pairs as one Arrow table of <column>_l / <column>_r
+        model columns, the input layout of the scoring SQL.
+        """
+        arrays = []
+        fields = []
+        for side, records in (('l', left_records), ('r', right_records)):
+            values = self.columns_from_records(records)
+            for field in self.arrow_schema:
+                arrays.append(pa.array(values[field.name], type=field.type))
+                fields.append(pa.field(f'{field.name}_{side}', field.type))
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+    def cast_sql(self, column, column_sql, source_type):
+        """
+        SQL casting a column of source_type to the column's schema type.
+
+        Lists stored as text ("['a', 'b']" or "a, b", e.g. from CSV) are
+        parsed, and empty or NULL items are dropped like coerce() does.
+        """
+        target_type = self.column_type(column)
+        if target_type != TEXT_LIST_TYPE:
+            return f"TRY_CAST({column_sql} AS {target_type})"
+        if source_type.endswith('[]'):
+            list_sql = f"CAST({column_sql} AS VARCHAR[])"
+        else:
+            text_sql = f"trim(CAST({column_sql} AS VARCHAR))"
+            list_sql = (
+                f"CASE WHEN {text_sql} = '' THEN NULL "
+                f"WHEN {text_sql} LIKE '[%' THEN TRY_CAST({text_sql} AS VARCHAR[]) "
+                f"ELSE string_split({text_sql}, ',') END"
+            )
+        return f"list_filter(list_transform({list_sql}, item -> trim(item)), item -> item IS NOT NULL AND item <> '')"
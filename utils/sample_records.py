@@ -0,0 +1,53 @@
+# Hardcoded values for specific model URI
+HARDCODED_RECORD_VALUES = {
+    'left': {
+        "salt_key": 1,
+        "unique_id": 1,
+        "mapped_contact_id": 1,
+        "infogroup_id": 1,
+        "id": 1,
+        "first_lower": "walter",
+        "last_lower": "white",
+        "nicknames": "['walt']",
+        "phone_list": "['1012412351']",
+        "email_cleaned": "walterwhite@gmail.com",
+        "business_name_list": "['dax']",
+        "in_business": "yes",
+        "address_standardized_street_no": 121,
+        "address_standardized_street": "lincolnrd",
+        "address_standardized_pre_directional": "N",
+        "address_standardized_post_directional": "E",
+        "address_standardized_occupancy_type": "rent",
+        "address_standardized_occupancy_identifier": 221,
+        "address_standardized_place": "pune",
+        "state_cleaned": "maharashtra",
+        "address_standardized_state": "maharashtra",
+        "address_standardized_zip_code": 411030,
+        "address_standardized": "121lincolnpunemaharashtra"
+    },
+    'right': {
+        "salt_key": 2,
+        "unique_id": 2,
+        "mapped_contact_id": 2,
+        "infogroup_id": 2,
+        "id": 2,
+        "first_lower": "walter",
+        "last_lower": "white",
+        "nicknames": "['walt']",
+        "phone_list": "['1012412351']",
+        "email_cleaned": "walterwhite@gmail.com",
+        "business_name_list": "['dax']",
+        "in_business": "yes",
+        "address_standardized_street_no": 121,
+        "address_standardized_street": "lincolnrd",
+        "address_standardized_pre_directional": "N",
+        "address_standardized_post_directional": "E",
+        "address_standardized_occupancy_type": "rent",
+        "address_standardized_occupancy_identifier": 221,
+        "address_standardized_place": "pune",
+        "state_cleaned": "maharashtra",
+        "address_standardized_state": "maharashtra",
+        "address_standardized_zip_code": 411030,
+        "address_standardized": "121lincolnpunemaharashtra"
+    }
+}
@@ -0,0 +1,317 @@
+import re
+
+from utils.splink_utils import prob_to_bayes_factor
+
+# Matches "<column>_l" / "<column>_r" identifiers, quoted or not, in comparison SQL
+SIDE_COLUMN_PATTERN = re.compile(r'"?\b([A-Za-z_][A-Za-z0-9_]*?)_([lr])\b"?')
+
+INFINITY_EXPRESSION = "'infinity'"
+
+# Splink's handling of levels without trained m/u probabilities
+DEFAULT_EXACT_MATCH_M_PROBABILITY = 0.95
+LEVEL_NOT_OBSERVED_TEXT = 'level not observed in training dataset'
+LEVEL_NOT_OBSERVED_PROBABILITY = 1e-6
+
+
+def _prefixes(settings):
+    """Return the gamma, bf and tf column prefixes used by the model"""
+    return (
+        settings.get('comparison_vector_value_column_prefix', 'gamma_'),
+        settings.get('bayes_factor_column_prefix', 'bf_'),
+        settings.get('term_frequency_adjustment_column_prefix', 'tf_'),
+    )
+
+
+def _float_sql(value):
+    """Render a Python float as a DuckDB float8 literal"""
+    return f"cast({value!r} as float8)"
+
+
+def level_comparison_vector_values(comparison):
+    """Return the gamma value Splink assigns to each comparison level, in level order"""
+    levels = comparison['comparison_levels']
+    non_null_count = sum(1 for level in levels if not level.get('is_null_level'))
+    values = []
+    next_value = non_null_count - 1
+    for level in levels:
+        if level.get('is_null_level'):
+            values.append(-1)
+        else:
+            values.append(next_value)
+            next_value -= 1
+    return values
+
+
+def _default_m_u_values(num_levels):
+    """Splink's default m and u probabilities for levels without trained values"""
+    split_remainder = (1 - DEFAULT_EXACT_MATCH_M_PROBABILITY) / (num_levels - 1)
+    m_values = [split_remainder] * (num_levels - 1) + [DEFAULT_EXACT_MATCH_M_PROBABILITY]
+    if num_levels == 2:
+        match_weights = [-5]
+    else:
+        step = 8 / (num_levels - 2)
+        match_weights = [-5 + i * step for i in range(num_levels - 1)]
+    match_weights = match_weights + [10]
+    u_values = [m / (2 ** w) for m, w in zip(m_values, match_weights)]
+    return m_values, u_values
+
+
+def _resolve_probability(value, default):
+    if value == LEVEL_NOT_OBSERVED_TEXT:
+        return LEVEL_NOT_OBSERVED_PROBABILITY
+    if value is None:
+        return default
+    return value
+
+
+def level_m_u_probabilities(comparison):
+    """
+    Return the (m, u) probabilities of each comparison level, in level order.
+
+    Null levels get None. Untrained levels fall back to Splink's defaults.
+    """
+    levels = comparison['comparison_levels']
+    values = level_comparison_vector_values(comparison)
+    num_levels = sum(1 for value in values if value != -1)
+    default_m, default_u = _default_m_u_values(num_levels) if num_levels > 1 else ([None], [None])
+    probabilities = []
+    for level, value in zip(levels, values):
+        if value == -1:
+            probabilities.append(None)
+            continue
+        probabilities.append((
+            _resolve_probability(level.get('m_probability'), default_m[value]),
+            _resolve_probability(level.get('u_probability'), default_u[value]),
+        ))
+    return probabilities
+
+
+def level_bayes_factors(comparison):
+    """Return the Bayes factor of each comparison level (None when untrained)"""
+    bayes_factors = []
+    for m_u in level_m_u_probabilities(comparison):
+        if m_u is None:
+            bayes_factors.append(1.0)
+            continue
+        m_probability, u_probability = m_u
+        if m_probability is None or u_probability is None:
+            bayes_factors.append(None)
+        elif u_probability == 0:
+            bayes_factors.append(float('inf'))
+        else:
+            bayes_factors.append(m_probability / u_probability)
+    return bayes_factors
+
+
+def comparison_input_columns(settings):
+    """
+    Return the input columns referenced by the model's comparison levels.
+
+    Columns are returned without their _l/_r suffix, in order of first use.
+    """
+    columns = []
+    for comparison in settings.get('comparisons', []):
+        for level in comparison['comparison_levels']:
+            for column, _ in SIDE_COLUMN_PATTERN.findall(level['sql_condition']):
+                if column not in columns:
+                    columns.append(column)
+    return columns
+
+
+def model_record_columns(settings):
+    """Return the comparison input columns followed by any other retained columns"""
+    columns = comparison_input_columns(settings)
+    for column in settings.get('additional_columns_to_retain') or []:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def tf_adjustment_columns(settings):
+    """Return the columns that carry term frequency adjustments, in order of first use"""
+    columns = []
+    for comparison in settings.get('comparisons', []):
+        for level in comparison['comparison_levels']:
+            column = level.get('tf_adjustment_column')
+            if column and column not in columns:
+                columns.append(column)
+    return columns
+
+
+def gamma_expression(comparison):
+    """Build the CASE expression computing the comparison vector value of a comparison"""
+    whens = []
+    else_value = 0
+    levels = comparison['comparison_levels']
+    for level, value in zip(levels, level_comparison_vector_values(comparison)):
+        condition = level['sql_condition'].strip()
+        if condition.upper() == 'ELSE':
+            else_value = value
+        else:
+            whens.append(f"WHEN {condition} THEN {value}")
+    return f"CASE {' '.join(whens)} ELSE {else_value} END"
+
+
+def bayes_factor_expression(comparison, gamma_column):
+    """Build the CASE expression mapping a gamma column to its Bayes factor"""
+    whens = []
+    values = level_comparison_vector_values(comparison)
+    for value, bayes_factor in zip(values, level_bayes_factors(comparison)):
+        if bayes_factor is None:
+            bayes_factor_sql = "cast(NULL as float8)"
+        elif bayes_factor == float('inf'):
+            bayes_factor_sql = f"cast({INFINITY_EXPRESSION} as float8)"
+        else:
+            bayes_factor_sql = _float_sql(bayes_factor)
+        whens.append(f"WHEN {gamma_column} = {value} THEN {bayes_factor_sql}")
+    return f"CASE {' '.join(whens)} END"
+
+
+def _exact_match_u_probability(comparison, tf_column):
+    """Return the u probability of the exact match level on tf_column"""
+    exact_pattern = re.compile(
+        rf'^\(?\s*"?{re.escape(tf_column)}_l"?\s*=\s*"?{re.escape(tf_column)}_r"?\s*\)?$'
+    )
+    levels = comparison['comparison_levels']
+    for level, m_u in zip(levels, level_m_u_probabilities(comparison)):
+        if m_u is not None and exact_pattern.match(level['sql_condition'].strip()):
+            return m_u[1]
+    raise ValueError(
+        f"Could not find an exact match level for {tf_column}. An exact match level "
+        "is required to make a term frequency adjustment."
+    )
+
+
+def tf_adjustment_expression(comparison, gamma_column, tf_prefix):
+    """
+    Build the CASE expression computing the term frequency Bayes factor of a comparison.
+
+    Returns None when no level of the comparison has a term frequency adjustment.
+    """
+    levels = comparison['comparison_levels']
+    if not any(level.get('tf_adjustment_column') for level in levels):
+        return None
+
+    whens = []
+    for level, value in zip(levels, level_comparison_vector_values(comparison)):
+        tf_column = level.get('tf_adjustment_column')
+        weight = level.get('tf_adjustment_weight', 1.0)
+        is_else_level = level['sql_condition'].strip().upper() == 'ELSE'
+        if value == -1 or not tf_column or weight == 0 or is_else_level:
+            whens.append(f"WHEN {gamma_column} = {value} THEN cast(1 as float8)")
+            continue
+
+        tf_l = f'"{tf_prefix}{tf_column}_l"'
+        tf_r = f'"{tf_prefix}{tf_column}_r"'
+        coalesce_l_r = f"coalesce({tf_l}, {tf_r})"
+        coalesce_r_l = f"coalesce({tf_r}, {tf_l})"
+        minimum_u = float(level.get('tf_minimum_u_value', 0.0))
+        if minimum_u == 0.0:
+            divisor = f"(CASE WHEN {coalesce_l_r} >= {coalesce_r_l} THEN {coalesce_l_r} ELSE {coalesce_r_l} END)"
+        else:
+            divisor = (
+                f"(CASE WHEN {coalesce_l_r} >= {coalesce_r_l} AND {coalesce_l_r} > {_float_sql(minimum_u)} "
+                f"THEN {coalesce_l_r} WHEN {coalesce_r_l} > {_float_sql(minimum_u)} THEN {coalesce_r_l} "
+                f"ELSE {_float_sql(minimum_u)} END)"
+            )
+        u_exact = _exact_match_u_probability(comparison, tf_column)
+        whens.append(
+            f"WHEN {gamma_column} = {value} THEN (CASE WHEN {coalesce_l_r} IS NOT NULL "
+            f"THEN POW({_float_sql(u_exact)} / {divisor}, {_float_sql(float(weight))}) "
+            f"ELSE cast(1 as float8) END)"
+        )
+    return f"CASE {' '.join(whens)} END"
+
+
+def null_tf_columns_sql(settings):
+    """Select list adding NULL term frequency columns for inputs without a tf lookup"""
+    _, _, tf_prefix = _prefixes(settings)
+    return ', '.join(
+        f'cast(NULL as float8) AS "{tf_prefix}{column}_{side}"'
+        for column in tf_adjustment_columns(settings)
+        for side in ('l', 'r')
+    )
+
+
+def build_scoring_sql(settings, input_relation, tf_columns_provided=False):
+    """
+    Generate a single statement scoring every row of input_relation.
+
+    input_relation must expose each comparison input column as <column>_l and
+    <column>_r. The output has one row per input row with the input columns,
+    gamma_/bf_/bf_tf_adj_ columns, match_weight and match_probability, matching
+    the prediction rows Splink produces for compare_two_records.
+
+    Args:
+        settings: Splink linker configuration
+        input_relation: Table name or parenthesised subquery holding the pairs
+        tf_columns_provided: Whether input_relation already has tf_<column>_l/_r columns
+
+    Returns:
+        SQL string
+    """
+    gamma_prefix, bf_prefix, tf_prefix = _prefixes(settings)
+
+    input_select = '*'
+    if not tf_columns_provided and tf_adjustment_columns(settings):
+        input_select = f"*, {null_tf_columns_sql(settings)}"
+
+    gamma_selects = []
+    bf_selects = []
+    bf_terms = []
+    for comparison in settings.get('comparisons', []):
+        name = comparison['output_column_name']
+        gamma_column = f'"{gamma_prefix}{name}"'
+        gamma_selects.append(f"{gamma_expression(comparison)} AS {gamma_column}")
+
+        bf_column = f'"{bf_prefix}{name}"'
+        bf_selects.append(f"{bayes_factor_expression(comparison, gamma_column)} AS {bf_column}")
+        bf_terms.append(bf_column)
+
+        tf_expression = tf_adjustment_expression(comparison, gamma_column, tf_prefix)
+        if tf_expression is not None:
+            tf_bf_column = f'"{bf_prefix}tf_adj_{name}"'
+            bf_selects.append(f"{tf_expression} AS {tf_bf_column}")
+            bf_terms.append(tf_bf_column)
+
+    prior = settings['probability_two_random_records_match']
+    if prior == 1.0:
+        bayes_factor_sql = f"cast({INFINITY_EXPRESSION} as float8)"
+        match_probability_sql = '1.0'
+    else:
+        bayes_factor_sql = ' * '.join([_float_sql(prob_to_bayes_factor(prior))] + bf_terms)
+        any_infinite = ' OR '.join(f"{term} = {INFINITY_EXPRESSION}" for term in bf_terms) or 'false'
+        match_probability_sql = (
+            f"CASE WHEN {any_infinite} THEN 1.0 "
+            f"ELSE ({bayes_factor_sql}) / (1 + ({bayes_factor_sql})) END"
+        )
+
+    return f"""
+    WITH __splink__df_input AS (
+        SELECT {input_select} FROM {input_relation}
+    ),
+    __splink__df_comparison_vectors AS (
+        SELECT *, {', '.join(gamma_selects)} FROM __splink__df_input
+    ),
+    __splink__df_match_weight_parts AS (
+        SELECT *, {', '.join(bf_selects)} FROM __splink__df_comparison_vectors
+    )
+    SELECT
+        log2({bayes_factor_sql}) AS match_weight,
+        {match_probability_sql} AS match_probability,
+        *
+    FROM __splink__df_match_weight_parts
+    """
+
+
+def score_columns(settings):
+    """Return the gamma/bf/bf_tf_adj columns produced by build_scoring_sql, in order"""
+    gamma_prefix, bf_prefix, _ = _prefixes(settings)
+    columns = []
+    for comparison in settings.get('comparisons', []):
+        name = comparison['output_column_name']
+        columns.append(f'{gamma_prefix}{name}')
+        columns.append(f'{bf_prefix}{name}')
+        if any(level.get('tf_adjustment_column') for level in comparison['comparison_levels']):
+            columns.append(f'{bf_prefix}tf_adj_{name}')
+    return columns
@@ -0,0 +1,98 @@
+import pandas as pd
+
+from utils.record_schema import NUMBER_TYPE, TEXT_LIST_TYPE
+from utils.scoring_sql import comparison_input_columns
+from utils.telemetry import telemetry
+
+# Variants generated for each field of a pair, in display order
+VARIANT_KINDS = ('null', 'typo', 'swap', 'match')
+VARIANT_LABELS = {
+    'null': 'Both nulled',
+    'typo': 'Typo in Record B',
+    'swap': 'Swapped between records',
+    'match': 'Record B set to Record A',
+}
+
+
+def _typo(value, column_type):
+    """Value with one deterministic typo: two characters transposed, or one appended"""
+    if value is None:
+        return None
+    if column_type == NUMBER_TYPE:
+        return value + 1
+    if column_type == TEXT_LIST_TYPE:
+        return [_typo(value[0], None)] + value[1:] if value else value
+    if len(value) < 2:
+        return value + 'x'
+    position = len(value) // 2
+    return value[:position - 1] + value[position] + value[position - 1] + value[position + 1:]
+
+
+def generate_variants(schema, settings, left_record, right_record):
+    """
+    What-if variants of a pair, one per field and variant kind.
+
+    Variants that leave the pair unchanged (nulling a field that is already
+    null on both sides, matching values that already agree) are skipped.
+
+    Args:
+        schema: RecordSchema of the model
+        settings: Splink linker configuration
+        left_record: First record of the pair
+        right_record: Second record of the pair
+
+    Returns:
+        List of (field, kind, left variant, right variant) tuples
+    """
+    left = schema.coerce(left_record)
+    right = schema.coerce(right_record)
+    variants = []
+    for field in comparison_input_columns(settings):
+        left_value, right_value = left.get(field), right.get(field)
+        changes = {
+            'null': (None, None),
+            'typo': (left_value, _typo(right_value, schema.column_type(field))),
+            'swap': (right_value, left_value),
+            'match': (left_value, left_value),
+        }
+        for kind in VARIANT_KINDS:
+            left_variant, right_variant = changes[kind]
+            if (left_variant, right_variant) == (left_value, right_value):
+                continue
+            variants.append((field, kind, {**left, field: left_variant}, {**right, field: right_variant}))
+    return variants
+
+
+def sensitivity_sweep(comparison_engine, left_record, right_record):
+    """
+    Score every what-if variant of a pair in one batched pass.
+
+    Args:
+        comparison_engine: Comparison engine of the model
+        left_record: First record of the pair
+        right_record: Second record of the pair
+
+    Returns:
+        Tuple of (match weight of the pair as entered, pandas DataFrame with
+        field, variant, match_weight and delta columns, one row per variant)
+    """
+    variants = generate_variants(comparison_engine.schema, comparison_engine.settings, left_record, right_record)
+    left_records = [left_record] + [variant[2] for variant in variants]
+    right_records = [right_record] + [variant[3] for variant in variants]
+    with telemetry.timed('sensitivity_sweep', comparison_engine.model_uri):
+        prediction_rows = comparison_engine.compare_many(left_records, right_records)
+
+    base_weight = prediction_rows[0]['match_weight']
+    sweep = pd.DataFrame(
+        [
+            {
+                'field': field,
+                'variant': VARIANT_LABELS[kind],
+                'match_weight': row['match_weight'],
+                'delta': row['match_weight'] - base_weight,
+            }
+            for (field, kind, _, _), row in zip(variants, prediction_rows[1:])
+        ],
+        columns=['field', 'variant', 'match_weight', 'delta']
+    )
+    return base_weight, sweep
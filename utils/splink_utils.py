@@ -1,5 +1,10 @@
 import math
-from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.diff_engine import diff_values_html
 
 def log2(x):
     return math.log2(x) if x > 0 else 0
@@ -89,24 +94,134 @@ def prediction_row_to_waterfall_format(match_data):
     
     return output_data
 
+def _prediction_column(predictions, column):
+    """Float NumPy array of a pandas or Arrow prediction column, NaN for nulls"""
+    if isinstance(predictions, pd.DataFrame):
+        return predictions[column].to_numpy(dtype=float, na_value=np.nan)
+    return predictions.column(column).to_numpy(zero_copy_only=False).astype(float)
+
+
+# math.log2 as a ufunc: NumPy's SIMD log2 can differ from it in the last bit
+_math_log2 = np.frompyfunc(math.log2, 1, 1)
+
+
+def _log2_array(values):
+    """Vectorized log2 matching log2() above: 0 for non-positive or missing values"""
+    positive = values > 0
+    result = np.zeros(len(values))
+    result[positive] = _math_log2(values[positive]).astype(float)
+    return result
+
+
+def predictions_to_waterfall_format(predictions, include_cumulative=False):
+    """
+    Convert a table of prediction rows to long-format waterfall data in one pass.
+
+    Produces the same bars as prediction_row_to_waterfall_format for every row,
+    with a prediction_index column identifying the row each bar belongs to.
+
+    Args:
+        predictions: pandas DataFrame or pyarrow Table of prediction rows
+        include_cumulative: Add the running match weight of each bar
+
+    Returns:
+        pandas DataFrame with one row per bar per prediction
+    """
+    column_names = list(predictions.columns) if isinstance(predictions, pd.DataFrame) else predictions.column_names
+    n = len(predictions) if isinstance(predictions, pd.DataFrame) else predictions.num_rows
+    available = set(column_names)
+
+    match_weight = _prediction_column(predictions, 'match_weight') if 'match_weight' in available else np.zeros(n)
+
+    # Multiply the Bayes factors column by column in the row's key order, skipping nulls
+    product = np.ones(n)
+    for column in column_names:
+        if column.startswith('bf_'):
+            values = _prediction_column(predictions, column)
+            product = np.where(np.isnan(values), product, product * values)
+    prior_match_weight = match_weight - _log2_array(product)
+
+    names = ['Prior']
+    labels = ['Starting match weight (prior)']
+    tf_flags = [None]
+    log2_columns = [prior_match_weight]
+    bayes_factor_columns = [np.float_power(2.0, prior_match_weight)]
+    vector_columns = [np.full(n, None, dtype=object)]
+
+    for key in sorted(column for column in column_names if column.startswith('gamma_')):
+        col_name = key[6:]
+        gamma = _prediction_column(predictions, key)
+        missing = np.isnan(gamma)
+        gamma_values = np.where(missing, 0, gamma).astype(np.int64).astype(object)
+        gamma_values[missing] = None
+        for bf_key, name, tf_flag in ((f'bf_{col_name}', col_name, False), (f'bf_tf_adj_{col_name}', f'tf adj on {col_name}', True)):
+            bayes_factors = _prediction_column(predictions, bf_key) if bf_key in available else np.ones(n)
+            names.append(name)
+            labels.append(f'Gamma value for {col_name}')
+            tf_flags.append(tf_flag)
+            log2_columns.append(_log2_array(bayes_factors))
+            bayes_factor_columns.append(bayes_factors)
+            vector_columns.append(gamma_values)
+
+    names.append('Final score')
+    labels.append('Final score')
+    tf_flags.append(None)
+    log2_columns.append(match_weight)
+    bayes_factor_columns.append(np.float_power(2.0, match_weight))
+    vector_columns.append(np.full(n, None, dtype=object))
+
+    num_bars = len(names)
+    log2_bayes_factors = np.column_stack(log2_columns)
+    waterfall = pd.DataFrame({
+        'prediction_index': np.repeat(np.arange(n), num_bars),
+        'column_name': np.tile(np.array(names, dtype=object), n),
+        'label_for_charts': np.tile(np.array(labels, dtype=object), n),
+        'log2_bayes_factor': log2_bayes_factors.ravel(),
+        'bayes_factor': np.column_stack(bayes_factor_columns).ravel(),
+        'comparison_vector_value': np.column_stack(vector_columns).ravel(),
+        'term_frequency_adjustment': np.tile(np.array(tf_flags, dtype=object), n),
+        'bar_sort_order': np.tile(np.arange(num_bars), n),
+    })
+
+    if include_cumulative:
+        # Contributions stack up from the prior, the final bar starts from zero
+        cumulative = np.cumsum(log2_bayes_factors, axis=1)
+        cumulative[:, -1] = match_weight
+        waterfall['cumulative_log2_bayes_factor'] = cumulative.ravel()
+
+    return waterfall
+
+def prediction_rows_to_arrow(prediction_rows):
+    """
+    Score columns of prediction rows as an Arrow table.
+
+    Only the columns the waterfall is built from are kept (match_weight,
+    match_probability, gamma_ and bf_ columns); record values are left out.
+    """
+    columns = []
+    for row in prediction_rows:
+        for column in row:
+            if column not in columns and (column in ('match_weight', 'match_probability') or column.startswith(('gamma_', 'bf_'))):
+                columns.append(column)
+    return pa.table({
+        column: pa.array(
+            [row.get(column) for row in prediction_rows],
+            type=pa.int64() if column.startswith('gamma_') else pa.float64()
+        )
+        for column in columns
+    })
+
+
+def prediction_row_to_waterfall_frame(match_data):
+    """
+    Waterfall of a prediction row as a columnar DataFrame.
+
+    Same bars as prediction_row_to_waterfall_format, built column-wise by
+    predictions_to_waterfall_format instead of row by row.
+    """
+    waterfall = predictions_to_waterfall_format(prediction_rows_to_arrow([match_data]))
+    return waterfall.drop(columns='prediction_index')
+
 def generate_diff_html(left_val, right_val):
     """Generate HTML diff between two values"""
-    if left_val == right_val:
-        return str(left_val)
-    
-    # Simple diff using SequenceMatcher
-    matcher = SequenceMatcher(None, str(left_val), str(right_val))
-    diff_html = ""
-    
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        if tag == 'equal':
-            diff_html += str(left_val)[i1:i2]
-        elif tag == 'delete':
-            diff_html += f'<span style="background-color: #ffcccc; text-decoration: line-through;">{str(left_val)[i1:i2]}</span>'
-        elif tag == 'insert':
-            diff_html += f'<span style="background-color: #ccffcc;">{str(right_val)[j1:j2]}</span>'
-        elif tag == 'replace':
-            diff_html += f'<span style="background-color: #ffcccc; text-decoration: line-through;">{str(left_val)[i1:i2]}</span>'
-            diff_html += f'<span style="background-color: #ccffcc;">{str(right_val)[j1:j2]}</span>'
-    
-    return diff_html
\ No newline at end of file
+    return diff_values_html(left_val, right_val)
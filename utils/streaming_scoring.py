@@ -0,0 +1,149 @@
+import os
+import time
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from utils.batch_scoring import PAIR_INDEX_COLUMN, pairs_source_sql, score_pairs
+from utils.record_schema import RecordSchema
+from utils.telemetry import telemetry
+
+# Environment variables configuring streaming scoring
+STREAM_CHUNK_ROWS_ENV = 'MATCHAI_STREAM_CHUNK_ROWS'
+STREAM_MEMORY_LIMIT_ENV = 'MATCHAI_STREAM_MEMORY_LIMIT'
+STREAM_TEMP_DIR_ENV = 'MATCHAI_STREAM_TEMP_DIR'
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_MEMORY_LIMIT = '1GB'
+DEFAULT_TEMP_DIR = os.path.join('~', '.cache', 'matchai', 'spill')
+
+PARTIAL_OUTPUT_SUFFIX = '.partial'
+PARQUET_MAGIC = b'PAR1'
+
+
+def _is_parquet_file(path):
+    """Whether a file starts with the Parquet magic bytes"""
+    with open(path, 'rb') as file:
+        return file.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC
+
+
+class StreamingScorer:
+    """
+    Scores pair files larger than memory, chunk by chunk.
+
+    The source is scanned by DuckDB's Parquet/CSV readers and fetched in
+    record batches of chunk_rows pairs. Each batch is scored with
+    score_pairs on a connection capped at memory_limit, which spills to
+    temp_directory beyond it, and appended to the output Parquet file. Only
+    one chunk of pairs and scores is held in memory at a time.
+
+    Args:
+        chunk_rows: Pairs scored per chunk
+        memory_limit: DuckDB memory limit, e.g. '1GB'
+        temp_directory: Directory DuckDB spills to
+    """
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS, memory_limit=DEFAULT_MEMORY_LIMIT, temp_directory=DEFAULT_TEMP_DIR):
+        self.chunk_rows = chunk_rows
+        self.memory_limit = memory_limit
+        self.temp_directory = os.path.expanduser(temp_directory)
+
+    @classmethod
+    def from_env(cls):
+        """Scorer configured by MATCHAI_STREAM_CHUNK_ROWS, _MEMORY_LIMIT and _TEMP_DIR"""
+        return cls(
+            chunk_rows=int(os.environ.get(STREAM_CHUNK_ROWS_ENV, DEFAULT_CHUNK_ROWS)),
+            memory_limit=os.environ.get(STREAM_MEMORY_LIMIT_ENV) or DEFAULT_MEMORY_LIMIT,
+            temp_directory=os.environ.get(STREAM_TEMP_DIR_ENV) or DEFAULT_TEMP_DIR,
+        )
+
+    def _connect(self):
+        os.makedirs(self.temp_directory, exist_ok=True)
+        return duckdb.connect(config={
+            'memory_limit': self.memory_limit,
+            'temp_directory': self.temp_directory,
+        })
+
+    def count_pairs(self, source_path):
+        """Number of pairs in a Parquet file from its metadata, or None for CSV"""
+        if not source_path.lower().endswith('.parquet'):
+            return None
+        quoted_path = source_path.replace("'", "''")
+        with self._connect() as conn:
+            return conn.execute(f"SELECT sum(num_rows) FROM parquet_file_metadata('{quoted_path}')").fetchone()[0]
+
+    def score_file(self, source_path, output_path, linker_json, term_frequencies=None, on_chunk=None, schema=None):
+        """
+        Score every pair of a Parquet or CSV file into a Parquet file.
+
+        Scores are written to <output_path>.partial as they are produced and
+        moved to output_path once the whole file is scored, so output_path
+        only ever holds a complete result. An existing output_path is only
+        replaced if it is a Parquet file.
+
+        Args:
+            source_path: Parquet or CSV file with _l/_r columns
+            output_path: Parquet file the scores are written to
+            linker_json: Splink linker configuration
+            term_frequencies: Optional TermFrequencyStore joined for tf adjustments
+            on_chunk: Optional callable receiving (pairs scored so far, total
+                pairs or None, scores of the last chunk as a pyarrow.Table)
+            schema: Optional RecordSchema of the model, derived from linker_json once otherwise
+
+        Returns:
+            Dict with output_path, pair_count and seconds
+
+        Raises:
+            ValueError: If output_path is not a .parquet path or is an existing non-Parquet file
+        """
+        if not output_path.lower().endswith('.parquet'):
+            raise ValueError(f"Output must be a .parquet file: {output_path}")
+        if os.path.lexists(output_path) and not (os.path.isfile(output_path) and _is_parquet_file(output_path)):
+            raise ValueError(f"Refusing to overwrite {output_path}, which is not a Parquet file")
+        if schema is None:
+            schema = RecordSchema.from_settings(linker_json)
+        total_pairs = self.count_pairs(source_path)
+        partial_path = f'{output_path}{PARTIAL_OUTPUT_SUFFIX}'
+        started = time.perf_counter()
+        pair_count = 0
+        writer = None
+        conn = self._connect()
+        try:
+            # The scan runs on its own cursor, since each chunk's queries on
+            # conn would otherwise close its pending result
+            reader = conn.cursor().execute(
+                f"SELECT * FROM {pairs_source_sql(source_path)}"
+            ).fetch_record_batch(self.chunk_rows)
+            for batch in reader:
+                with telemetry.timed('stream_chunk'):
+                    scores = score_pairs(
+                        pa.Table.from_batches([batch]), linker_json, conn=conn, term_frequencies=term_frequencies, schema=schema
+                    )
+                    index = scores.schema.get_field_index(PAIR_INDEX_COLUMN)
+                    scores = scores.set_column(index, PAIR_INDEX_COLUMN, pc.add(scores.column(index), pair_count))
+                    if writer is None:
+                        writer = pq.ParquetWriter(partial_path, scores.schema)
+                    writer.write_table(scores.cast(writer.schema))
+                pair_count += scores.num_rows
+                telemetry.increment('pairs_streamed', value=scores.num_rows)
+                if on_chunk is not None:
+                    on_chunk(pair_count, total_pairs, scores)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                os.remove(partial_path)
+            raise
+        finally:
+            conn.close()
+
+        if writer is None:
+            raise ValueError(f"No record pairs in {source_path}")
+        writer.close()
+        os.replace(partial_path, output_path)
+        return {
+            'output_path': output_path,
+            'pair_count': pair_count,
+            'seconds': time.perf_counter() - started,
+        }
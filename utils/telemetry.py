@@ -0,0 +1,138 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger('matchai.telemetry')
+
+# Durations kept per (model, stage) for percentiles; older samples are dropped
+SAMPLES_PER_STAGE = 2048
+# Seconds between structured summary log lines
+SUMMARY_LOG_INTERVAL_SECONDS = 60
+PERCENTILES = (50, 90, 99)
+ALL_MODELS = '*'
+
+
+class Telemetry:
+    """
+    Process-wide stage timings and counters, keyed by model URI.
+
+    Recording is a perf_counter difference and a deque append under a lock,
+    cheap enough to leave on. Percentiles are only computed when a snapshot
+    is taken, and a summary is logged as one JSON line per interval.
+    """
+
+    def __init__(self, samples_per_stage=SAMPLES_PER_STAGE, log_interval=SUMMARY_LOG_INTERVAL_SECONDS):
+        self.samples_per_stage = samples_per_stage
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: deque(maxlen=self.samples_per_stage))
+        self._totals = defaultdict(lambda: [0, 0.0, 0])
+        self._counters = defaultdict(int)
+        self._last_log = time.monotonic()
+
+    def record(self, stage, seconds, model_uri=None, error=False):
+        """Record one duration of a stage"""
+        key = (model_uri or ALL_MODELS, stage)
+        with self._lock:
+            self._durations[key].append(seconds)
+            totals = self._totals[key]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += int(error)
+            log_due = time.monotonic() - self._last_log >= self.log_interval
+            if log_due:
+                self._last_log = time.monotonic()
+        if log_due and logger.isEnabledFor(logging.INFO):
+            self.log_summary()
+
+    def increment(self, counter, model_uri=None, value=1):
+        """Increase a counter, e.g. cache hits or fallbacks"""
+        with self._lock:
+            self._counters[(model_uri or ALL_MODELS, counter)] += value
+
+    @contextmanager
+    def timed(self, stage, model_uri=None, timings=None):
+        """
+        Time the enclosed block as one sample of stage.
+
+        Args:
+            stage: Stage name
+            model_uri: Model the work belongs to
+            timings: Optional dict that also receives {stage: seconds}
+        """
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.record(stage, seconds, model_uri, error)
+            if timings is not None:
+                timings[stage] = seconds
+
+    def snapshot(self):
+        """
+        Current statistics.
+
+        Returns:
+            Dict with a 'stages' list (count, errors, mean and percentiles in
+            milliseconds per model and stage) and a 'counters' list
+        """
+        with self._lock:
+            durations = {key: list(values) for key, values in self._durations.items()}
+            totals = {key: list(values) for key, values in self._totals.items()}
+            counters = dict(self._counters)
+
+        stages = []
+        for (model_uri, stage), samples in sorted(durations.items()):
+            count, total_seconds, errors = totals[(model_uri, stage)]
+            values = np.percentile(np.array(samples) * 1000, PERCENTILES) if samples else [None] * len(PERCENTILES)
+            row = {
+                'model_uri': model_uri,
+                'stage': stage,
+                'count': count,
+                'errors': errors,
+                'mean_ms': total_seconds * 1000 / count if count else None,
+            }
+            row.update({f'p{p}_ms': float(v) if v is not None else None for p, v in zip(PERCENTILES, values)})
+            row['max_ms'] = max(samples) * 1000 if samples else None
+            stages.append(row)
+
+        return {
+            'stages': stages,
+            'counters': [
+                {'model_uri': model_uri, 'counter': counter, 'value': value}
+                for (model_uri, counter), value in sorted(counters.items())
+            ],
+        }
+
+    def log_summary(self):
+        """Log the current statistics as a single structured JSON line"""
+        logger.info(json.dumps({'event': 'matchai_telemetry', **self.snapshot()}))
+
+    def reset(self):
+        """Drop all samples and counters"""
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+
+telemetry = Telemetry()
+
+
+def configure_logging(level=logging.INFO):
+    """Emit telemetry summaries to stderr unless the process configured logging itself"""
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
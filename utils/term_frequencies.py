@@ -0,0 +1,224 @@
+import hashlib
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from utils.scoring_sql import _prefixes, tf_adjustment_columns
+from utils.telemetry import telemetry
+
+# Environment variables configuring the term frequency tables
+TF_TABLES_DIR_ENV = 'MATCHAI_TF_TABLES_DIR'
+TF_CACHE_DIR_ENV = 'MATCHAI_TF_CACHE_DIR'
+
+DEFAULT_TF_CACHE_DIR = os.path.join('~', '.cache', 'matchai', 'tf')
+TF_TABLE_SUFFIX = '.parquet'
+TF_CACHE_SUFFIX = '.arrow'
+
+# Lookups of up to this many distinct values bisect the sorted table; larger
+# batches scan it once with is_in
+BISECT_MAX_VALUES = 256
+
+
+class TermFrequencyTable:
+    """
+    Value frequencies of one column, memory-mapped from an Arrow IPC file.
+
+    The file holds one record batch sorted by value, so the columns are
+    zero-copy views of the mapping and a lookup is a binary search. Pages are
+    only read when a search touches them, and are shared through the page
+    cache by every process mapping the same file.
+
+    Args:
+        path: Arrow IPC file written by TermFrequencyStore
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._source = pa.memory_map(path)
+        batch = pa.ipc.open_file(self._source).get_batch(0)
+        self.values = batch.column(0)
+        self.frequencies = batch.column(1)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _bisect(self, value):
+        low, high = 0, len(self.values)
+        while low < high:
+            middle = (low + high) // 2
+            if self.values[middle].as_py() < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.values) and self.values[low].as_py() == value:
+            return self.frequencies[low].as_py()
+        return None
+
+    def lookup(self, value):
+        """Relative frequency of a value, or None if it is null or not in the table"""
+        if value is None:
+            return None
+        try:
+            return self._bisect(value)
+        except TypeError:
+            # A value of another type than the table's is never in it
+            return None
+
+    def lookup_many(self, values):
+        """Relative frequency of each value, None where it is null or not in the table"""
+        distinct = {value for value in values if value is not None}
+        if len(distinct) <= BISECT_MAX_VALUES:
+            found = {value: self.lookup(value) for value in distinct}
+        else:
+            try:
+                value_set = pa.array(list(distinct), type=self.values.type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                return [self.lookup(value) for value in values]
+            mask = pc.is_in(self.values, value_set=value_set)
+            found = dict(zip(
+                pc.filter(self.values, mask).to_pylist(),
+                pc.filter(self.frequencies, mask).to_pylist()
+            ))
+        return [None if value is None else found.get(value) for value in values]
+
+
+class TermFrequencyStore:
+    """
+    Term frequency tables of a model's tf adjustment columns, loaded lazily.
+
+    Each column's table is a Parquet file named <tf prefix><column>.parquet
+    (e.g. tf_first_lower.parquet) in tables_dir, holding the <column> and
+    tf_<column> columns of Splink's term frequency table. On first use it is
+    converted once into a value-sorted Arrow IPC file in cache_dir, which is
+    then memory-mapped, so large tables are neither parsed nor copied into
+    each process's heap.
+
+    Args:
+        tables_dir: Directory of term frequency Parquet files
+        cache_dir: Directory holding the converted Arrow files
+    """
+
+    def __init__(self, tables_dir, cache_dir=DEFAULT_TF_CACHE_DIR):
+        self.tables_dir = os.path.expanduser(tables_dir)
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Store reading MATCHAI_TF_TABLES_DIR, or None when it is not set"""
+        tables_dir = os.environ.get(TF_TABLES_DIR_ENV)
+        if not tables_dir:
+            return None
+        return cls(tables_dir, cache_dir=os.environ.get(TF_CACHE_DIR_ENV) or DEFAULT_TF_CACHE_DIR)
+
+    def fingerprint(self):
+        """Hash of the names, sizes and modification times of the tables, to tell table updates apart"""
+        entries = []
+        if os.path.isdir(self.tables_dir):
+            for file_name in sorted(os.listdir(self.tables_dir)):
+                if file_name.endswith(TF_TABLE_SUFFIX):
+                    stat = os.stat(os.path.join(self.tables_dir, file_name))
+                    entries.append(f'{file_name}:{stat.st_size}:{stat.st_mtime_ns}')
+        return hashlib.sha256('|'.join(entries).encode('utf-8')).hexdigest()
+
+    def _source_path(self, column, tf_prefix):
+        return os.path.join(self.tables_dir, f'{tf_prefix}{column}{TF_TABLE_SUFFIX}')
+
+    def _cache_path(self, source_path):
+        stat = os.stat(source_path)
+        digest = hashlib.sha256(f'{os.path.abspath(source_path)}:{stat.st_size}:{stat.st_mtime_ns}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}{TF_CACHE_SUFFIX}')
+
+    def _convert(self, source_path, cache_path, column, tf_prefix):
+        """Write the sorted value/frequency columns of a Parquet table as an Arrow IPC file"""
+        table = pq.read_table(source_path, columns=[column, f'{tf_prefix}{column}'])
+        table = table.filter(pc.is_valid(table.column(column)))
+        table = table.take(pc.sort_indices(table, sort_keys=[(column, 'ascending')]))
+        table = table.cast(pa.schema([table.schema.field(0), pa.field(f'{tf_prefix}{column}', pa.float64())]))
+        # A single record batch, so the mapped columns are contiguous arrays
+        batch = pa.record_batch([table.column(0).combine_chunks(), table.column(1).combine_chunks()], schema=table.schema)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with pa.OSFile(temp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_batch(batch)
+        os.replace(temp_path, cache_path)
+
+    def table(self, column, tf_prefix='tf_'):
+        """
+        TermFrequencyTable of a column, or None if there is no table for it.
+
+        The source file is checked on every call, so a table rewritten since
+        it was loaded is converted and mapped again, the same way fingerprint()
+        tells the update apart.
+        """
+        key = (column, tf_prefix)
+        source_path = self._source_path(column, tf_prefix)
+        with self._lock:
+            try:
+                cache_path = self._cache_path(source_path)
+            except FileNotFoundError:
+                self._tables.pop(key, None)
+                return None
+            loaded = self._tables.get(key)
+            if loaded is not None and loaded.path == cache_path:
+                return loaded
+            with telemetry.timed('tf_table_load'):
+                if not os.path.exists(cache_path):
+                    self._convert(source_path, cache_path, column, tf_prefix)
+                table = TermFrequencyTable(cache_path)
+            self._tables[key] = table
+            return table
+
+    def add_term_frequencies(self, records, settings):
+        """
+        Records with tf_<column> values looked up for every tf adjustment column.
+
+        Columns without a table are left out, so their adjustment stays neutral.
+        Records that already carry a tf value keep it.
+
+        Args:
+            records: List of record dictionaries
+            settings: Splink linker configuration
+
+        Returns:
+            List of new record dictionaries
+        """
+        _, _, tf_prefix = _prefixes(settings)
+        records = [dict(record) for record in records]
+        for column in tf_adjustment_columns(settings):
+            table = self.table(column, tf_prefix)
+            if table is None:
+                continue
+            tf_column = f'{tf_prefix}{column}'
+            missing = [record for record in records if record.get(tf_column) is None]
+            frequencies = table.lookup_many([record.get(column) for record in missing])
+            for record, frequency in zip(missing, frequencies):
+                record[tf_column] = frequency
+        return records
+
+    def register(self, conn, settings):
+        """
+        Register every available table of a model on a DuckDB connection.
+
+        The mapped Arrow batches are handed to DuckDB as they are, so joining
+        against them does not copy the tables.
+
+        Returns:
+            Dict of column name to registered view name
+        """
+        _, _, tf_prefix = _prefixes(settings)
+        views = {}
+        for column in tf_adjustment_columns(settings):
+            table = self.table(column, tf_prefix)
+            if table is None:
+                continue
+            view_name = f'__splink__df_tf_{column}'
+            conn.register(view_name, pa.Table.from_arrays(
+                [table.values, table.frequencies], names=[column, f'{tf_prefix}{column}']
+            ))
+            views[column] = view_name
+        return views
@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+
+from utils.sample_records import HARDCODED_RECORD_VALUES
+from utils.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Model URIs warmed at startup, separated by commas or newlines
+WARMUP_MODELS_ENV = 'MATCHAI_WARMUP_MODELS'
+
+# Warmup states of a model
+PENDING = 'pending'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+
+def warmup_model_uris():
+    """Model URIs listed in MATCHAI_WARMUP_MODELS, in order and without duplicates"""
+    text = os.environ.get(WARMUP_MODELS_ENV, '')
+    uris = [uri.strip() for line in text.splitlines() for uri in line.split(',')]
+    return list(dict.fromkeys(uri for uri in uris if uri))
+
+
+def warm_engine(comparison_engine, left_record=None, right_record=None):
+    """
+    Run a sample pair through every scoring path of a comparison engine.
+
+    Scores the pair singly and vectorized, executes the DuckDB fallback
+    statement (preparing its plan) and evaluates the blocking rules, so the
+    first real comparison finds every plan, table and extension loaded.
+
+    Args:
+        comparison_engine: Comparison engine to warm
+        left_record: Sample first record, HARDCODED_RECORD_VALUES by default
+        right_record: Sample second record, HARDCODED_RECORD_VALUES by default
+
+    Returns:
+        Prediction row of the sample pair
+    """
+    from utils.blocking_analysis import analyze_pair_blocking
+
+    left_record = left_record if left_record is not None else HARDCODED_RECORD_VALUES['left']
+    right_record = right_record if right_record is not None else HARDCODED_RECORD_VALUES['right']
+    prediction_row = comparison_engine.compare(left_record, right_record)[0]
+    comparison_engine.compare_many([left_record, right_record], [right_record, left_record])
+    comparison_engine.handler.compare_records(
+        comparison_engine.schema.coerce(left_record), comparison_engine.schema.coerce(right_record)
+    )
+    analyze_pair_blocking(comparison_engine.settings, left_record, right_record, schema=comparison_engine.schema)
+    return prediction_row
+
+
+class ModelWarmup:
+    """
+    Loads and warms a set of models on a background thread.
+
+    Each model is loaded through load_engine, which should populate the
+    process-wide engine cache so that sessions and requests pick the warmed
+    engine up, then warmed with warm_engine. A model that fails to load is
+    marked failed and the remaining models are still warmed.
+
+    Args:
+        load_engine: Callable returning the comparison engine of a model URI
+        on_scored: Optional callable receiving (engine, prediction row) of the
+            sample pair, to warm rendering as well
+    """
+
+    def __init__(self, load_engine, on_scored=None):
+        self.load_engine = load_engine
+        self.on_scored = on_scored
+        self._states = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, model_uris):
+        """Start warming the models in the background; does nothing without models"""
+        if not model_uris:
+            return
+        with self._lock:
+            for uri in model_uris:
+                self._states.setdefault(uri, PENDING)
+        self._thread = threading.Thread(target=self._run, args=(list(model_uris),), name='matchai-warmup', daemon=True)
+        self._thread.start()
+
+    def _run(self, model_uris):
+        for uri in model_uris:
+            self._set_state(uri, WARMING)
+            try:
+                with telemetry.timed('model_warmup', uri):
+                    engine = self.load_engine(uri)
+                    prediction_row = warm_engine(engine)
+                    if self.on_scored is not None:
+                        self.on_scored(engine, prediction_row)
+                self._set_state(uri, READY)
+            except Exception:
+                logger.exception("Failed to warm model %s", uri)
+                self._set_state(uri, FAILED)
+
+    def _set_state(self, model_uri, state):
+        with self._lock:
+            self._states[model_uri] = state
+
+    def states(self):
+        """Warmup state of each configured model URI"""
+        with self._lock:
+            return dict(self._states)
+
+    def is_ready(self, model_uri):
+        """Whether a model has been loaded and warmed"""
+        with self._lock:
+            return self._states.get(model_uri) == READY
+
+    def wait(self, timeout=None):
+        """Block until every model has been warmed or has failed"""
+        if self._thread is not None:
+            self._thread.join(timeout)